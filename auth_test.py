@@ -16,6 +16,7 @@ from tools.misc import ImmutableMapping
 
 
 class TestAuth(Tester):
+    allow_cluster_images = False  # waits for the default superuser to be created
 
     ignore_log_patterns = (
         # This one occurs if we do a non-rolling upgrade, the node
@@ -1039,6 +1040,8 @@ class TestAuthRoles(Tester):
     """
     @jira_ticket CASSANDRA-7653
     """
+    allow_cluster_images = False  # waits for the default superuser to be created
+
     if CASSANDRA_VERSION_FROM_BUILD >= '3.0':
         cluster_options = ImmutableMapping({'enable_user_defined_functions': 'true',
                                             'enable_scripted_user_defined_functions': 'true'})
@@ -12,6 +12,7 @@ from tools.decorators import since
 
 
 class TestBatch(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def empty_batch_throws_no_error_test(self):
         """
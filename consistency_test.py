@@ -20,6 +20,7 @@ ExpectedConsistency = namedtuple('ExpectedConsistency', ('num_write_nodes', 'num
 
 
 class TestHelper(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def __init__(self, *args, **kwargs):
         Tester.__init__(self, *args, **kwargs)
@@ -777,6 +778,7 @@ class TestAccuracy(TestHelper):
 
 
 class TestConsistency(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     @known_failure(failure_source='test',
                    jira_url='https://issues.apache.org/jira/browse/CASSANDRA-12475',
@@ -12,6 +12,7 @@ from tools.decorators import since
 
 
 class TestCounters(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def simple_increment_test(self):
         """ Simple incrementation test (Created for #3465, that wasn't a bug) """
@@ -0,0 +1,167 @@
+# coding: utf-8
+"""
+Throughput benchmarks for cqlsh COPY FROM and COPY TO.
+
+These are not run as part of the normal suite, since nose only collects
+modules whose names look like tests; run them explicitly, e.g.
+
+    COPY_BENCHMARK_ROWS=10000,1000000 nosetests -v cqlsh_tests/cqlsh_copy_benchmarks.py
+
+For each number of rows in COPY_BENCHMARK_ROWS (10000 by default), a
+deterministic CSV file of that many rows covering every CQL data type (the
+testdatatype table from CqlshCopyTester.all_datatypes_prepare) is imported
+with COPY FROM and exported again with COPY TO, once with cqlsh's default
+options and once per value of each option being swept. Each run's wall time,
+rows per second, options and the last line of its RATEFILE are appended to
+the JSON report at COPY_BENCHMARK_REPORT (copy_benchmark.json by default),
+so runs against different Cassandra builds can be compared.
+"""
+import csv
+import json
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+
+from cassandra.util import uuid_from_time
+from nose.plugins.attrib import attr
+
+from cqlsh_copy_tests import CqlshCopyTester
+from dtest import canReuseCluster, debug
+from tools.token_scan import assert_scanned_row_count
+
+BENCHMARK_ROWS = [int(float(n)) for n in os.environ.get('COPY_BENCHMARK_ROWS', '10000').split(',')]
+BENCHMARK_REPORT = os.environ.get('COPY_BENCHMARK_REPORT', 'copy_benchmark.json')
+
+# each option is swept on its own, the others keeping cqlsh's defaults
+COPY_FROM_SWEEP = OrderedDict([
+    ('NUMPROCESSES', (1, 4, 8)),
+    ('CHUNKSIZE', (1000, 5000, 20000)),
+    ('MAXBATCHSIZE', (10, 20, 50)),
+    ('INGESTRATE', (10000, 100000, 1000000)),
+])
+COPY_TO_SWEEP = OrderedDict([
+    ('NUMPROCESSES', (1, 4, 8)),
+])
+
+# e.g. 'Processed: 200000 rows; Rate:   41512 rows/s; Avg. rate:   37916 rows/s'
+_RATE_LINE = re.compile(r'Processed: (\d+) rows;.*Avg\. rate:\s*(\d+) rows/s')
+
+
+def option_sets(sweep):
+    """
+    Yield the options for each run of a sweep: no options first, to measure
+    cqlsh's defaults, then a single option set to each of its values.
+    """
+    yield OrderedDict()
+    for option, values in sweep.items():
+        for value in values:
+            yield OrderedDict([(option, value)])
+
+
+def last_rate(ratefile_name):
+    """
+    Return (rows processed, average rows per second) from the last line of a
+    COPY RATEFILE, or (None, None) if it has no rate line.
+    """
+    last = None
+    with open(ratefile_name) as f:
+        for line in f:
+            m = _RATE_LINE.search(line)
+            if m:
+                last = m
+    return (int(last.group(1)), int(last.group(2))) if last else (None, None)
+
+
+@canReuseCluster
+class CqlshCopyBenchmark(CqlshCopyTester):
+    """
+    Measures COPY FROM and COPY TO throughput for tables of every data type.
+    """
+
+    def write_dataset(self, filename, num_rows):
+        """
+        Write num_rows rows for the testdatatype table to filename as CSV. The
+        rows are derived from self.data, with the key and a few other columns
+        set from the row number, so the same file is written on every run.
+        """
+        template = list(self.data)
+        # serializing blob bytearray in friendly format
+        template[2] = '0x{}'.format(''.join('%02x' % c for c in self.data[2]))
+        with open(filename, 'wb') as csvfile:
+            writer = csv.writer(csvfile)
+            for i in xrange(num_rows):
+                row = list(template)
+                row[0] = 'key{}'.format(i)  # a ascii
+                row[1] = i  # b bigint
+                row[5] = i / 7.0  # f double
+                row[8] = i % 2 ** 31  # i int
+                row[11] = uuid_from_time(i, node=0, clock_seq=0)  # l timeuuid
+                row[12] = uuid.UUID(int=i)  # m uuid
+                writer.writerow(row)
+
+    def run_copy(self, operation, filename, num_rows, options):
+        """
+        Run a COPY FROM or COPY TO, given as operation, of the testdatatype
+        table with options, check that num_rows rows were processed and add
+        the measurements to the report.
+        """
+        ratefile = self.get_temp_file()
+        options = OrderedDict(options, RATEFILE="'{}'".format(ratefile.name), REPORTFREQUENCY=1)
+        cmds = "COPY ks.testdatatype {} '{}' WITH {}".format(
+            operation, filename, ' AND '.join('{}={}'.format(k, v) for k, v in options.items()))
+
+        start = time.time()
+        self.run_cqlsh(cmds=cmds, debug=False)
+        wall_time = time.time() - start
+
+        processed, rate = last_rate(ratefile.name)
+        self.assertEqual(num_rows, processed, "{} processed {} rows instead of {}".format(cmds, processed, num_rows))
+        del options['RATEFILE'], options['REPORTFREQUENCY']
+        result = OrderedDict([('operation', 'COPY ' + operation),
+                              ('rows', num_rows),
+                              ('options', options),
+                              ('wall_seconds', round(wall_time, 3)),
+                              ('rows_per_second', int(num_rows / wall_time)),
+                              ('ratefile_rows_per_second', rate),
+                              ('cassandra_version', str(self.cluster.version()))])
+        debug('{operation} of {rows} rows with {options}: {rows_per_second} rows/s'.format(**result))
+        self.add_to_report(result)
+
+    def add_to_report(self, result):
+        """
+        Append result to the JSON report, rewriting it so that the results of
+        an interrupted run are kept.
+        """
+        results = []
+        if os.path.exists(BENCHMARK_REPORT):
+            with open(BENCHMARK_REPORT) as f:
+                results = json.load(f)
+        results.append(result)
+        with open(BENCHMARK_REPORT, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    @attr('resource-intensive')
+    def test_copy_throughput(self):
+        """
+        Time COPY FROM and COPY TO at each size in COPY_BENCHMARK_ROWS over the
+        option sweeps, checking each run processed every row.
+        """
+        self.all_datatypes_prepare()
+
+        for num_rows in BENCHMARK_ROWS:
+            dataset = self.get_temp_file(suffix='.csv')
+            self.write_dataset(dataset.name, num_rows)
+
+            for options in option_sets(COPY_FROM_SWEEP):
+                self.session.execute('TRUNCATE testdatatype')
+                self.run_copy('FROM', dataset.name, num_rows, options)
+
+            # a single coordinator's COUNT(*) times out at the larger sizes, so count the rows a token range at a time
+            assert_scanned_row_count(self.session, 'ks.testdatatype', num_rows, columns=['a'])
+
+            for options in option_sets(COPY_TO_SWEEP):
+                exported = self.get_temp_file(suffix='.csv')
+                self.run_copy('TO', exported.name, num_rows, options)
+                os.unlink(exported.name)
@@ -10,7 +10,7 @@ from collections import namedtuple
 from contextlib import contextmanager
 from decimal import Decimal
 from distutils.version import LooseVersion
-from functools import partial
+from itertools import islice
 from tempfile import NamedTemporaryFile, gettempdir, template
 from uuid import uuid1, uuid4
 
@@ -21,11 +21,11 @@ from cassandra.murmur3 import murmur3
 from cassandra.util import SortedSet
 from ccmlib.common import is_win
 
-from cqlsh_tools import (DummyColorMap, assert_csvs_items_equal, csv_rows,
-                         monkeypatch_driver, random_list, unmonkeypatch_driver,
-                         write_rows_to_csv)
+from cqlsh_tools import (DummyColorMap, assert_csvs_items_equal,
+                         assert_rows_items_equal, csv_rows, monkeypatch_driver,
+                         random_list, unmonkeypatch_driver, write_rows_to_csv)
 from dtest import (DISABLE_VNODES, Tester, canReuseCluster, debug,
-                   freshCluster, warning)
+                   freshCluster)
 from tools.data import rows_to_list
 from tools.decorators import known_failure, since
 from tools.metadata_wrapper import (UpdatingClusterMetadataWrapper,
@@ -54,11 +54,10 @@ class UTC(datetime.tzinfo):
         return datetime.timedelta(0)
 
 
-@canReuseCluster
-class CqlshCopyTest(Tester):
+class CqlshCopyTester(Tester):
     """
-    Tests the COPY TO and COPY FROM features in cqlsh.
-    @jira_ticket CASSANDRA-3906
+    The cluster, schema and result checking helpers shared by the COPY tests
+    and benchmarks.
     """
 
     def __init__(self, *args, **kwargs):
@@ -75,7 +74,7 @@ class CqlshCopyTest(Tester):
 
     def tearDown(self):
         self.delete_temp_files()
-        super(CqlshCopyTest, self).tearDown()
+        super(CqlshCopyTester, self).tearDown()
 
     def get_temp_file(self, prefix=template, suffix=""):
         """
@@ -323,7 +322,22 @@ class CqlshCopyTest(Tester):
             sys.path = saved_path
 
     def assertCsvResultEqual(self, csv_filename, results, table_name=None,
-                             columns=None, cql_type_names=None, nullval=''):
+                             columns=None, cql_type_names=None, nullval='', fetch_size=1000):
+        """
+        Check that the CSV file holds the rows of results, formatted like COPY TO does, in any order.
+        results is either a list of rows or a SELECT query. A query is paged through fetch_size rows
+        at a time, and run again to list the differences if there are any, so that its results are
+        never all held in memory.
+        """
+        if isinstance(results, basestring):
+            query = results
+
+            def result_rows():
+                return self.session.execute(SimpleStatement(query, fetch_size=fetch_size))
+        else:
+            def result_rows():
+                return results
+
         if cql_type_names is None:
             if table_name:
                 table_meta = UpdatingTableMetadataWrapper(
@@ -336,25 +350,19 @@ class CqlshCopyTest(Tester):
             else:
                 raise RuntimeError("table_name is required if cql_type_names are not specified")
 
-        processed_results = list(self.result_to_csv_rows(results, cql_type_names, nullval=nullval))
-        csv_results = list(csv_rows(csv_filename))
+        # compared as streams, so exports of millions of rows aren't held in memory
+        assert_rows_items_equal(lambda: csv_rows(csv_filename),
+                                lambda: self.iter_csv_rows(result_rows(), cql_type_names, nullval=nullval),
+                                first_name='CSV file {}'.format(csv_filename), second_name='query results')
 
-        self.maxDiff = None
-        try:
-            self.assertItemsEqual(csv_results, processed_results)
-        except Exception as e:
-            if len(csv_results) != len(processed_results):
-                warning("Different # of entries. CSV: " + str(len(csv_results)) +
-                        " vs results: " + str(len(processed_results)))
-            elif csv_results[0] is not None:
-                for x in range(0, len(csv_results[0])):
-                    if csv_results[0][x] != processed_results[0][x]:
-                        warning("Mismatch at index: " + str(x))
-                        warning("Value in csv: " + str(csv_results[0][x]))
-                        warning("Value in result: " + str(processed_results[0][x]))
-            raise e
-
-    def make_csv_formatter(self, time_format, nullval):
+    def make_csv_formatters(self, cql_type_names, time_format, nullval):
+        """
+        Return, for each of the columns whose types are named in cql_type_names,
+        a function formatting a value of that column the way COPY TO does.
+        Everything that depends on the column rather than the value, such as
+        the CqlType, the float precision and the date format, is worked out
+        here once instead of for every cell.
+        """
         with self._cqlshlib() as cqlshlib:  # noqa
             from cqlshlib.formatting import format_value, format_value_default
             from cqlshlib.displaying import NO_COLOR_MAP
@@ -366,79 +374,100 @@ class CqlshCopyTest(Tester):
                     date_time_format.milliseconds_only = True
             except ImportError:
                 date_time_format = None
+            try:
+                from cqlshlib.formatting import CqlType
+            except ImportError:
+                CqlType = None
 
-        encoding_name = 'utf-8'  # codecs.lookup(locale.getpreferredencoding()).name
-        color_map = DummyColorMap()
-
-        def formatter(val, cql_type_name, cql_type):
-            if cql_type is None:
-                # Backward compatibility before formatting.CqlType was introduced:
-                # we must convert blob types to bytearray instances;
-                # the format_value() signature was changed and the first type(val) argument removed, so we add it via
-                # a partial binding;
-                # cql_type will be ignored so we set it to None
-                #
-                # Once the minimum version supported is 3.6 this code can be dropped.
-                if isinstance(val, str) and cql_type_name == 'blob':
-                    val = bytearray(val)
-
-                format_fn = partial(format_value, type(val))
-            else:
-                format_fn = format_value
-
-            if val is None or val == EMPTY or val == nullval:
-                return format_value_default(nullval, colormap=NO_COLOR_MAP)
+        # build the typemap once ahead of time to speed up formatting
+        if CqlType is not None:
+            ks_meta = UpdatingClusterMetadataWrapper(self.session.cluster).keyspaces[self.ks]
+            cql_type_map = dict([(type_name, CqlType(type_name, ks_meta)) for type_name in set(cql_type_names)])
+        else:
+            cql_type_map = {}
 
-            # CASSANDRA-11255 increased COPY TO DOUBLE PRECISION TO 12
-            if cql_type_name == 'double' and self.cluster.version() >= LooseVersion('3.6'):
-                float_precision = 12
-            else:
-                float_precision = 5
+        formatted_null = format_value_default(nullval, colormap=NO_COLOR_MAP)
+        # CASSANDRA-11255 increased COPY TO DOUBLE PRECISION TO 12
+        double_precision = 12 if self.cluster.version() >= LooseVersion('3.6') else 5
 
+        def column_formatter(cql_type_name):
+            cql_type = cql_type_map.get(cql_type_name)
             # different versions use time_format or date_time_format
             # but all versions reject spurious values, so we just use both here
-            return format_fn(val,
-                             cqltype=cql_type,
-                             encoding=encoding_name,
-                             date_time_format=date_time_format,
-                             time_format=time_format,
-                             float_precision=float_precision,
-                             colormap=color_map,
-                             nullval=nullval,
-                             decimal_sep=None,
-                             thousands_sep=None,
-                             boolean_styles=None).strval
-
-        return formatter
+            options = dict(cqltype=cql_type,
+                           encoding='utf-8',  # codecs.lookup(locale.getpreferredencoding()).name
+                           date_time_format=date_time_format,
+                           time_format=time_format,
+                           float_precision=double_precision if cql_type_name == 'double' else 5,
+                           colormap=DummyColorMap(),
+                           nullval=nullval,
+                           decimal_sep=None,
+                           thousands_sep=None,
+                           boolean_styles=None)
+
+            if cql_type is not None:
+                def formatter(val):
+                    if val is None or val == EMPTY or val == nullval:
+                        return formatted_null
+                    return format_value(val, **options).strval
+                return formatter
+
+            # Backward compatibility before formatting.CqlType was introduced:
+            # we must convert blob types to bytearray instances;
+            # the format_value() signature was changed and the first type(val) argument removed, so we add it
+            # back; cql_type will be ignored so we set it to None
+            #
+            # Once the minimum version supported is 3.6 this code can be dropped.
+            is_blob = cql_type_name == 'blob'
+
+            def legacy_formatter(val):
+                if is_blob and isinstance(val, str):
+                    val = bytearray(val)
+                if val is None or val == EMPTY or val == nullval:
+                    return formatted_null
+                return format_value(type(val), val, **options).strval
+            return legacy_formatter
+
+        return [column_formatter(type_name) for type_name in cql_type_names]
 
     def result_to_csv_rows(self, results, cql_type_names, time_format=None, nullval=''):
         """
         Given an object returned from a CQL query, returns a string formatted by
         the cqlsh formatting utilities.
         """
+        return list(self.iter_csv_rows(results, cql_type_names, time_format=time_format, nullval=nullval))
+
+    def iter_csv_rows(self, results, cql_type_names, time_format=None, nullval='', page_size=5000):
+        """
+        Like result_to_csv_rows, but yields the formatted rows one at a time,
+        reading page_size rows from results at once.
+        """
         # This has no real dependencies on Tester except that self._cqlshlib has
         # to grab self.cluster's install directory. This should be pulled out
         # into a bare function if cqlshlib is made easier to interact with.
         if not time_format:
             time_format = self.default_time_format
 
-        processed = []
-        format_fn = self.make_csv_formatter(time_format, nullval)
+        formatters = self.make_csv_formatters(cql_type_names, time_format, nullval)
 
-        # build the typemap once ahead of time to speed up formatting
-        try:
-            from cqlshlib.formatting import CqlType
-            cluster_meta = UpdatingClusterMetadataWrapper(self.session.cluster)
-            ks_meta = cluster_meta.keyspaces[self.ks]
-            cql_type_map = dict([(type_name, CqlType(type_name, ks_meta)) for type_name in cql_type_names])
-        except ImportError:
-            cql_type_map = {}
+        # format a page of rows at a time, a column at a time, so that each
+        # column's formatter is applied by a single map() call per page
+        results = iter(results)
+        while True:
+            page = list(islice(results, page_size))
+            if not page:
+                return
+            columns = [map(formatter, column) for formatter, column in zip(formatters, zip(*page))]
+            for row in zip(*columns):
+                yield list(row)
 
-        for i, row in enumerate(results):
-            formatted_row = [format_fn(v, t, cql_type_map.get(t))
-                             for v, t in zip(row, cql_type_names)]
-            processed.append(formatted_row)
-        return processed
+
+@canReuseCluster
+class CqlshCopyTest(CqlshCopyTester):
+    """
+    Tests the COPY TO and COPY FROM features in cqlsh.
+    @jira_ticket CASSANDRA-3906
+    """
 
     def test_list_data(self):
         """
@@ -2856,8 +2885,7 @@ class CqlshCopyTest(Tester):
         debug('Importing from csv file {}'.format(tempfile.name))
         self.run_cqlsh(cmds="COPY {} FROM '{}' WITH MAXBATCHSIZE=1".format(stress_ks_table_name, tempfile.name))
 
-        results = list(self.session.execute("SELECT * FROM {}".format(stress_ks_table_name)))
-        self.assertCsvResultEqual(tempfile.name, results, stress_table_name)
+        self.assertCsvResultEqual(tempfile.name, "SELECT * FROM {}".format(stress_ks_table_name), stress_table_name)
 
         # Import without prepared statements and verify
         self.session.execute("TRUNCATE {}".format(stress_ks_table_name))
@@ -2866,8 +2894,7 @@ class CqlshCopyTest(Tester):
         self.run_cqlsh(cmds="COPY {} FROM '{}' WITH MAXBATCHSIZE=1 AND PREPAREDSTATEMENTS=FALSE"
                        .format(stress_ks_table_name, tempfile.name))
 
-        results = list(self.session.execute("SELECT * FROM {}".format(stress_ks_table_name)))
-        self.assertCsvResultEqual(tempfile.name, results, stress_table_name)
+        self.assertCsvResultEqual(tempfile.name, "SELECT * FROM {}".format(stress_ks_table_name), stress_table_name)
 
     def test_copy_from_with_brackets_in_UDT(self):
         """
@@ -1,8 +1,13 @@
 import csv
+import heapq
+import json
 import random
+import tempfile
+from itertools import islice
 
 import cassandra
-from nose.tools import assert_items_equal
+
+from tools.assertions import multiset_digest
 
 
 class DummyColorMap(object):
@@ -23,9 +28,112 @@ def csv_rows(filename, delimiter=None):
             yield row
 
 
+def file_lines(filename):
+    """
+    Given a filename, yields each of its lines as a single-cell row.
+    """
+    with open(filename, 'r') as f:
+        for line in f:
+            yield (line,)
+
+
 def assert_csvs_items_equal(filename1, filename2):
-    with open(filename1, 'r') as x, open(filename2, 'r') as y:
-        assert_items_equal(list(x.readlines()), list(y.readlines()))
+    assert_rows_items_equal(lambda: file_lines(filename1), lambda: file_lines(filename2),
+                            first_name=filename1, second_name=filename2)
+
+
+def _row_key(row):
+    """
+    Serialize a row, a sequence of cells, to a single line of text that
+    identifies it. Unicode cells are compared by their UTF-8 encoding, like
+    the bytes read from a CSV file.
+    """
+    cells = [cell.encode('utf-8') if isinstance(cell, unicode) else cell for cell in row]
+    # latin-1 maps every byte to a character, so any cell bytes can be serialized
+    return json.dumps(cells, encoding='latin-1')
+
+
+def _key_row(key):
+    return [cell.encode('latin-1') if isinstance(cell, unicode) else cell for cell in json.loads(key)]
+
+
+def sorted_row_keys(rows, chunk_size=100000):
+    """
+    Yield the key of each row, as produced by _row_key, in sorted order. At
+    most chunk_size keys are held in memory: bigger inputs are sorted a
+    chunk at a time into temporary files, which are then merged.
+    """
+    rows = iter(rows)
+    runs = []
+    try:
+        while True:
+            keys = sorted(_row_key(row) for row in islice(rows, chunk_size))
+            if not runs and len(keys) < chunk_size:
+                # everything fit in a single chunk
+                for key in keys:
+                    yield key
+                return
+            if not keys:
+                break
+            run = tempfile.TemporaryFile()
+            run.writelines(key + '\n' for key in keys)
+            run.seek(0)
+            runs.append(run)
+        for key in heapq.merge(*[(line.rstrip('\n') for line in f) for f in runs]):
+            yield key
+    finally:
+        for run in runs:
+            run.close()
+
+
+def sorted_difference(first_keys, second_keys, limit=None):
+    """
+    Given two iterators of sorted keys, return the lists of keys only in the
+    first and only in the second, counting repetitions, with at most limit
+    keys in each list.
+    """
+    only_first, only_second = [], []
+    first, second = next(first_keys, None), next(second_keys, None)
+    while first is not None or second is not None:
+        if limit is not None and len(only_first) >= limit and len(only_second) >= limit:
+            break
+        if second is None or (first is not None and first < second):
+            if limit is None or len(only_first) < limit:
+                only_first.append(first)
+            first = next(first_keys, None)
+        elif first is None or second < first:
+            if limit is None or len(only_second) < limit:
+                only_second.append(second)
+            second = next(second_keys, None)
+        else:
+            first, second = next(first_keys, None), next(second_keys, None)
+    return only_first, only_second
+
+
+def assert_rows_items_equal(first, second, first_name='first', second_name='second', max_shown=10):
+    """
+    Assert that two collections of rows hold the same rows in any order, like
+    assert_items_equal, without holding either collection in memory.
+
+    @param first A callable taking no arguments that returns an iterator over the first collection of rows.
+    @param second The same, for the second collection. Both are read once to compare their multiset_digest,
+           and if those differ, once more through an external sort to find the rows that differ.
+    @param first_name How to refer to the first collection in the error message.
+    @param second_name How to refer to the second collection in the error message.
+    @param max_shown The largest number of differing rows from each collection to show in the error message.
+    """
+    first_count, first_digest = multiset_digest(first(), key=_row_key)
+    second_count, second_digest = multiset_digest(second(), key=_row_key)
+    if (first_count, first_digest) == (second_count, second_digest):
+        return
+
+    only_first, only_second = sorted_difference(sorted_row_keys(first()), sorted_row_keys(second()), limit=max_shown)
+    message = ['{} has {} rows and {} has {}'.format(first_name, first_count, second_name, second_count)]
+    for name, keys in ((first_name, only_first), (second_name, only_second)):
+        if keys:
+            message.append('Rows only in {} (showing at most {}):'.format(name, max_shown))
+            message.extend('    {!r}'.format(_key_row(key)) for key in keys)
+    raise AssertionError('\n'.join(message))
 
 
 def random_list(gen=None, n=None):
@@ -13,6 +13,8 @@ class DeleteInsertTest(Tester):
     """
     Examines scenarios around deleting data and adding data back with the same key
     """
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
+
     # Generate 1000 rows in memory so we can re-use the same ones over again:
     groups = ['group1', 'group2', 'group3', 'group4']
     rows = [(str(uuid.uuid1()), x, random.choice(groups)) for x in range(1000)]
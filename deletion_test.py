@@ -7,6 +7,7 @@ from tools.jmxutils import (JolokiaAgent, make_mbean,
 
 
 class TestDeletion(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def gc_test(self):
         """
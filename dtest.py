@@ -1,7 +1,6 @@
 from __future__ import with_statement
 
 import ConfigParser
-import copy
 import errno
 import glob
 import logging
@@ -20,6 +19,7 @@ import traceback
 import types
 import unittest.case
 from collections import OrderedDict
+from distutils.version import LooseVersion
 from subprocess import CalledProcessError
 from unittest import TestCase
 
@@ -41,8 +41,28 @@ from plugins.dtestconfig import _CONFIG as CONFIG
 # We don't want test files to know about the plugins module, so we import
 # constants here and re-export them.
 from plugins.dtestconfig import GlobalConfigObject
+from plugins.dtestphases import timed_phase
+from tools import cluster_image
 from tools.context import log_filter
+from tools.driver_cluster import DriverClusterCache, SharedDriverCluster
 from tools.funcutils import merge_dicts
+from tools.log_index import LogIndex, any_pattern
+from tools.log_watch import ActiveLogWatch, LogWatcher
+from tools.probe_cache import cached, file_state, git_head_state
+from tools.retry import RETRY_STATS, port_open, retry_till_success
+
+# When run_dtests.py splits a run across several --workers, each worker is
+# given its own loopback address block, port offset and scratch directory so
+# that its clusters can't collide with another worker's.
+WORKER_ID = os.environ.get('DTEST_WORKER_ID')
+IP_PREFIX = os.environ.get('DTEST_IP_PREFIX', '127.0.0.')
+PORT_OFFSET = int(os.environ.get('DTEST_PORT_OFFSET', '0'))
+TEST_PATH_ROOT = os.environ.get('DTEST_TEST_PATH_ROOT')  # None means the system temp dir
+# Spare clusters kept warm by ReusableClusterTester live on a second address
+# block and port offset. run_dtests.py picks them for each worker so that they
+# never overlap another worker's; a run without workers uses block 50.
+SPARE_IP_PREFIX = os.environ.get('DTEST_SPARE_IP_PREFIX', '127.0.50.')
+SPARE_PORT_OFFSET = int(os.environ.get('DTEST_SPARE_PORT_OFFSET', str(PORT_OFFSET + 50)))
 
 LOG_SAVED_DIR = "logs"
 try:
@@ -52,7 +72,7 @@ except OSError:
 
 LAST_LOG = os.path.join(LOG_SAVED_DIR, "last")
 
-LAST_TEST_DIR = 'last_test_dir'
+LAST_TEST_DIR = 'last_test_dir' if WORKER_ID is None else 'last_test_dir_worker{}'.format(WORKER_ID)
 
 DEFAULT_DIR = './'
 config = ConfigParser.RawConfigParser()
@@ -75,6 +95,10 @@ IGNORE_REQUIRE = os.environ.get('IGNORE_REQUIRE', '').lower() in ('yes', 'true')
 DATADIR_COUNT = os.environ.get('DATADIR_COUNT', '3')
 ENABLE_ACTIVE_LOG_WATCHING = os.environ.get('ENABLE_ACTIVE_LOG_WATCHING', '').lower() in ('yes', 'true')
 RUN_STATIC_UPGRADE_MATRIX = os.environ.get('RUN_STATIC_UPGRADE_MATRIX', '').lower() in ('yes', 'true')
+# only ReusableClusterTester subclasses keep a spare cluster, not @canReuseCluster classes
+KEEP_SPARE_CLUSTER = os.environ.get('KEEP_SPARE_CLUSTER', '').lower() in ('yes', 'true')
+# directory of cached freshly-bootstrapped clusters, see tools/cluster_image.py; None disables the cache
+CLUSTER_IMAGE_DIR = os.environ.get('CLUSTER_IMAGE_DIR')
 
 # devault values for configuration from configuration plugin
 _default_config = GlobalConfigObject(
@@ -93,13 +117,15 @@ if os.environ.get('DISABLE_VNODES', '').lower() in ('yes', 'true'):
 
 CURRENT_TEST = ""
 
-logging.basicConfig(filename=os.path.join(LOG_SAVED_DIR, "dtest.log"),
+logging.basicConfig(filename=os.path.join(LOG_SAVED_DIR, "dtest.log" if WORKER_ID is None else "dtest_worker{}.log".format(WORKER_ID)),
                     filemode='w',
                     format='%(asctime)s,%(msecs)d %(name)s %(current_test)s %(levelname)s %(message)s',
                     datefmt='%H:%M:%S',
                     level=logging.DEBUG)
 
 LOG = logging.getLogger('dtest')
+# shared incremental index over the nodes' log files, see tools/log_index.py
+LOG_INDEX = LogIndex()
 # set python-driver log level to INFO by default for dtest
 logging.getLogger('cassandra').setLevel(logging.INFO)
 
@@ -129,15 +155,55 @@ def get_sha(repo_dir):
 # strategy as the actual checkout code in Tester.setUp; if it does not, that is
 # a bug.
 _cassandra_version_slug = os.environ.get('CASSANDRA_VERSION')
-# Prefer CASSANDRA_VERSION if it's set in the environment. If not, use CASSANDRA_DIR
-if _cassandra_version_slug:
+
+
+def _version_and_gitref(repo_dir):
+    return [str(get_version_from_build(repo_dir)), get_sha(repo_dir)]
+
+
+def _install_dir_key(install_dir):
+    """
+    The cache key for the version and git sha of the Cassandra at install_dir,
+    see tools/probe_cache.py.
+    """
+    return [os.path.realpath(install_dir),
+            file_state(os.path.join(install_dir, 'build.xml'), os.path.join(install_dir, '0.version.txt')),
+            git_head_state(install_dir),
+            os.environ.get('LOCAL_GIT_REPO')]
+
+
+def _setup_version_slug():
     # fetch but don't build the specified C* version
     ccm_repo_cache_dir, _ = ccmlib.repository.setup(_cassandra_version_slug)
-    CASSANDRA_VERSION_FROM_BUILD = get_version_from_build(ccm_repo_cache_dir)
-    CASSANDRA_GITREF = get_sha(ccm_repo_cache_dir)  # will be set None when not a git repo
+    return _version_and_gitref(ccm_repo_cache_dir)
+
+
+def _slug_moves(slug):
+    """
+    Whether the version slug can resolve to a different version over time:
+    the release aliases, and git: or github: slugs naming a branch or tag
+    rather than a full sha. Only ccmlib.repository.setup fetches the new
+    version of these, so they mustn't be cached.
+    """
+    if slug in ('stable', 'oldstable', 'testing'):
+        return True
+    if slug.startswith(('git:', 'github:')):
+        return re.match(r'^[0-9a-f]{40}$', re.split('[:/]', slug)[-1]) is None
+    return False
+
+
+# Prefer CASSANDRA_VERSION if it's set in the environment. If not, use CASSANDRA_DIR.
+# Both are cached on disk, as finding them out can mean fetching the C* repository
+# or walking the whole of CASSANDRA_DIR, and every test process needs them.
+if _cassandra_version_slug:
+    if _slug_moves(_cassandra_version_slug):
+        _version_key = None  # always look these up
+    else:
+        _version_key = ['slug', _cassandra_version_slug, _install_dir_key(ccmlib.repository.directory_name(_cassandra_version_slug))]
+    _version, CASSANDRA_GITREF = cached('cassandra_version', _version_key, _setup_version_slug)  # gitref is None when not a git repo
 else:
-    CASSANDRA_VERSION_FROM_BUILD = get_version_from_build(CASSANDRA_DIR)
-    CASSANDRA_GITREF = get_sha(CASSANDRA_DIR)
+    _version, CASSANDRA_GITREF = cached('cassandra_version', _install_dir_key(CASSANDRA_DIR), lambda: _version_and_gitref(CASSANDRA_DIR))
+CASSANDRA_VERSION_FROM_BUILD = LooseVersion(_version)
 
 
 # Determine the location of the libjemalloc jar so that we can specify it
@@ -161,9 +227,25 @@ def find_libjemalloc():
         print "Failed to run script to prelocate libjemalloc ({}): {}".format(script, exc)
         return ""
 
-CASSANDRA_LIBJEMALLOC = find_libjemalloc()
+
+_libjemalloc = None
+
+
+def get_libjemalloc():
+    """
+    Return the result of find_libjemalloc, which searches the library
+    directories, only searching when the dynamic linker's configuration has
+    changed since it was last cached on disk.
+    """
+    global _libjemalloc
+    if _libjemalloc is None:
+        key = [file_state('/etc/ld.so.conf', '/etc/ld.so.conf.d', '/etc/ld.so.cache'),
+               [os.environ.get(var) for var in ('DYLD_LIBRARY_PATH', 'DYLD_FALLBACK_LIBRARY_PATH')]]
+        _libjemalloc = cached('libjemalloc', key, find_libjemalloc)
+    return _libjemalloc
+
 # copy the initial environment variables so we can reset them later:
-initial_environment = copy.deepcopy(os.environ)
+initial_environment = dict(os.environ)
 
 
 class DtestTimeoutError(Exception):
@@ -189,20 +271,15 @@ def debug(msg):
 debug("Python driver version in use: {}".format(cassandra.__version__))
 
 
-def retry_till_success(fun, *args, **kwargs):
-    timeout = kwargs.pop('timeout', 60)
-    bypassed_exception = kwargs.pop('bypassed_exception', Exception)
-
-    deadline = time.time() + timeout
-    while True:
-        try:
-            return fun(*args, **kwargs)
-        except bypassed_exception:
-            if time.time() > deadline:
-                raise
-            else:
-                # brief pause before next attempt
-                time.sleep(0.25)
+def debug_retries():
+    """
+    Log the retry_till_success calls made since the last call of this
+    function that had to retry, to show where tests spend time waiting.
+    """
+    for record in RETRY_STATS.drain():
+        if record.attempts > 1 or record.probes > 1:
+            debug("retry_till_success({0.name}): {0.attempts} attempts, {0.probes} readiness probes, "
+                  "waited {0.waited:.2f}s of {0.elapsed:.2f}s".format(record))
 
 
 class FlakyRetryPolicy(RetryPolicy):
@@ -273,6 +350,9 @@ class Tester(TestCase):
     maxDiff = None
     allow_log_errors = False  # scan the log of each node for errors after every test.
     cluster_options = None
+    allow_cluster_images = True  # set False for tests that inspect what happens on a node's very first start.
+    share_driver_clusters = True  # set False for tests that need each connection to use its own driver Cluster.
+    lazy_driver_metadata = False  # set True for tests that only read driver metadata through tools.data and tools.metadata_wrapper.
 
     def set_node_to_current_version(self, node):
         version = os.environ.get('CASSANDRA_VERSION')
@@ -292,16 +372,22 @@ class Tester(TestCase):
         maybe_cleanup_cluster_from_last_test_file()
 
         self.test_path = get_test_path()
-        self.cluster = create_ccm_cluster(self.test_path, name='test')
+        with timed_phase('create_ccm_cluster'):
+            self.cluster = create_ccm_cluster(self.test_path, name='test')
+        if not self.allow_cluster_images:
+            self.cluster.image_dir = None
 
         self.maybe_begin_active_log_watch()
-        maybe_setup_jacoco(self.test_path)
+        with timed_phase('jacoco'):
+            maybe_setup_jacoco(self.test_path)
 
         self.init_config()
         write_last_test_file(self.test_path, self.cluster)
 
-        set_log_levels(self.cluster)
+        with timed_phase('set_log_levels'):
+            set_log_levels(self.cluster)
         self.connections = []
+        self.driver_clusters = DriverClusterCache()
         self.runners = []
 
     # this is intentionally spelled 'tst' instead of 'test' to avoid
@@ -317,9 +403,10 @@ class Tester(TestCase):
 
     def begin_active_log_watch(self):
         """
-        Calls into ccm to start actively watching logs.
+        Starts a thread actively watching logs. It wakes up as soon as a
+        node's system.log is written to (see tools/log_watch.py).
 
-        In the event that errors are seen in logs, ccm will call back to _log_error_handler.
+        In the event that errors are seen in logs, the thread will call back to _log_error_handler.
 
         When the cluster is no longer in use, stop_active_log_watch should be called to end log watching.
         (otherwise a 'daemon' thread will (needlessly) run until the process exits).
@@ -327,7 +414,8 @@ class Tester(TestCase):
         # log watching happens in another thread, but we want it to halt the main
         # thread's execution, which we have to do by registering a signal handler
         signal.signal(signal.SIGINT, self._catch_interrupt)
-        self._log_watch_thread = self.cluster.actively_watch_logs_for_error(self._log_error_handler, interval=0.25)
+        self._log_watch_thread = ActiveLogWatch(self.cluster, LOG_INDEX, self._log_error_handler)
+        self._log_watch_thread.start()
 
     def _log_error_handler(self, errordata):
         """
@@ -462,6 +550,13 @@ class Tester(TestCase):
         return self._create_session(node, keyspace, user, password, compression,
                                     protocol_version, wlrr, port=port, ssl_opts=ssl_opts)
 
+    def _node_states(self):
+        """
+        Return a value that changes whenever a node of the cluster is started,
+        stopped, added or removed.
+        """
+        return tuple((node.name, node.pid if node.is_running() else None) for node in self.cluster.nodelist())
+
     def _create_session(self, node, keyspace, user, password, compression, protocol_version, load_balancing_policy=None,
                         port=None, ssl_opts=None):
         node_ip = self.get_ip_from_node(node)
@@ -476,10 +571,35 @@ class Tester(TestCase):
         else:
             auth_provider = None
 
-        cluster = PyCluster([node_ip], auth_provider=auth_provider, compression=compression,
-                            protocol_version=protocol_version, load_balancing_policy=load_balancing_policy, default_retry_policy=FlakyRetryPolicy(),
-                            port=port, ssl_options=ssl_opts, connect_timeout=10, allow_beta_protocol_version=True)
-        session = cluster.connect(wait_for_all_pools=True)
+        # With lazy_driver_metadata, the driver doesn't fetch the schema or build a
+        # token map on connect or on schema changes; tools.data's get_*_metadata
+        # helpers and tools.metadata_wrapper load what they need when asked.
+        eager_metadata = not self.lazy_driver_metadata
+
+        # Sessions with the same connection settings share a driver Cluster, which
+        # saves reopening the control connection and refetching schema metadata.
+        # Each call still gets its own Session, since tests change session state
+        # such as the keyspace or the default consistency level, and shutting
+        # down its session.cluster only shuts down the Cluster with its last
+        # session; see tools/driver_cluster.py.
+        key = (node_ip, port, user, password, compression, protocol_version, _load_balancing_key(load_balancing_policy), eager_metadata,
+               None if ssl_opts is None else repr(sorted(ssl_opts.items())))
+        node_states = self._node_states() if self.share_driver_clusters else None
+        shared = self.driver_clusters.get(key, node_states) if self.share_driver_clusters else None
+        if shared is not None:
+            session = shared.connect(wait_for_all_pools=True)
+        else:
+            cluster = PyCluster([node_ip], auth_provider=auth_provider, compression=compression,
+                                protocol_version=protocol_version, load_balancing_policy=load_balancing_policy, default_retry_policy=FlakyRetryPolicy(),
+                                port=port, ssl_options=ssl_opts, connect_timeout=10, allow_beta_protocol_version=True,
+                                schema_metadata_enabled=eager_metadata, token_metadata_enabled=eager_metadata)
+            if self.share_driver_clusters:
+                shared = SharedDriverCluster(cluster)
+                session = shared.connect(wait_for_all_pools=True)
+                # only cache clusters that managed to connect
+                self.driver_clusters.put(key, node_states, shared)
+            else:
+                session = cluster.connect(wait_for_all_pools=True)
 
         # temporarily increase client-side timeout to 1m to determine
         # if the cluster is simply responding slowly to requests
@@ -494,6 +614,15 @@ class Tester(TestCase):
         self.connections.append(session)
         return session
 
+    def _native_port_probe(self, node, port=None):
+        """
+        Return a readiness probe for retry_till_success that passes once the
+        node accepts TCP connections on its native port, which is much cheaper
+        than failing a full driver connection while the node starts up.
+        """
+        address, port = self.get_ip_from_node(node), port or self.get_port_from_node(node)
+        return lambda: port_open(address, port)
+
     def patient_cql_connection(self, node, keyspace=None,
                                user=None, password=None, timeout=30, compression=True,
                                protocol_version=None, port=None, ssl_opts=None):
@@ -518,7 +647,8 @@ class Tester(TestCase):
                 protocol_version=protocol_version,
                 port=port,
                 ssl_opts=ssl_opts,
-                bypassed_exception=NoHostAvailable
+                bypassed_exception=NoHostAvailable,
+                ready=self._native_port_probe(node, port)
             )
 
         return session
@@ -545,7 +675,8 @@ class Tester(TestCase):
             protocol_version=protocol_version,
             port=port,
             ssl_opts=ssl_opts,
-            bypassed_exception=NoHostAvailable
+            bypassed_exception=NoHostAvailable,
+            ready=self._native_port_probe(node, port)
         )
 
     def create_ks(self, session, name, rf):
@@ -624,6 +755,8 @@ class Tester(TestCase):
 
         reset_environment_vars()
 
+        debug_retries()
+
         for con in self.connections:
             con.cluster.shutdown()
 
@@ -635,14 +768,17 @@ class Tester(TestCase):
 
         failed = did_fail()
         try:
-            if not self.allow_log_errors and self.check_logs_for_errors():
+            with timed_phase('check_logs'):
+                errors_found = not self.allow_log_errors and self.check_logs_for_errors()
+            if errors_found:
                 failed = True
                 raise AssertionError('Unexpected error in log, see stdout')
         finally:
             try:
                 # save the logs for inspection
                 if failed or KEEP_LOGS:
-                    self.copy_logs(self.cluster)
+                    with timed_phase('copy_logs'):
+                        self.copy_logs(self.cluster)
             except Exception as e:
                 print "Error saving log:", str(e)
             finally:
@@ -652,7 +788,7 @@ class Tester(TestCase):
     def check_logs_for_errors(self):
         for node in self.cluster.nodelist():
             errors = list(self.__filter_errors(
-                ['\n'.join(msg) for msg in node.grep_log_for_errors()]))
+                ['\n'.join(msg) for msg in LOG_INDEX.errors(node.logfilename(), since=getattr(node, 'error_mark', 0))]))
             if len(errors) is not 0:
                 for error in errors:
                     print_("Unexpected error in {node_name} log, error: \n{error}".format(node_name=node.name, error=error))
@@ -672,11 +808,13 @@ class Tester(TestCase):
         """Filter errors, removing those that match self.ignore_log_patterns"""
         if not hasattr(self, 'ignore_log_patterns'):
             self.ignore_log_patterns = []
+        patterns = self.ignore_log_patterns
+        if isinstance(patterns, basestring):
+            patterns = [patterns]
+        # compiled once for each distinct set of patterns, and checked in a single pass per error
+        ignored = any_pattern(patterns)
         for e in errors:
-            for pattern in self.ignore_log_patterns:
-                if re.search(pattern, e):
-                    break
-            else:
+            if not ignored.search(e):
                 yield e
 
     def get_ip_from_node(self, node):
@@ -715,19 +853,21 @@ class Tester(TestCase):
         of nodes.
         @param nodes The list of nodes whose logs to scan
         @param pattern The target pattern
-        @param timeout How long to wait for the pattern. Note that
-                        strictly speaking, timeout is not really a timeout,
-                        but a maximum number of attempts. This implies that
-                        the all the grepping takes no time at all, so it is
-                        somewhat inaccurate, but probably close enough.
+        @param timeout How long, in seconds, to wait for the pattern.
         @return The first node in whose log the pattern was found
         """
-        for _ in range(timeout):
-            for node in nodes:
-                found = node.grep_log(pattern, filename=filename)
-                if found:
-                    return node
-            time.sleep(1)
+        paths = [(node, os.path.join(node.get_path(), 'logs', filename)) for node in nodes]
+        deadline = time.time() + timeout
+        with LogWatcher([path for _, path in paths]) as watcher:
+            while True:
+                for node, path in paths:
+                    if LOG_INDEX.grep(path, pattern):
+                        return node
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                # sleep until one of the logs is written to
+                watcher.wait(remaining)
 
         raise TimeoutError(time.strftime("%d %b %Y %H:%M:%S", time.gmtime()) +
                            " Unable to find: " + repr(pattern) + " in any node log within " + str(timeout) + "s")
@@ -785,7 +925,7 @@ def kill_windows_cassandra_procs():
 
 
 def get_test_path():
-    test_path = tempfile.mkdtemp(prefix='dtest-')
+    test_path = tempfile.mkdtemp(prefix='dtest-', dir=TEST_PATH_ROOT)
 
     # ccm on cygwin needs absolute path to directory - it crosses from cygwin space into
     # regular Windows space on wmic calls which will otherwise break pathing
@@ -798,15 +938,90 @@ def get_test_path():
 get_test_path.__test__ = False
 
 
+def _load_balancing_key(policy):
+    """
+    The part of a shared driver Cluster's key standing for its load balancing
+    policy: the hosts of a whitelist, and the policy itself otherwise, since
+    a policy object is only ever used by one Cluster.
+    """
+    if isinstance(policy, WhiteListRoundRobinPolicy):
+        return ('whitelist',) + tuple(sorted(policy._allowed_hosts))
+    return policy
+
+
+def offset_port(port, offset=None):
+    """
+    Shift a JMX/debug/byteman port by offset, by default this worker's
+    PORT_OFFSET. Ports of '0' mean "disabled" to ccm and are left alone.
+    """
+    if offset is None:
+        offset = PORT_OFFSET
+    return str(port) if str(port) == '0' else str(int(port) + offset)
+
+
+class DtestCluster(Cluster):
+    """
+    A ccm Cluster that places its nodes in the loopback address block given by
+    ip_prefix and shifts their per-node ports by port_offset; by default
+    those are this worker's own. With the default IP_PREFIX and PORT_OFFSET it
+    behaves exactly like Cluster.
+
+    If image_dir is set, the first start of a freshly populated cluster is
+    served from a cached image of an identical cluster when one exists, and
+    saves such an image when it doesn't; see tools/cluster_image.py.
+    """
+    image_dir = CLUSTER_IMAGE_DIR
+    ip_prefix = IP_PREFIX
+    port_offset = PORT_OFFSET
+
+    def populate(self, nodes, debug=False, tokens=None, use_vnodes=False, ipprefix=None, ipformat=None, install_byteman=False):
+        return super(DtestCluster, self).populate(nodes, debug=debug, tokens=tokens, use_vnodes=use_vnodes,
+                                                  ipprefix=self.ip_prefix if ipprefix is None else ipprefix,
+                                                  ipformat=ipformat, install_byteman=install_byteman)
+
+    def create_node(self, name, auto_bootstrap, thrift_interface, storage_interface, jmx_port, remote_debug_port, initial_token,
+                    save=True, binary_interface=None, byteman_port='0', environment_variables=None):
+        return super(DtestCluster, self).create_node(name, auto_bootstrap, thrift_interface, storage_interface,
+                                                     offset_port(jmx_port, self.port_offset),
+                                                     offset_port(remote_debug_port, self.port_offset), initial_token,
+                                                     save=save, binary_interface=binary_interface,
+                                                     byteman_port=offset_port(byteman_port, self.port_offset),
+                                                     environment_variables=environment_variables)
+
+    def start(self, *args, **kwargs):
+        with timed_phase('cluster_start'):
+            return self._start_from_image(*args, **kwargs)
+
+    def _start_from_image(self, no_wait=False, wait_for_binary_proto=False, **kwargs):
+        if self.image_dir is None or no_wait or not cluster_image.is_pristine(self):
+            return super(DtestCluster, self).start(no_wait=no_wait, wait_for_binary_proto=wait_for_binary_proto, **kwargs)
+
+        image_path = os.path.join(self.image_dir, cluster_image.image_key(self, jvm_args=kwargs.get('jvm_args')))
+        if os.path.isdir(image_path):
+            debug("restoring cluster image from {}".format(image_path))
+            cluster_image.restore_image(image_path, self)
+            return super(DtestCluster, self).start(wait_for_binary_proto=wait_for_binary_proto, **kwargs)
+
+        result = super(DtestCluster, self).start(wait_for_binary_proto=wait_for_binary_proto, **kwargs)
+        if result is None:
+            return result
+        # the image is taken from a cleanly stopped cluster, so it doesn't
+        # depend on commitlog replay
+        debug("saving cluster image to {}".format(image_path))
+        self.stop(gently=True)
+        cluster_image.save_image(image_path, self)
+        return super(DtestCluster, self).start(wait_for_binary_proto=wait_for_binary_proto, **kwargs)
+
+
 def create_ccm_cluster(test_path, name):
     debug("cluster ccm directory: " + test_path)
     version = os.environ.get('CASSANDRA_VERSION')
     cdir = CASSANDRA_DIR
 
     if version:
-        cluster = Cluster(test_path, name, cassandra_version=version)
+        cluster = DtestCluster(test_path, name, cassandra_version=version)
     else:
-        cluster = Cluster(test_path, name, cassandra_dir=cdir)
+        cluster = DtestCluster(test_path, name, cassandra_dir=cdir)
 
     if DISABLE_VNODES:
         cluster.set_configuration_options(values={'num_tokens': None})
@@ -817,15 +1032,18 @@ def create_ccm_cluster(test_path, name):
         cluster.set_configuration_options(values={'memtable_allocation_type': 'offheap_objects'})
 
     cluster.set_datadir_count(DATADIR_COUNT)
-    cluster.set_environment_variable('CASSANDRA_LIBJEMALLOC', CASSANDRA_LIBJEMALLOC)
+    cluster.set_environment_variable('CASSANDRA_LIBJEMALLOC', get_libjemalloc())
 
     return cluster
 
 
 def cleanup_cluster(cluster, test_path, log_watch_thread=None):
-    with log_filter('cassandra'):  # quiet noise from driver when nodes start going down
+    # log_filter quiets noise from driver when nodes start going down
+    with timed_phase('cleanup_cluster'), log_filter('cassandra'):
         if KEEP_TEST_DIR:
             cluster.stop(gently=RECORD_COVERAGE)
+            # the logs are kept on disk, but nothing reads them through the index again
+            LOG_INDEX.forget(test_path)
         else:
             # when recording coverage the jvm has to exit normally
             # or the coverage information is not written by the jacoco agent
@@ -840,6 +1058,7 @@ def cleanup_cluster(cluster, test_path, log_watch_thread=None):
             finally:
                 debug("removing ccm cluster {name} at: {path}".format(name=cluster.name, path=test_path))
                 cluster.remove()
+                LOG_INDEX.forget(test_path)
 
                 debug("clearing ssl stores from [{0}] directory".format(test_path))
                 for filename in ('keystore.jks', 'truststore.jks', 'ccm_node.cer'):
@@ -965,6 +1184,37 @@ def did_fail():
     return not issubclass(exc_class, unittest.case.SkipTest)
 
 
+class SpareCluster(threading.Thread):
+    """
+    Builds a cluster on a background thread, so it is ready to be swapped in
+    when it is needed. build should return a (test_path, cluster) tuple.
+    """
+
+    def __init__(self, build):
+        threading.Thread.__init__(self)
+        self.__build = build
+        self.__result = None
+        self.__error = None
+        self.daemon = True
+        self.start()
+
+    def run(self):
+        try:
+            self.__result = self.__build()
+        except Exception as e:
+            self.__error = e
+
+    def take(self):
+        """
+        Wait for the build to finish and return its (test_path, cluster), or
+        raise the exception it failed with.
+        """
+        self.join()
+        if self.__error is not None:
+            raise self.__error
+        return self.__result
+
+
 class ReusableClusterTester(Tester):
     """
     A Tester designed for reusing the same cluster across multiple
@@ -980,11 +1230,18 @@ class ReusableClusterTester(Tester):
     cluster will be restarted if a test fails or an exception is
     caught.  However, there may still be undetected problems in
     Cassandra that cause cascading failures.
+
+    If KEEP_SPARE_CLUSTER is set, a second, fully prepared cluster is kept
+    warm on SPARE_IP_PREFIX, so that the cluster can be replaced without
+    waiting after a failure. Tests in such classes must get node addresses
+    from self.cluster rather than assuming 127.0.0.x.
     """
 
     test_path = None
     cluster = None
     cluster_options = None
+    allow_spare_cluster = True  # set False for classes whose tests can't run on the spare address block
+    _spare_cluster = None
 
     @classmethod
     def setUpClass(cls):
@@ -992,9 +1249,15 @@ class ReusableClusterTester(Tester):
         maybe_cleanup_cluster_from_last_test_file()
         cls.initialize_cluster()
 
+    @classmethod
+    def tearDownClass(cls):
+        super(ReusableClusterTester, cls).tearDownClass()
+        cls.discard_spare_cluster()
+
     def setUp(self):
         self.set_current_tst_name()
         self.connections = []
+        self.driver_clusters = DriverClusterCache()
 
         # TODO enable active log watching
         # This needs to happen in setUp() and not setUpClass() so that individual
@@ -1008,16 +1271,21 @@ class ReusableClusterTester(Tester):
         # test_is_ending prevents active log watching from being able to interrupt the test
         self.test_is_ending = True
 
+        debug_retries()
+
         failed = did_fail()
         try:
-            if not self.allow_log_errors and self.check_logs_for_errors():
+            with timed_phase('check_logs'):
+                errors_found = not self.allow_log_errors and self.check_logs_for_errors()
+            if errors_found:
                 failed = True
                 raise AssertionError('Unexpected error in log, see stdout')
         finally:
             try:
                 # save the logs for inspection
                 if failed or KEEP_LOGS:
-                    self.copy_logs(self.cluster)
+                    with timed_phase('copy_logs'):
+                        self.copy_logs(self.cluster)
             except Exception as e:
                 print "Error saving log:", str(e)
             finally:
@@ -1036,27 +1304,86 @@ class ReusableClusterTester(Tester):
          * A class of tests is starting
          * A test method failed/errored, so the cluster has been wiped
 
+        If a spare cluster is being kept, it is swapped in rather than
+        building a new cluster, and a new spare is started in the background.
+
         Subclasses that require custom initialization should generally
-        do so by overriding post_initialize_cluster().
+        do so by overriding prepare_cluster() and post_initialize_cluster().
         """
-        cls.test_path = get_test_path()
-        cls.cluster = create_ccm_cluster(cls.test_path, name='test')
-        cls.init_config()
+        spare, cls._spare_cluster = cls._spare_cluster, None
+        cls.cluster = None
+        if spare is not None:
+            try:
+                cls.test_path, cls.cluster = spare.take()
+                debug("swapped in spare cluster at {}".format(cls.test_path))
+            except Exception as e:
+                debug("spare cluster could not be built, building a new cluster instead: {}".format(e))
 
-        maybe_setup_jacoco(cls.test_path)
-        cls.init_config()
-        write_last_test_file(cls.test_path, cls.cluster)
-        set_log_levels(cls.cluster)
+        if cls.cluster is None:
+            cls.test_path, cls.cluster = cls.build_cluster(IP_PREFIX, PORT_OFFSET)
 
+        write_last_test_file(cls.test_path, cls.cluster)
         cls.post_initialize_cluster()
 
+        if KEEP_SPARE_CLUSTER and cls.allow_spare_cluster:
+            # the spare goes on whichever address block the current cluster isn't using
+            if cls.cluster.ip_prefix == IP_PREFIX:
+                ip_prefix, port_offset = SPARE_IP_PREFIX, SPARE_PORT_OFFSET
+            else:
+                ip_prefix, port_offset = IP_PREFIX, PORT_OFFSET
+            cls._spare_cluster = SpareCluster(lambda: cls.build_cluster(ip_prefix, port_offset))
+
+    @classmethod
+    def build_cluster(cls, ip_prefix, port_offset):
+        """
+        Create, configure and prepare a new ccm cluster whose nodes live on
+        ip_prefix, returning a (test_path, cluster) tuple. This may run on a
+        background thread, so it must not touch cls.cluster.
+        """
+        test_path = get_test_path()
+        cluster = create_ccm_cluster(test_path, name='test')
+        cluster.ip_prefix, cluster.port_offset = ip_prefix, port_offset
+        try:
+            init_default_config(cluster, cls.cluster_options)
+            maybe_setup_jacoco(test_path)
+            set_log_levels(cluster)
+            cls.prepare_cluster(cluster)
+        except Exception:
+            discard_cluster(cluster, test_path)
+            raise
+        return test_path, cluster
+
+    @classmethod
+    def discard_spare_cluster(cls):
+        """
+        Remove the spare cluster, if one is being kept.
+        """
+        spare, cls._spare_cluster = cls._spare_cluster, None
+        if spare is not None:
+            try:
+                test_path, cluster = spare.take()
+            except Exception:
+                return  # a failed build cleans up after itself
+            discard_cluster(cluster, test_path)
+
+    @classmethod
+    def prepare_cluster(cls, cluster):
+        """
+        This method is called with a newly created ccm cluster after default
+        config options have been applied, and should bring it to the state
+        the class's tests expect, e.g. populate and start it and create the
+        schema. It may be called on a background thread to prepare a spare
+        cluster, so it must only work with the cluster it is given.
+        """
+        pass
+
     @classmethod
     def post_initialize_cluster(cls):
         """
-        This method is called after the ccm cluster has been created
-        and default config options have been applied.  Any custom
-        initialization for a test class should generally be done
-        here in order to correctly handle cluster restarts after
+        This method is called after the ccm cluster has been created,
+        prepared and assigned to cls.cluster.  Any custom initialization
+        for a test class that can't be done in prepare_cluster() should
+        be done here in order to correctly handle cluster restarts after
         test method failures.
         """
         pass
@@ -1066,6 +1393,18 @@ class ReusableClusterTester(Tester):
         init_default_config(cls.cluster, cls.cluster_options)
 
 
+def discard_cluster(cluster, test_path):
+    """
+    Stop and remove a cluster that was never recorded in LAST_TEST_DIR, such as
+    a spare cluster, without touching the current test's cluster.
+    """
+    with log_filter('cassandra'):
+        debug("removing ccm cluster {name} at: {path}".format(name=cluster.name, path=test_path))
+        cluster.remove()
+        LOG_INDEX.forget(test_path)
+        shutil.rmtree(test_path, ignore_errors=True)
+
+
 def canReuseCluster(Tester):
     orig_init = Tester.__init__
     # make copy of original __init__, so we can call it without recursion
@@ -0,0 +1,86 @@
+import java.io.BufferedInputStream;
+import java.io.DataInputStream;
+import java.io.EOFException;
+import java.io.File;
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.List;
+
+import org.apache.cassandra.io.sstable.CQLSSTableWriter;
+
+/**
+ * Writes rows read from stdin straight to SSTables with CQLSSTableWriter, for
+ * tools/sstable_writer.py.
+ *
+ * Usage: SSTableSeeder directory create_table_statement insert_statement columns buffer_size_in_mb
+ *
+ * Each row is read as one value per bind marker of the insert statement, each
+ * value as a 4 byte big-endian length followed by the value serialized as the
+ * driver would bind it, or a length of -1 for null. The number of rows written
+ * is printed once stdin is exhausted.
+ */
+public class SSTableSeeder
+{
+    public static void main(String[] args) throws Exception
+    {
+        clientInitialization();
+
+        CQLSSTableWriter writer = CQLSSTableWriter.builder()
+                                                  .inDirectory(new File(args[0]))
+                                                  .forTable(args[1])
+                                                  .using(args[2])
+                                                  .withBufferSizeInMB(Integer.parseInt(args[4]))
+                                                  .build();
+        int columns = Integer.parseInt(args[3]);
+        DataInputStream in = new DataInputStream(new BufferedInputStream(System.in, 1 << 16));
+
+        long rows = 0;
+        while (true)
+        {
+            List<ByteBuffer> values = new ArrayList<ByteBuffer>(columns);
+            for (int i = 0; i < columns; i++)
+            {
+                int length;
+                try
+                {
+                    length = in.readInt();
+                }
+                catch (EOFException e)
+                {
+                    if (i > 0)
+                        throw e;
+                    writer.close();
+                    System.out.println(rows);
+                    return;
+                }
+                if (length < 0)
+                {
+                    values.add(null);
+                }
+                else
+                {
+                    byte[] value = new byte[length];
+                    in.readFully(value);
+                    values.add(ByteBuffer.wrap(value));
+                }
+            }
+            writer.rawAddRow(values);
+            rows++;
+        }
+    }
+
+    /**
+     * Puts Cassandra in client mode, which differs between versions.
+     */
+    private static void clientInitialization() throws Exception
+    {
+        try
+        {
+            Class.forName("org.apache.cassandra.config.DatabaseDescriptor").getMethod("clientInitialization").invoke(null);
+        }
+        catch (NoSuchMethodException e)
+        {
+            Class.forName("org.apache.cassandra.config.Config").getMethod("setClientMode", boolean.class).invoke(null, true);
+        }
+    }
+}
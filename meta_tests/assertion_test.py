@@ -2,12 +2,16 @@
 from unittest import TestCase
 
 from cassandra import AlreadyExists, InvalidRequest, Unauthorized, Unavailable
+from cassandra.util import OrderedMap, SortedSet
 from mock import Mock
 
 from tools.assertions import (assert_all, assert_almost_equal, assert_exception,
-                              assert_invalid, assert_length_equal, assert_none,
-                              assert_one, assert_row_count, assert_stderr_clean,
-                              assert_unauthorized, assert_unavailable)
+                              assert_invalid,
+                              assert_items_equal_ignore_order,
+                              assert_length_equal, assert_none, assert_one,
+                              assert_row_count, assert_stderr_clean,
+                              assert_unauthorized, assert_unavailable,
+                              multiset_digest, row_key)
 
 
 class TestAssertStderrClean(TestCase):
@@ -106,3 +110,56 @@ class TestAssertionMethods(TestCase):
         # assert_length_equal_test
         check = [1, 2, 3, 4]
         assert_length_equal(check, 4)
+
+
+class TestAssertItemsEqualIgnoreOrder(TestCase):
+
+    def test_equal_in_any_order(self):
+        rows = [[i % 3, {'a': [i], 'b': set([1, 2])}] for i in range(10)]
+        assert_items_equal_ignore_order(rows, list(reversed(rows)))
+
+    def test_counts_repeats(self):
+        with self.assertRaises(AssertionError):
+            assert_items_equal_ignore_order([[1], [1], [2]], [[1], [2], [2]])
+
+    def test_bounded_report(self):
+        with self.assertRaises(AssertionError) as cm:
+            assert_items_equal_ignore_order([[i] for i in range(100)] + [[-1], [-1]], [[i] for i in range(1, 120)],
+                                            message='Unexpected results', max_shown=3)
+        lines = str(cm.exception).splitlines()
+        self.assertEqual(lines[:2], ['Unexpected results', 'Expected 119 rows, got 102.'])
+        self.assertIn('Missing rows (20 distinct, showing at most 3):', lines)
+        self.assertIn('Unexpected rows (2 distinct, showing at most 3):', lines)
+        self.assertIn('    [-1] (x2)', lines)
+        self.assertEqual(len(lines), 2 + 4 + 3)
+
+    def test_row_key(self):
+        self.assertEqual(row_key([1, {'b': 2, 'a': [3]}]), row_key((1, {'a': (3,), 'b': 2})))
+        self.assertNotEqual(row_key([1, set([2])]), row_key([1, [2]]))
+
+    def test_multiset_digest(self):
+        rows = [[1, 'a'], [2, set(['b'])], [2, set(['b'])], [3, {'c': [1]}]]
+        self.assertEqual(multiset_digest(rows), multiset_digest(reversed(rows)))
+        self.assertNotEqual(multiset_digest(rows), multiset_digest(rows[:-1] + [[2, set(['b'])]]))
+        self.assertEqual(multiset_digest(['a', 'B'], key=str.lower), multiset_digest(['b', 'A'], key=str.lower))
+
+    def test_driver_collections(self):
+        """
+        The collection types the driver returns for set and map columns
+        compare by value, however they were built.
+        """
+        self.assertEqual(row_key([1, SortedSet([1, 2])]), row_key([1, SortedSet([2, 1])]))
+        self.assertEqual(row_key(SortedSet([1, 2])), row_key(set([1, 2])))
+        self.assertNotEqual(row_key(SortedSet([1, 2])), row_key(SortedSet([1, 3])))
+        self.assertEqual(row_key(OrderedMap([(1, SortedSet(['a']))])), row_key({1: set(['a'])}))
+
+        assert_items_equal_ignore_order([[1, SortedSet([1, 2])]], [[1, SortedSet([1, 2])]])
+        with self.assertRaises(AssertionError):
+            assert_items_equal_ignore_order([[1, SortedSet([1, 2])]], [[1, SortedSet([1])]])
+
+    def test_assert_all_ignore_order(self):
+        mock_session = Mock()
+        mock_session.execute = Mock(return_value=[[1, 'a'], [2, 'b']])
+        assert_all(mock_session, "SELECT * FROM test", [[2, 'b'], [1, 'a']], ignore_order=True)
+        with self.assertRaisesRegexp(AssertionError, 'Unexpected results from SELECT'):
+            assert_all(mock_session, "SELECT * FROM test", [[2, 'b'], [1, 'c']], ignore_order=True)
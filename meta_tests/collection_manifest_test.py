@@ -0,0 +1,40 @@
+import importlib
+import inspect
+from unittest import TestCase
+
+from upgrade_tests.collection_manifest import generated_classes
+
+
+def _imported_classes(module_file):
+    """
+    Returns {name: skip reason or None} for the test classes module_file
+    generates when it is imported: those with __test__ set and an
+    UPGRADE_PATH or test_version_metas of their own.
+    """
+    module = importlib.import_module('upgrade_tests.' + module_file[:-len('.py')])
+    classes = {}
+    for name, cls in vars(module).items():
+        if not inspect.isclass(cls) or not vars(cls).get('__test__'):
+            continue
+        if 'UPGRADE_PATH' in vars(cls) or 'test_version_metas' in vars(cls):
+            classes[name] = vars(cls).get('__unittest_skip_why__') if vars(cls).get('__unittest_skip__') else None
+    return classes
+
+
+class GeneratedClassesTest(TestCase):
+    """
+    generated_classes() describes the upgrade test classes without importing
+    the modules that generate them, so check it against those modules.
+    """
+
+    def matches_imported_modules_test(self):
+        manifest = {}
+        for cls in generated_classes():
+            module_file = cls['module'].split('/')[-1]
+            self.assertNotIn(cls['name'], manifest.setdefault(module_file, {}))
+            manifest[module_file][cls['name']] = cls['skip']
+
+        self.assertEqual(sorted(manifest), ['cql_tests.py', 'paging_test.py', 'regression_test.py',
+                                            'upgrade_through_versions_test.py'])
+        for module_file, classes in manifest.items():
+            self.assertEqual(classes, _imported_classes(module_file), 'generated_classes() disagrees with ' + module_file)
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from cqlsh_tests.cqlsh_tools import (assert_csvs_items_equal,
+                                     assert_rows_items_equal, sorted_row_keys)
+
+
+class AssertRowsItemsEqualTest(TestCase):
+
+    def unicode_matches_utf8_test(self):
+        """
+        Formatted unicode cells compare equal to the UTF-8 bytes read from a CSV file.
+        """
+        assert_rows_items_equal(lambda: iter([[u'\xe9']]), lambda: iter([['\xc3\xa9']]))
+
+    def equal_rows_test(self):
+        rows = [[str(i), 'x'] for i in range(100)]
+        assert_rows_items_equal(lambda: iter(rows), lambda: reversed(rows))
+
+    def reports_differing_rows_test(self):
+        """
+        The error names the rows that are only on one side, counting repeats.
+        """
+        first = [['1', 'a'], ['2', 'b'], ['2', 'b']]
+        second = [['2', 'b'], ['1', 'a'], ['3', 'c\nd']]
+        with self.assertRaises(AssertionError) as cm:
+            assert_rows_items_equal(lambda: iter(first), lambda: iter(second), first_name='csv', second_name='results')
+        message = str(cm.exception)
+        self.assertIn('csv has 3 rows and results has 3', message)
+        self.assertIn("Rows only in csv (showing at most 10):\n    ['2', 'b']", message)
+        self.assertIn("Rows only in results (showing at most 10):\n    ['3', 'c\\nd']", message)
+
+    def external_sort_test(self):
+        """
+        Inputs bigger than a chunk are sorted through temporary files.
+        """
+        rows = [[str(i % 7), str(i)] for i in range(50)]
+        keys = list(sorted_row_keys(rows, chunk_size=8))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), 50)
+
+
+class AssertCsvsItemsEqualTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    def lines_in_any_order_test(self):
+        first = self._write('first.csv', '1,a\n2,b\n')
+        second = self._write('second.csv', '2,b\n1,a\n')
+        third = self._write('third.csv', '2,b\n1,c\n')
+        assert_csvs_items_equal(first, second)
+        with self.assertRaises(AssertionError):
+            assert_csvs_items_equal(first, third)
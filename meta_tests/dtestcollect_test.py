@@ -0,0 +1,38 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+from plugins.dtestcollect import DtestCollectPlugin
+
+
+class DtestCollectPluginTest(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.output_file = os.path.join(self.output_dir, 'collected.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def records_addresses_test(self):
+        plugin = DtestCollectPlugin(self.output_file)
+        for address in [('/dtest/a_test.py', 'a_test', 'A.test0'),
+                        ('/dtest/a_test.py', 'a_test', 'first'),
+                        # a module that failed to import
+                        ('/dtest/broken_test.py', 'broken_test', None),
+                        # a name that doesn't resolve to anything
+                        None,
+                        (None, None, None)]:
+            plugin.startTest(Mock(address=Mock(return_value=address)))
+        plugin.finalize(None)
+
+        with open(self.output_file) as f:
+            self.assertEqual(json.load(f), [['a_test', 'A.test0'], ['a_test', 'first'], ['broken_test', None]])
+
+    def file_outside_a_package_test(self):
+        plugin = DtestCollectPlugin(self.output_file)
+        plugin.startTest(Mock(address=Mock(return_value=('/elsewhere/loose_test.py', None, 'test0'))))
+        self.assertEqual(plugin.collected, [['/elsewhere/loose_test.py', 'test0']])
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+from plugins.dtestphases import DtestPhasesPlugin, timed_phase
+
+
+class _TimedCase(TestCase):
+
+    def setUp(self):
+        with timed_phase('cluster_start'):
+            pass
+
+    def tearDown(self):
+        with timed_phase('cleanup_cluster'):
+            pass
+
+    def runTest(self):
+        pass
+
+
+class DtestPhasesPluginTest(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.plugin = DtestPhasesPlugin()
+        self.plugin.enabled = True
+        self.plugin.output_file = os.path.join(self.output_dir, 'phases.json')
+        self.plugin.report_size = 3
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def _run(self, case):
+        test = Mock(test=case, id=Mock(return_value=case.id()))
+        self.plugin.startTest(test)
+        case.run()
+        self.plugin.stopTest(test)
+
+    def records_phases_test(self):
+        """
+        setUp, tearDown and the phases marked within them are timed, and the
+        remainder is counted as the test itself.
+        """
+        self._run(_TimedCase())
+        [timings] = self.plugin.results
+        self.assertEqual(list(timings.phases), ['cluster_start', 'setUp', 'cleanup_cluster', 'tearDown', 'test', 'total'])
+        self.assertAlmostEqual(timings.phases['total'],
+                               timings.phases['setUp'] + timings.phases['tearDown'] + timings.phases['test'])
+
+    def class_setup_test(self):
+        """
+        The setUpClass of a test class, where a reusable cluster is built, is timed as an entry of its own.
+        """
+        self.plugin.startContext(_TimedCase)
+        with timed_phase('cluster_start'):
+            pass
+        self._run(_TimedCase())
+        self.plugin.stopContext(_TimedCase)
+
+        class_setup, test = self.plugin.results
+        self.assertEqual(class_setup.test_id, 'meta_tests.dtestphases_test._TimedCase')
+        self.assertEqual(list(class_setup.phases), ['cluster_start', 'setUpClass', 'total'])
+        self.assertGreaterEqual(class_setup.phases['setUpClass'], class_setup.phases['cluster_start'])
+        self.assertEqual(list(test.phases), ['cluster_start', 'setUp', 'cleanup_cluster', 'tearDown', 'test', 'total'])
+
+    def failed_class_setup_test(self):
+        self.plugin.startContext(_TimedCase)
+        self.plugin.stopContext(_TimedCase)
+        self.assertEqual([timings.test_id for timings in self.plugin.results], ['meta_tests.dtestphases_test._TimedCase'])
+        self.plugin.stopContext(_TimedCase)
+        self.assertEqual(len(self.plugin.results), 1)
+
+    def phases_outside_tests_ignored_test(self):
+        with timed_phase('cluster_start'):
+            pass
+        self.assertEqual(self.plugin.results, [])
+
+    def report_test(self):
+        """
+        The report lists the slowest phases and writes every test's timings.
+        """
+        for _ in range(2):
+            self._run(_TimedCase())
+        stream = Mock()
+        self.plugin.report(stream)
+
+        lines = [args[0] for args, _ in stream.writeln.call_args_list]
+        self.assertIn('Slowest test phases:', lines)
+        self.assertEqual(len(lines[lines.index('Slowest test phases:') + 1:-1]), 3)
+        with open(self.plugin.output_file) as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def csv_output_test(self):
+        self.plugin.output_file = os.path.join(self.output_dir, 'phases.csv')
+        self._run(_TimedCase())
+        self.plugin.report(Mock())
+        with open(self.plugin.output_file) as f:
+            rows = f.read().splitlines()
+        self.assertEqual(rows[0], 'test,phase,seconds')
+        self.assertEqual(len(rows), 7)
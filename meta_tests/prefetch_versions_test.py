@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from distutils.version import LooseVersion
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from upgrade_tests import prefetch_versions
+
+Meta = namedtuple('Meta', ['name', 'version'])
+Pair = namedtuple('Pair', ['name', 'starting_meta', 'upgrade_meta'])
+Multi = namedtuple('Multi', ['name', 'metas'])
+
+OLD = Meta('current_2_2_x', '2.2.7')
+NEW = Meta('indev_3_0_x', 'git:cassandra-3.0')
+LOCAL = Meta('indev_3_x', LooseVersion('3.10'))
+LOCAL_GIT = Meta('indev_3_x', 'git:0123456789abcdef0123456789abcdef01234567')
+
+
+class NeededVersionsTest(TestCase):
+
+    def _needed(self, pairs, multis=(), applicable=None, applicable_only=True):
+        with patch.object(prefetch_versions, 'build_upgrade_pairs', Mock(return_value=pairs)), \
+                patch.object(prefetch_versions, 'MULTI_UPGRADES', multis), \
+                patch.object(prefetch_versions, 'build_multi_upgrade_metas', lambda upgrade: upgrade.metas), \
+                patch.object(prefetch_versions, 'upgrade_applies_to_env', lambda meta: applicable is None or meta in applicable):
+            return prefetch_versions.needed_versions(applicable_only=applicable_only)
+
+    def maps_versions_to_paths_test(self):
+        versions = self._needed([Pair('Upgrade_A', OLD, NEW)], [Multi('Multi_B', [Meta('current_2_1_x', '2.1.15'), OLD, NEW]),
+                                                                Multi('Multi_undefined', None)])
+        self.assertEqual(list(versions.items()), [('2.2.7', ['Upgrade_A', 'Multi_B']),
+                                                  ('git:cassandra-3.0', ['Upgrade_A', 'Multi_B']),
+                                                  ('2.1.15', ['Multi_B'])])
+
+    def applicable_only_test(self):
+        pairs = [Pair('Upgrade_A', OLD, NEW), Pair('Upgrade_B', Meta('current_2_1_x', '2.1.15'), OLD)]
+        self.assertEqual(list(self._needed(pairs, applicable=[NEW])), ['2.2.7', 'git:cassandra-3.0'])
+        self.assertEqual(list(self._needed(pairs, applicable=[NEW], applicable_only=False)),
+                         ['2.2.7', 'git:cassandra-3.0', '2.1.15'])
+
+    def local_install_test(self):
+        """
+        A CASSANDRA_DIR that isn't a git checkout is skipped, but the sha of one that is is fetched.
+        """
+        self.assertEqual(list(self._needed([Pair('Upgrade_A', OLD, LOCAL)])), ['2.2.7'])
+        self.assertEqual(list(self._needed([Pair('Upgrade_A', OLD, LOCAL_GIT)])), ['2.2.7', LOCAL_GIT.version])
+
+
+class FetchOrderTest(TestCase):
+
+    def setUp(self):
+        self.installed = set()
+        patcher = patch.object(prefetch_versions.repository, 'version_directory',
+                               lambda version: '/installed/' + version if version in self.installed else None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def one_version_per_repository_first_test(self):
+        self.installed.update(['2.2.7'])
+        first, second = prefetch_versions._fetch_order(['2.2.7', 'git:cassandra-3.0', 'git:trunk', '2.1.15',
+                                                        'github:someone/branch', 'github:someone/other', 'github:other/branch'])
+        # 2.1.15 isn't installed, so ccm may have to build it from the apache repository
+        self.assertEqual(first, ['2.2.7', 'git:cassandra-3.0', 'github:someone/branch', 'github:other/branch'])
+        self.assertEqual(second, ['git:trunk', '2.1.15', 'github:someone/other'])
+
+    def mirrored_releases_test(self):
+        mirror = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, mirror)
+        open(os.path.join(mirror, 'apache-cassandra-2.1.15-bin.tar.gz'), 'w').close()
+        open(os.path.join(mirror, 'apache-cassandra-2.2.7-src.tar.gz'), 'w').close()
+        self.assertEqual(prefetch_versions._fetch_order(['git:trunk', '2.1.15', '2.2.7', '3.0.9'], mirror),
+                         (['git:trunk', '2.1.15', '2.2.7'], ['3.0.9']))
+
+
+class PrefetchTest(TestCase):
+
+    def logs_each_version_separately_test(self):
+        """
+        While versions are fetched at once, ccm logs each to its own file rather than to its single last.log.
+        """
+        started = []
+        lock = threading.Condition()
+
+        def setup(version):
+            logfile = prefetch_versions.repository.lastlogfilename()
+            with lock:
+                started.append(version)
+                lock.notify_all()
+                while len(started) < 2:
+                    lock.wait(5)
+            if version == 'bad':
+                raise RuntimeError('see ' + logfile)
+            return '/installed/' + version, version
+
+        with patch.object(prefetch_versions.repository, 'setup', setup), \
+                patch.object(prefetch_versions, '_fetch_order', lambda versions, mirror: [list(versions)]), \
+                patch.object(prefetch_versions, 'get_default_path', Mock(return_value='/ccm')):
+            ccm_lastlogfilename = prefetch_versions.repository.lastlogfilename
+            good, bad = prefetch_versions.prefetch(['good', 'bad'], workers=2)
+            self.assertEqual(prefetch_versions.version_logfilename('github:someone/branch'),
+                             '/ccm/repository/prefetch-github_someone_branch.log')
+
+        self.assertEqual(sorted(started), ['bad', 'good'])
+        self.assertEqual((good['ready'], good['install_dir'], good['log']), (True, '/installed/good', '/ccm/repository/prefetch-good.log'))
+        self.assertEqual((bad['ready'], bad['error'], bad['log']),
+                         (False, 'RuntimeError: see /ccm/repository/prefetch-bad.log', '/ccm/repository/prefetch-bad.log'))
+        self.assertIs(prefetch_versions.repository.lastlogfilename, ccm_lastlogfilename)
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+
+from mock import patch
+
+# shard_tests and collect_tests aren't imported by name, or nose would collect them as tests
+import run_dtests
+from run_dtests import MAX_WORKERS, merge_xunit_reports, worker_environment
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class ShardTestsTest(TestCase):
+
+    def _addresses(self, module, cls, count):
+        return [(module, '{}.test{}'.format(cls, i)) for i in range(count)]
+
+    def shards_whole_classes_test(self):
+        """
+        The biggest classes are handed out first, each to the worker with the fewest tests.
+        """
+        addresses = (self._addresses('a_test', 'A', 5) + self._addresses('b_test', 'B', 3) +
+                     self._addresses('c_test', 'C', 2) + self._addresses('c_test', 'D', 2))
+        first, second = run_dtests.shard_tests(addresses, 2)
+        self.assertEqual(first, ['a_test:A.test{}'.format(i) for i in range(5)] + ['c_test:D.test0', 'c_test:D.test1'])
+        self.assertEqual(second, ['b_test:B.test{}'.format(i) for i in range(3)] + ['c_test:C.test0', 'c_test:C.test1'])
+
+    def test_functions_test(self):
+        self.assertEqual(run_dtests.shard_tests([('f_test', 'first'), ('f_test', 'second')], 2), [['f_test:first'], ['f_test:second']])
+
+    def modules_failing_to_import_test(self):
+        """
+        A module that failed to import is run once, by name, so its worker reports the error.
+        """
+        shards = run_dtests.shard_tests([('broken_test', None), ('broken_test', None), ('a_test', 'A.test0')], 4)
+        self.assertEqual(shards, [['broken_test'], ['a_test:A.test0']])
+
+    def no_empty_shards_test(self):
+        self.assertEqual(run_dtests.shard_tests(self._addresses('a_test', 'A', 3), 8), [['a_test:A.test0', 'a_test:A.test1', 'a_test:A.test2']])
+        self.assertEqual(run_dtests.shard_tests([], 8), [])
+
+
+class CollectTestsTest(TestCase):
+
+    def reads_collected_addresses_test(self):
+        def check_call(cmd_list, stdout, stderr):
+            self.assertEqual(cmd_list[2:], ['--collect-only', '-v', 'a_test'])
+            with open(cmd_list[1]) as f:
+                collected_file = eval(re.search(r'DtestCollectPlugin\((.*)\)\]\)', f.read()).group(1))
+            with open(collected_file, 'w') as f:
+                json.dump([['a_test', 'A.test0'], ['broken_test', None]], f)
+
+        with patch.object(run_dtests.subprocess, 'check_call', side_effect=check_call):
+            addresses = run_dtests.collect_tests(run_dtests.GlobalConfigObject(vnodes=True), ['-v', 'a_test'], _noop)
+        self.assertEqual(addresses, [('a_test', 'A.test0'), ('broken_test', None)])
+
+
+class WorkerEnvironmentTest(TestCase):
+
+    def address_blocks_test(self):
+        """
+        Each worker has its own address block and port offset, and so do its spare clusters.
+        """
+        blocks = set()
+        for worker_id in range(MAX_WORKERS):
+            env = worker_environment(worker_id, '/tmp/worker')
+            self.assertEqual(env['DTEST_WORKER_ID'], str(worker_id))
+            self.assertEqual(env['DTEST_TEST_PATH_ROOT'], '/tmp/worker')
+            blocks.add((env['DTEST_IP_PREFIX'], int(env['DTEST_PORT_OFFSET'])))
+            blocks.add((env['DTEST_SPARE_IP_PREFIX'], int(env['DTEST_SPARE_PORT_OFFSET'])))
+
+        self.assertEqual(len(set(prefix for prefix, _ in blocks)), 2 * MAX_WORKERS)
+        self.assertEqual(sorted(offset for _, offset in blocks), range(2 * MAX_WORKERS))
+        self.assertEqual(worker_environment(3, '/tmp/worker')['DTEST_IP_PREFIX'], '127.0.3.')
+        self.assertEqual(worker_environment(3, '/tmp/worker')['DTEST_SPARE_IP_PREFIX'], '127.0.{}.'.format(3 + MAX_WORKERS))
+
+
+class MergeXunitReportsTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _report(self, name, tests, errors, failures, skip, cases):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?><testsuite name="nosetests" tests="{}" errors="{}" failures="{}" skip="{}">{}</testsuite>'.format(
+                tests, errors, failures, skip, ''.join('<testcase classname="{}" name="{}"/>'.format(*case) for case in cases)))
+        return path
+
+    def merges_reports_in_order_test(self):
+        reports = [self._report('worker0.xml', 2, 1, 0, 0, [('a_test.A', 'test0'), ('a_test.A', 'test1')]),
+                   os.path.join(self.directory, 'crashed.xml'),
+                   self._report('worker2.xml', 3, 0, 1, 1, [('b_test.B', 'test0'), ('b_test.B', 'test1'), ('c_test.C', 'test0')])]
+        output = os.path.join(self.directory, 'nosetests.xml')
+        counts = merge_xunit_reports(reports, output)
+
+        self.assertEqual(dict(counts), {'tests': 5, 'errors': 1, 'failures': 1, 'skip': 1})
+        suite = ET.parse(output).getroot()
+        self.assertEqual(dict(suite.attrib), {'name': 'nosetests', 'tests': '5', 'errors': '1', 'failures': '1', 'skip': '1'})
+        self.assertEqual([(case.get('classname'), case.get('name')) for case in suite],
+                         [('a_test.A', 'test0'), ('a_test.A', 'test1'), ('b_test.B', 'test0'), ('b_test.B', 'test1'), ('c_test.C', 'test0')])
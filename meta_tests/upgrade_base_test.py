@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from upgrade_tests import upgrade_base
+
+
+class StartFromBaselineTest(TestCase):
+
+    def setUp(self):
+        self.image_dir = tempfile.mkdtemp()
+        self.baseline_path = os.path.join(self.image_dir, 'baseline')
+        self.tester = upgrade_base.UpgradeTester.__new__(upgrade_base.UpgradeTester)
+        self.tester.cluster = Mock(image_dir=self.image_dir)
+        self.started_with_image_dir = []
+        self.tester.cluster.start.side_effect = lambda **kwargs: self.started_with_image_dir.append(self.tester.cluster.image_dir)
+        patcher = patch.object(upgrade_base.cluster_image, 'restore_image')
+        self.restore_image = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.image_dir)
+
+    def restores_baseline_test(self):
+        os.mkdir(self.baseline_path)
+        self.assertTrue(self.tester._start_from_baseline(self.baseline_path))
+        self.restore_image.assert_called_once_with(self.baseline_path, self.tester.cluster)
+        self.assertEqual(self.started_with_image_dir, [self.image_dir])
+
+    def builds_baseline_without_cluster_image_test(self):
+        """
+        Without a baseline, the cluster is started without saving an image of a cluster without keyspace 'ks'.
+        """
+        self.assertFalse(self.tester._start_from_baseline(self.baseline_path))
+        self.assertFalse(self.restore_image.called)
+        self.assertEqual(self.started_with_image_dir, [None])
+        self.assertEqual(self.tester.cluster.image_dir, self.image_dir)
+
+    def no_baseline_test(self):
+        """
+        When baselines aren't used, the cluster may still start from its own image.
+        """
+        self.assertFalse(self.tester._start_from_baseline(None))
+        self.assertFalse(self.restore_image.called)
+        self.assertEqual(self.started_with_image_dir, [self.image_dir])
+
+    def restores_image_dir_after_failed_start_test(self):
+        self.tester.cluster.start.side_effect = RuntimeError('failed to start')
+        with self.assertRaisesRegexp(RuntimeError, 'failed to start'):
+            self.tester._start_from_baseline(self.baseline_path)
+        self.assertEqual(self.tester.cluster.image_dir, self.image_dir)
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+from tools import cluster_image
+
+
+class ClusterImageTest(TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def _mock_cluster(self, name, node_count=2):
+        """
+        Build a cluster mock whose nodes each have a path with two data
+        directories under base_dir/name, running a Cassandra build under
+        base_dir/cassandra.
+        """
+        install_dir = os.path.join(self.base_dir, 'cassandra')
+        if not os.path.isdir(install_dir):
+            os.makedirs(os.path.join(install_dir, 'build'))
+            self._write(os.path.join(install_dir, 'build', 'apache-cassandra-3.0.9-SNAPSHOT.jar'), 'jar')
+        nodes = []
+        for i in range(1, node_count + 1):
+            node_path = os.path.join(self.base_dir, name, 'node{}'.format(i))
+            data_dirs = [os.path.join(node_path, 'data{}'.format(x)) for x in range(2)]
+            for d in data_dirs + [os.path.join(node_path, 'commitlogs')]:
+                os.makedirs(d)
+            node = Mock(get_path=Mock(return_value=node_path),
+                        data_directories=Mock(return_value=data_dirs),
+                        is_running=Mock(return_value=False),
+                        get_install_dir=Mock(return_value=install_dir),
+                        _Node__config_options={},
+                        network_interfaces={'storage': ('127.0.0.{}'.format(i), 7000)},
+                        data_center=None, initial_token=None)
+            node.name = 'node{}'.format(i)
+            nodes.append(node)
+        cluster = Mock(nodelist=Mock(return_value=nodes), version=Mock(return_value='3.0.9'),
+                       get_install_dir=Mock(return_value=install_dir), partitioner=None,
+                       use_vnodes=True, data_dir_count=2, _config_options={'num_tokens': 256})
+        cluster.name = 'test'
+        return cluster
+
+    def _write(self, path, contents):
+        with open(path, 'w') as f:
+            f.write(contents)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def is_pristine_test(self):
+        """
+        A cluster is pristine until one of its nodes writes data or is running.
+        """
+        cluster = self._mock_cluster('test')
+        self.assertTrue(cluster_image.is_pristine(cluster))
+
+        cluster.nodelist()[1].is_running.return_value = True
+        self.assertFalse(cluster_image.is_pristine(cluster))
+        cluster.nodelist()[1].is_running.return_value = False
+
+        self._write(os.path.join(cluster.nodelist()[0].get_path(), 'commitlogs', 'CommitLog-6-1.log'), 'x')
+        self.assertFalse(cluster_image.is_pristine(cluster))
+
+    def image_key_test(self):
+        """
+        Identical clusters share a key, and configuration changes alter it.
+        """
+        first, second = self._mock_cluster('first'), self._mock_cluster('second')
+        self.assertEqual(cluster_image.image_key(first), cluster_image.image_key(second))
+
+        second._config_options = {'num_tokens': 32}
+        self.assertNotEqual(cluster_image.image_key(first), cluster_image.image_key(second))
+
+    def image_key_node_settings_test(self):
+        """
+        The cluster name, a node's own options or install directory, and the JVM arguments alter the key.
+        """
+        cluster = self._mock_cluster('first')
+        key = cluster_image.image_key(cluster)
+        self.assertNotEqual(key, cluster_image.image_key(cluster, jvm_args=['-Dcassandra.ring_delay_ms=0']))
+
+        cluster.name = 'other'
+        self.assertNotEqual(key, cluster_image.image_key(cluster))
+        cluster.name = 'test'
+
+        node = cluster.nodelist()[1]
+        node._Node__config_options = {'auto_snapshot': False}
+        self.assertNotEqual(key, cluster_image.image_key(cluster))
+        node._Node__config_options = {}
+
+        other_install_dir = os.path.join(self.base_dir, 'other-cassandra')
+        os.makedirs(other_install_dir)
+        node.get_install_dir.return_value = other_install_dir
+        self.assertNotEqual(key, cluster_image.image_key(cluster))
+
+    def image_key_build_test(self):
+        """
+        Rebuilding the Cassandra install alters the key.
+        """
+        cluster = self._mock_cluster('first')
+        key = cluster_image.image_key(cluster)
+        jar = os.path.join(cluster.get_install_dir(), 'build', 'apache-cassandra-3.0.9-SNAPSHOT.jar')
+        os.utime(jar, (0, os.path.getmtime(jar) + 10))
+        self.assertNotEqual(key, cluster_image.image_key(cluster))
+
+    def image_key_schema_test(self):
+        """
+        Images taken after creating a schema have their own key for each schema.
+        """
+        cluster = self._mock_cluster('first')
+        keys = [cluster_image.image_key(cluster), cluster_image.image_key(cluster, schema={'ks': 1}),
+                cluster_image.image_key(cluster, schema={'ks': 3})]
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(keys[1], cluster_image.image_key(cluster, schema={'ks': 1}))
+
+    def save_and_restore_test(self):
+        """
+        Data files and commitlogs in a restored cluster are independent
+        copies of the image, so writing to them leaves the image intact.
+        """
+        source = self._mock_cluster('source')
+        source_node = source.nodelist()[0]
+        self._write(os.path.join(source_node.get_path(), 'data1', 'ks-cf-Data.db'), 'sstable')
+        self._write(os.path.join(source_node.get_path(), 'commitlogs', 'CommitLog-6-1.log'), 'commitlog')
+
+        image_path = os.path.join(self.base_dir, 'images', cluster_image.image_key(source))
+        cluster_image.save_image(image_path, source)
+        self.assertEqual(os.listdir(os.path.dirname(image_path)), [os.path.basename(image_path)])
+
+        target = self._mock_cluster('target')
+        cluster_image.restore_image(image_path, target)
+        target_path = target.nodelist()[0].get_path()
+
+        data_file = os.path.join(target_path, 'data1', 'ks-cf-Data.db')
+        self.assertEqual(self._read(data_file), 'sstable')
+        self.assertNotEqual(os.stat(data_file).st_ino, os.stat(os.path.join(image_path, 'node1', 'data1', 'ks-cf-Data.db')).st_ino)
+        self._write(data_file, 'corrupted')
+        self.assertEqual(self._read(os.path.join(image_path, 'node1', 'data1', 'ks-cf-Data.db')), 'sstable')
+
+        commitlog = os.path.join(target_path, 'commitlogs', 'CommitLog-6-1.log')
+        self.assertEqual(self._read(commitlog), 'commitlog')
+        self.assertNotEqual(os.stat(commitlog).st_ino, os.stat(os.path.join(image_path, 'node1', 'commitlogs', 'CommitLog-6-1.log')).st_ino)
+
+    def save_keeps_existing_image_test(self):
+        """
+        Saving an image that already exists leaves the first one in place.
+        """
+        cluster = self._mock_cluster('source')
+        image_path = os.path.join(self.base_dir, 'images', 'key')
+        cluster_image.save_image(image_path, cluster)
+        self._write(os.path.join(cluster.nodelist()[0].get_path(), 'data0', 'new-Data.db'), 'sstable')
+        cluster_image.save_image(image_path, cluster)
+
+        self.assertFalse(os.path.exists(os.path.join(image_path, 'node1', 'data0', 'new-Data.db')))
+        self.assertEqual(os.listdir(os.path.dirname(image_path)), ['key'])
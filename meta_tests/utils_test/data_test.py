@@ -0,0 +1,102 @@
+from unittest import TestCase
+
+from cassandra import ConsistencyLevel
+from cassandra.query import BatchType
+from mock import Mock, patch
+
+from tools.data import _prepare, execute_pipelined, insert_columns
+
+
+class _FakeExecuteConcurrent(object):
+    """
+    Stands in for cassandra.concurrent.execute_concurrent, recording the
+    statements it is given and failing on the fail_on'th one.
+    """
+
+    def __init__(self, fail_on=None):
+        self.executed = []
+        self.fail_on = fail_on
+        self.concurrency = None
+
+    def __call__(self, session, statements_and_parameters, concurrency, results_generator):
+        self.concurrency = concurrency
+        for statement, parameters in statements_and_parameters:
+            self.executed.append(statement)
+            if len(self.executed) == self.fail_on:
+                raise ValueError('failed')
+            yield True, []
+
+
+class _FakeBatch(object):
+    """
+    Stands in for cassandra.query.BatchStatement, recording what is added to it.
+    """
+
+    def __init__(self, batch_type, consistency_level):
+        self.batch_type = batch_type
+        self.consistency_level = consistency_level
+        self.added = []
+
+    def add(self, statement, parameters):
+        self.added.append((statement, parameters))
+
+
+class ExecutePipelinedTest(TestCase):
+
+    def binds_each_parameter_set_test(self):
+        statement = Mock()
+        with patch('tools.data.execute_concurrent', _FakeExecuteConcurrent()) as execute:
+            execute_pipelined(Mock(), statement, ((i,) for i in range(20)), consistency=ConsistencyLevel.ALL, concurrency=7)
+
+        self.assertEqual([args for args, _ in statement.bind.call_args_list], [((i,),) for i in range(20)])
+        self.assertEqual(execute.executed, [statement.bind.return_value] * 20)
+        self.assertEqual(execute.executed[0].consistency_level, ConsistencyLevel.ALL)
+        self.assertEqual(execute.concurrency, 7)
+
+    def raises_first_error_test(self):
+        with patch('tools.data.execute_concurrent', _FakeExecuteConcurrent(fail_on=5)) as execute:
+            with self.assertRaisesRegexp(ValueError, 'failed'):
+                execute_pipelined(Mock(), Mock(), ((i,) for i in range(20)))
+        self.assertEqual(len(execute.executed), 5)
+
+    def batches_consecutive_parameters_of_a_partition_test(self):
+        """
+        With batch_key, the parameters of each partition are executed in UNLOGGED batches of at most batch_size.
+        """
+        statement = Mock()
+        parameters = [('v%d' % i, 'k1') for i in range(5)] + [('v5', 'k2')]
+        with patch('tools.data.execute_concurrent', _FakeExecuteConcurrent()) as execute, \
+                patch('tools.data.BatchStatement', _FakeBatch):
+            execute_pipelined(Mock(), statement, parameters, consistency=ConsistencyLevel.ALL,
+                              batch_key=lambda params: params[1], batch_size=3)
+
+        self.assertEqual([batch.added for batch in execute.executed],
+                         [[(statement, ('v0', 'k1')), (statement, ('v1', 'k1')), (statement, ('v2', 'k1'))],
+                          [(statement, ('v3', 'k1')), (statement, ('v4', 'k1'))],
+                          [(statement, ('v5', 'k2'))]])
+        self.assertEqual(set((batch.batch_type, batch.consistency_level) for batch in execute.executed),
+                         set([(BatchType.UNLOGGED, ConsistencyLevel.ALL)]))
+
+
+class PrepareTest(TestCase):
+
+    def prepares_once_per_keyspace_test(self):
+        session = Mock(keyspace='ks1')
+        session.prepare.side_effect = lambda query: (session.keyspace, query)
+        self.assertEqual(_prepare(session, 'UPDATE cf SET v=?'), ('ks1', 'UPDATE cf SET v=?'))
+        self.assertEqual(_prepare(session, 'UPDATE cf SET v=?'), ('ks1', 'UPDATE cf SET v=?'))
+        session.keyspace = 'ks2'
+        self.assertEqual(_prepare(session, 'UPDATE cf SET v=?'), ('ks2', 'UPDATE cf SET v=?'))
+        self.assertEqual(session.prepare.call_count, 2)
+
+
+class InsertColumnsTest(TestCase):
+
+    def writes_partition_in_one_batch_test(self):
+        with patch('tools.data.execute_concurrent', _FakeExecuteConcurrent()) as execute, \
+                patch('tools.data.BatchStatement', _FakeBatch):
+            insert_columns(None, Mock(keyspace='ks'), 1, 250, offset=1)
+
+        batch, = execute.executed
+        self.assertEqual([parameters for _, parameters in batch.added],
+                         [('value%d' % i, 'k1', 'c%06d' % i) for i in range(250, 500)])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from tools.datahelp import (LoadedData, _partition_batches, flatten_into_set,
+                            iter_data_dicts, parse_data_into_dicts)
+
+
+class IterDataDictsTest(TestCase):
+
+    data = """
+          | k | v   |
+          +---+-----+
+          | 1 | foo |
+        *3| 2 | bar |
+        """
+
+    def multiplier_test(self):
+        rows = list(iter_data_dicts(self.data, format_funcs={'k': int}))
+        self.assertEqual(rows, [{'k': 1, 'v': 'foo'}] + [{'k': 2, 'v': 'bar'}] * 3)
+        self.assertEqual(rows, parse_data_into_dicts(self.data, format_funcs={'k': int}))
+
+
+class FlattenTest(TestCase):
+
+    def compares_values_as_strings_test(self):
+        """
+        Rows are flattened to strings, so values with the same string form,
+        like the int 1 and the string '1', compare equal.
+        """
+        self.assertEqual(flatten_into_set([{'k': 1, 'v': 'a'}]), set(['k__1__v__a']))
+        self.assertLessEqual(flatten_into_set([{'v': 'a', 'k': 1}]), flatten_into_set([{'k': '1', 'v': 'a'}, {'k': 2, 'v': 'b'}]))
+
+
+class PartitionBatchesTest(TestCase):
+
+    def batches_by_partition_test(self):
+        """
+        Consecutive rows of a partition share a batch, up to the batch size.
+        """
+        rows = [{'k': k, 'c': c} for k, c in [(1, 1), (1, 2), (1, 3), (2, 1), (1, 4)]]
+        loaded = LoadedData('ks.cf', ['k', 'c'])
+        statement = 'INSERT INTO ks.cf (k, c) VALUES (%s, %s)'
+        batches = list(_partition_batches(statement, rows, loaded, ['k'], 2, None))
+        self.assertEqual([len(batch._statements_and_parameters) for batch, _ in batches], [2, 1, 1, 1])
+        self.assertEqual(loaded.count, 5)
+
+
+class LoadedDataVerifyTest(TestCase):
+
+    def setUp(self):
+        self.rows = [{'k': i, 'v': str(i)} for i in range(10)]
+        self.loaded = LoadedData('ks.cf', ['k', 'v'], source=lambda: iter(self.rows))
+        for row in self.rows:
+            self.loaded.add([row['k'], row['v']])
+
+    def matching_table_test(self):
+        session = Mock(execute=Mock(return_value=[(row['k'], row['v']) for row in reversed(self.rows)]))
+        self.loaded.verify(session)
+
+    def lists_differences_test(self):
+        session = Mock(execute=Mock(return_value=[(row['k'], row['v']) for row in self.rows[1:]] + [(0, 'x')]))
+        with self.assertRaises(AssertionError) as cm:
+            self.loaded.verify(session)
+        message = str(cm.exception)
+        self.assertIn('Missing rows (1 distinct, showing at most 10):\n    [0, \'0\']', message)
+        self.assertIn('Unexpected rows (1 distinct, showing at most 10):\n    [0, \'x\']', message)
+
+    def counts_without_source_test(self):
+        self.loaded._source = None
+        session = Mock(execute=Mock(return_value=[]))
+        with self.assertRaisesRegexp(AssertionError, 'do not match the 10 rows loaded into it: found 0 rows'):
+            self.loaded.verify(session)
+
+    def empty_load_test(self):
+        """
+        With nothing loaded there are no columns to select, so every column is
+        read, and any row found is unexpected.
+        """
+        loaded = LoadedData('ks.cf', [], source=lambda: iter([]))
+        session = Mock(execute=Mock(return_value=[]))
+        loaded.verify(session)
+        self.assertEqual(session.execute.call_args[0][0].query_string, 'SELECT * FROM ks.cf')
+
+        session.execute.return_value = [{'k': 0, 'v': '0'}]
+        with self.assertRaisesRegexp(AssertionError, "Unexpected rows \\(1 distinct, showing at most 10\\):\n    \\[0, '0'\\]"):
+            loaded.verify(session)
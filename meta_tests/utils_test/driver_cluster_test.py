@@ -0,0 +1,154 @@
+from unittest import TestCase
+
+from cassandra.policies import RoundRobinPolicy, WhiteListRoundRobinPolicy
+from mock import Mock
+
+from dtest import _load_balancing_key
+from tools.driver_cluster import DriverClusterCache, SharedDriverCluster
+
+
+def _mock_driver_cluster():
+    """
+    Build a driver Cluster mock whose connect returns a new session mock each time.
+    """
+    def connect(*args, **kwargs):
+        session = Mock(is_shutdown=False)
+
+        def shutdown():
+            session.is_shutdown = True
+        session.shutdown = Mock(side_effect=shutdown)
+        return session
+
+    cluster = Mock(is_shutdown=False, connect=Mock(side_effect=connect))
+
+    def shutdown():
+        cluster.is_shutdown = True
+    cluster.shutdown = Mock(side_effect=shutdown)
+    return cluster
+
+
+class SharedDriverClusterTest(TestCase):
+
+    def setUp(self):
+        self.cluster = _mock_driver_cluster()
+        self.shared = SharedDriverCluster(self.cluster)
+
+    def shutdown_only_closes_its_session_test(self):
+        """
+        Shutting down a session's cluster leaves the Cluster open for the other sessions.
+        """
+        first, second = self.shared.connect(), self.shared.connect()
+        first.cluster.shutdown()
+
+        self.assertTrue(first.shutdown.called)
+        self.assertTrue(first.cluster.is_shutdown)
+        self.assertFalse(self.cluster.shutdown.called)
+        self.assertFalse(second.cluster.is_shutdown)
+        self.assertFalse(self.shared.is_shutdown)
+
+    def last_session_closes_cluster_test(self):
+        """
+        The Cluster is shut down with its last session, however often that session's cluster is shut down.
+        """
+        first, second = self.shared.connect(), self.shared.connect()
+        first.cluster.shutdown()
+        first.cluster.shutdown()
+        self.assertFalse(self.cluster.shutdown.called)
+
+        second.cluster.shutdown()
+        self.assertEqual(self.cluster.shutdown.call_count, 1)
+        self.assertTrue(self.shared.is_shutdown)
+
+    def session_cluster_is_the_cluster_test(self):
+        """
+        Other than shutting down, a session's cluster reads and sets the Cluster's attributes.
+        """
+        session = self.shared.connect(wait_for_all_pools=True)
+        self.cluster.connect.assert_called_once_with(wait_for_all_pools=True)
+
+        session.cluster.max_schema_agreement_wait = -1
+        self.assertEqual(self.cluster.max_schema_agreement_wait, -1)
+        self.assertIs(session.cluster.metadata, self.cluster.metadata)
+
+    def connect_through_session_cluster_test(self):
+        """
+        Sessions opened through a session's cluster keep the Cluster open too.
+        """
+        first = self.shared.connect()
+        second = first.cluster.connect()
+        first.cluster.shutdown()
+        self.assertFalse(self.cluster.shutdown.called)
+        second.cluster.shutdown()
+        self.assertTrue(self.cluster.shutdown.called)
+
+
+class DriverClusterCacheTest(TestCase):
+
+    def setUp(self):
+        self.cache = DriverClusterCache()
+        self.shared = SharedDriverCluster(_mock_driver_cluster())
+        self.node_states = (('node1', 100), ('node2', 200))
+        self.cache.put('key', self.node_states, self.shared)
+
+    def reused_test(self):
+        """
+        A Cluster is handed out again for the same settings while the nodes are unchanged.
+        """
+        self.assertIs(self.cache.get('key', self.node_states), self.shared)
+        self.assertIs(self.cache.get('key', self.node_states), self.shared)
+        self.assertIsNone(self.cache.get('other key', self.node_states))
+
+    def reused_after_a_session_is_shut_down_test(self):
+        """
+        Shutting down one session of a Cluster doesn't keep the others from reusing it.
+        """
+        first = self.shared.connect()
+        self.shared.connect()
+        first.cluster.shutdown()
+        self.assertIs(self.cache.get('key', self.node_states), self.shared)
+
+    def invalidated_by_node_changes_test(self):
+        """
+        A Cluster is dropped once a node has been started, stopped, added or removed.
+        """
+        self.assertIsNone(self.cache.get('key', (('node1', 100), ('node2', None))))
+        # and stays dropped once the nodes are back as they were
+        self.assertIsNone(self.cache.get('key', self.node_states))
+
+    def invalidated_by_shutdown_test(self):
+        """
+        A Cluster is dropped once all its sessions are shut down.
+        """
+        session = self.shared.connect()
+        session.cluster.shutdown()
+        self.assertIsNone(self.cache.get('key', self.node_states))
+
+    def invalidated_by_settings_test(self):
+        """
+        A Cluster is no longer handed out once a session changes its settings.
+        """
+        session = self.shared.connect()
+        session.cluster.register_user_type('ks', 'address', dict)
+        self.assertTrue(self.shared.cluster.register_user_type.called)
+        self.assertIsNone(self.cache.get('key', self.node_states))
+
+    def invalidated_by_attribute_change_test(self):
+        session = self.shared.connect()
+        session.cluster.metadata
+        self.assertIs(self.cache.get('key', self.node_states), self.shared)
+        session.cluster.default_retry_policy = None
+        self.assertIsNone(self.cache.get('key', self.node_states))
+
+
+class LoadBalancingKeyTest(TestCase):
+
+    def whitelists_by_host_test(self):
+        """
+        Clusters are shared between whitelists of the same hosts only.
+        """
+        self.assertIsNone(_load_balancing_key(None))
+        self.assertEqual(_load_balancing_key(WhiteListRoundRobinPolicy(['127.0.0.1', '127.0.0.2'])),
+                         _load_balancing_key(WhiteListRoundRobinPolicy(['127.0.0.2', '127.0.0.1'])))
+        self.assertNotEqual(_load_balancing_key(WhiteListRoundRobinPolicy(['127.0.0.1'])),
+                            _load_balancing_key(WhiteListRoundRobinPolicy(['127.0.0.2'])))
+        self.assertNotEqual(_load_balancing_key(RoundRobinPolicy()), _load_balancing_key(RoundRobinPolicy()))
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from tools.log_index import LogIndex, any_pattern
+
+
+class LogIndexTest(TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.log_dir, 'system.log')
+        self.index = LogIndex()
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def _append(self, text, mode='a'):
+        with open(self.path, mode) as f:
+            f.write(text)
+
+    def missing_file_test(self):
+        """
+        A log that hasn't been written yet has no errors or matches.
+        """
+        self.assertEqual(self.index.errors(self.path), [])
+        self.assertEqual(self.index.grep(self.path, 'anything'), [])
+        self.assertEqual(self.index.errors_and_mark(self.path), ([], 0))
+
+    def errors_with_stack_traces_test(self):
+        """
+        Errors include the lines continuing them, even when the continuation
+        is appended after the error was first read.
+        """
+        self._append('INFO  starting\n'
+                     'ERROR something broke\n'
+                     'java.lang.RuntimeException: boom\n')
+        self.assertEqual(self.index.errors(self.path),
+                         [['ERROR something broke', 'java.lang.RuntimeException: boom']])
+
+        self._append('\tat org.apache.cassandra.Foo.bar(Foo.java:1)\n'
+                     'WARN  unrelated\n'
+                     'not part of any error\n')
+        self.assertEqual(self.index.errors(self.path),
+                         [['ERROR something broke', 'java.lang.RuntimeException: boom',
+                           '\tat org.apache.cassandra.Foo.bar(Foo.java:1)']])
+
+    def errors_since_mark_test(self):
+        """
+        Errors before a mark are left out of results from that mark on.
+        """
+        self._append('ERROR first\n')
+        _, mark = self.index.errors_and_mark(self.path)
+        self._append('ERROR second\n')
+        self.assertEqual(self.index.errors(self.path, since=mark), [['ERROR second']])
+
+    def partial_lines_not_consumed_test(self):
+        """
+        A line still being written is only indexed once it is complete.
+        """
+        self._append('INFO  Starting listening')
+        self.assertEqual(self.index.grep(self.path, 'Starting listening for CQL clients'), [])
+        self._append(' for CQL clients\n')
+        [(line, match)] = self.index.grep(self.path, 'Starting listening for CQL clients')
+        self.assertEqual(line, 'INFO  Starting listening for CQL clients\n')
+
+    def late_pattern_catches_up_test(self):
+        """
+        A pattern first asked about after the log has been read still sees
+        the lines that were already read, and each line only once.
+        """
+        self._append('INFO  alpha 1\nINFO  beta 2\n')
+        self.assertEqual(len(self.index.grep(self.path, 'alpha')), 1)
+        self._append('INFO  beta 3\n')
+
+        self.assertEqual([m.group(1) for _, m in self.index.grep(self.path, r'beta (\d)')], ['2', '3'])
+        self._append('INFO  alpha 4\n')
+        self.assertEqual(len(self.index.grep(self.path, 'alpha')), 2)
+        self.assertEqual(len(self.index.grep(self.path, r'beta (\d)')), 2)
+
+    def truncated_file_test(self):
+        """
+        If a log shrinks, it is indexed again from the start.
+        """
+        self._append('ERROR old error that is long enough\n')
+        self.assertEqual(len(self.index.errors(self.path)), 1)
+        self._append('INFO  new\n', mode='w')
+        self.assertEqual(self.index.errors(self.path), [])
+        self.assertEqual(len(self.index.grep(self.path, 'new')), 1)
+
+    def forget_test(self):
+        """
+        Forgetting a directory drops what was indexed for logs under it.
+        """
+        self._append('ERROR first\n')
+        self.index.errors(self.path)
+        self.index.forget(self.log_dir)
+        self._append('ERROR second\n', mode='w')
+        self.assertEqual(self.index.errors(self.path), [['ERROR second']])
+
+
+class AnyPatternTest(TestCase):
+
+    def matches_any_pattern_test(self):
+        """
+        A string matches if any one of the patterns matches it.
+        """
+        matcher = any_pattern([r'Unknown keyspace/cf pair', r'Stream failed', r'node\d is down'])
+        self.assertTrue(matcher.search('ERROR Stream failed'))
+        self.assertTrue(matcher.search('ERROR node3 is down'))
+        self.assertFalse(matcher.search('ERROR something else'))
+
+    def empty_patterns_match_nothing_test(self):
+        self.assertFalse(any_pattern([]).search('ERROR anything'))
+
+    def uncombinable_patterns_test(self):
+        """
+        Patterns that can't be joined into one regex are still all checked.
+        """
+        matcher = any_pattern([r'(a)\1', r'(b)\1'])
+        self.assertTrue(matcher.search('xaax'))
+        self.assertTrue(matcher.search('xbbx'))
+        self.assertFalse(matcher.search('xabx'))
+
+    def duplicate_group_names_test(self):
+        """
+        Patterns that fail to compile once joined are checked one at a time.
+        """
+        matcher = any_pattern([r'(?P<node>node\d) is down', r'(?P<node>node\d) is up'])
+        self.assertTrue(matcher.search('ERROR node1 is down'))
+        self.assertTrue(matcher.search('ERROR node2 is up'))
+        self.assertFalse(matcher.search('ERROR node3 is gone'))
+
+    def inline_flags_test(self):
+        """
+        An inline flag only applies to the pattern it appears in.
+        """
+        matcher = any_pattern([r'(?i)stream failed', r'Unknown keyspace', r'Node down'])
+        self.assertTrue(matcher.search('ERROR STREAM FAILED'))
+        self.assertTrue(matcher.search('ERROR Unknown keyspace'))
+        self.assertFalse(matcher.search('ERROR unknown KEYSPACE'))
+        self.assertFalse(matcher.search('ERROR node DOWN'))
+
+    def cached_test(self):
+        """
+        The same patterns give the same matcher, whatever sequence type holds them.
+        """
+        self.assertIs(any_pattern(['a', 'b']), any_pattern(('a', 'b')))
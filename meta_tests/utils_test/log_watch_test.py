@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from mock import Mock
+from tools.log_index import LogIndex
+from tools.log_watch import ActiveLogWatch, LogWatcher
+
+
+class LogWatcherTest(TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.log_dir, 'system.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def _append_later(self, path, text, delay=0.1):
+        def append():
+            time.sleep(delay)
+            with open(path, 'a') as f:
+                f.write(text)
+        t = threading.Thread(target=append)
+        t.start()
+        return t
+
+    def _assert_wakes_on_write(self, watcher):
+        writer = self._append_later(self.path, 'INFO  hello\n')
+        start = time.time()
+        changed = watcher.wait(10)
+        writer.join()
+        self.assertEqual(changed, {self.path})
+        self.assertLess(time.time() - start, 5)
+
+    def wakes_on_write_test(self):
+        """
+        Waiting returns as soon as a watched file is written, even if it
+        didn't exist when watching started.
+        """
+        with LogWatcher([self.path]) as watcher:
+            self._assert_wakes_on_write(watcher)
+
+    def polling_fallback_test(self):
+        """
+        Without inotify, changes are found by polling file sizes.
+        """
+        with LogWatcher(poll_interval=0.05) as watcher:
+            watcher.close()  # forces the polling fallback
+            watcher.watch(self.path)
+            self.assertFalse(watcher.uses_inotify)
+            self._assert_wakes_on_write(watcher)
+
+    def timeout_test(self):
+        """
+        Writes to unwatched files don't wake a waiter, which times out.
+        """
+        with LogWatcher([self.path]) as watcher:
+            writer = self._append_later(os.path.join(self.log_dir, 'debug.log'), 'DEBUG noise\n', delay=0)
+            self.assertEqual(watcher.wait(0.5), set())
+            writer.join()
+
+
+class ActiveLogWatchTest(TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.node = Mock(logfilename=Mock(return_value=os.path.join(self.log_dir, 'system.log')))
+        self.node.name = 'node1'
+        self.cluster = Mock(nodelist=Mock(return_value=[self.node]))
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def reports_each_error_once_test(self):
+        """
+        Errors are reported to the callback once each, as they are logged.
+        """
+        reported = []
+        seen = threading.Event()
+
+        def on_error(errordata):
+            reported.append(errordata)
+            seen.set()
+
+        watch = ActiveLogWatch(self.cluster, LogIndex(), on_error, resync_interval=0.2)
+        watch.start()
+        with open(self.node.logfilename(), 'a') as f:
+            f.write('INFO  fine\nERROR first\n')
+        self.assertTrue(seen.wait(5))
+        seen.clear()
+        with open(self.node.logfilename(), 'a') as f:
+            f.write('ERROR second\n')
+        self.assertTrue(seen.wait(5))
+        watch.join(timeout=5)
+
+        self.assertFalse(watch.is_alive())
+        self.assertEqual([dict(e) for e in reported],
+                         [{'node1': [['ERROR first']]}, {'node1': [['ERROR second']]}])
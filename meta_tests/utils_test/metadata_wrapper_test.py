@@ -6,7 +6,9 @@ from mock import MagicMock, Mock
 from tools.metadata_wrapper import (UpdatingClusterMetadataWrapper,
                                     UpdatingKeyspaceMetadataWrapper,
                                     UpdatingMetadataWrapperBase,
-                                    UpdatingTableMetadataWrapper)
+                                    UpdatingTableMetadataWrapper,
+                                    refresh_keyspace_metadata,
+                                    refresh_table_metadata)
 
 
 class UpdatingMetadataWrapperBaseTest(TestCase):
@@ -182,3 +184,40 @@ class UpdatingClusterMetadataWrapperTest(TestCase):
             repr(self.wrapper),
             'UpdatingClusterMetadataWrapper(cluster={})'.format(self.cluster_mock)
         )
+
+
+class LazyRefreshTest(TestCase):
+
+    def setUp(self):
+        self.cluster_mock = MagicMock()
+        self.cluster_mock.metadata.keyspaces = {}
+
+    def keyspace_refresh_without_schema_metadata_test(self):
+        """
+        When the driver doesn't keep schema metadata up to date, refreshing a
+        keyspace reloads the whole schema so that its tables are included.
+        """
+        self.cluster_mock.schema_metadata_enabled = False
+        refresh_keyspace_metadata(self.cluster_mock, 'ks')
+        self.cluster_mock.refresh_keyspace_metadata.assert_not_called()
+        self.cluster_mock.refresh_schema_metadata.assert_called_once_with()
+
+    def keyspace_refresh_with_schema_metadata_test(self):
+        self.cluster_mock.schema_metadata_enabled = True
+        refresh_keyspace_metadata(self.cluster_mock, 'ks')
+        self.cluster_mock.refresh_keyspace_metadata.assert_called_once_with('ks')
+        self.cluster_mock.refresh_schema_metadata.assert_not_called()
+
+    def table_refresh_loads_unknown_keyspace_test(self):
+        """
+        Refreshing a table in a keyspace the driver hasn't loaded loads the
+        keyspace first, and only the first time.
+        """
+        refresh_table_metadata(self.cluster_mock, 'ks', 'tab')
+        self.cluster_mock.refresh_keyspace_metadata.assert_called_once_with('ks')
+        self.cluster_mock.refresh_table_metadata.assert_called_once_with('ks', 'tab')
+
+        self.cluster_mock.metadata.keyspaces['ks'] = Mock()
+        refresh_table_metadata(self.cluster_mock, 'ks', 'tab')
+        self.assertEqual(self.cluster_mock.refresh_keyspace_metadata.call_count, 1)
+        self.assertEqual(self.cluster_mock.refresh_table_metadata.call_count, 2)
@@ -0,0 +1,54 @@
+import threading
+import time
+from unittest import TestCase
+
+from tools.misc import run_on_nodes
+
+
+class RunOnNodesTest(TestCase):
+
+    def returns_results_in_node_order_test(self):
+        """
+        Results come back in the order of the nodes, not the order the calls finish in.
+        """
+        def func(node):
+            time.sleep(0.01 * (5 - node))
+            return node * 10
+        self.assertEqual(run_on_nodes(func, range(5)), [0, 10, 20, 30, 40])
+        self.assertEqual(run_on_nodes(func, range(5), concurrency=2), [0, 10, 20, 30, 40])
+        self.assertEqual(run_on_nodes(func, []), [])
+
+    def bounds_concurrency_test(self):
+        lock = threading.Lock()
+        running = [0]
+        most_running = [0]
+
+        def func(node):
+            with lock:
+                running[0] += 1
+                most_running[0] = max(most_running[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        run_on_nodes(func, range(8), concurrency=3)
+        self.assertEqual(most_running[0], 3)
+
+        most_running[0] = 0
+        run_on_nodes(func, range(8), concurrency=1)
+        self.assertEqual(most_running[0], 1)
+
+    def raises_after_calls_finish_test(self):
+        called = []
+
+        def func(node):
+            time.sleep(0.01)
+            called.append(node)
+            if node in (2, 4):
+                raise ValueError('node{} failed'.format(node))
+
+        for concurrency in (None, 2, 1):
+            del called[:]
+            with self.assertRaisesRegexp(ValueError, 'node2 failed'):
+                run_on_nodes(func, range(6), concurrency=concurrency)
+            self.assertEqual(sorted(called), [0, 1, 2] if concurrency == 1 else range(6))
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from unittest import TestCase
+
+from tools.paging import Page, PagedRows, PageFetcher
+
+
+class FakeResponseFuture(object):
+    """
+    Serves pages the way the driver's ResponseFuture does: one page at a
+    time, each delivered to the callback on another thread.
+    """
+
+    def __init__(self, pages, delay=0.01, fail_at=None):
+        self._pages = list(pages)
+        self._delay = delay
+        self._fail_at = fail_at
+        self._next = 0
+        self.fetches = 0
+        self.has_more_pages = False
+
+    def add_callbacks(self, callback, errback):
+        self._callback = callback
+        self._errback = errback
+        self._deliver()
+
+    def start_fetching_next_page(self):
+        assert self.has_more_pages, 'no more pages to fetch'
+        self.fetches += 1
+        self._deliver()
+
+    def _deliver(self):
+        page_num = self._next
+        self._next += 1
+
+        def deliver():
+            time.sleep(self._delay)
+            if page_num == self._fail_at:
+                try:
+                    self._errback(Exception('node down'))
+                except Exception:
+                    pass
+                return
+            self.has_more_pages = self._next < len(self._pages)
+            self._callback(self._pages[page_num])
+
+        thread = threading.Thread(target=deliver)
+        thread.daemon = True
+        thread.start()
+
+
+class PageFetcherTest(TestCase):
+
+    pages = [[(1,), (2,)], [(3,), (4,)], [(5,), (6,)], [(7,)]]
+
+    def request_one_test(self):
+        future = FakeResponseFuture(self.pages)
+        pf = PageFetcher(future)
+        self.assertEqual(pf.pagecount(), 1)
+        self.assertEqual(future.fetches, 0)
+
+        pf.request_one()
+        self.assertEqual(pf.pagecount(), 2)
+        self.assertEqual(pf.page_data(2), [(3,), (4,)])
+        self.assertEqual(future.fetches, 1)
+        self.assertTrue(pf.has_more_pages)
+
+    def request_all_test(self):
+        pf = PageFetcher(FakeResponseFuture(self.pages)).request_all()
+        self.assertEqual(pf.pagecount(), 4)
+        self.assertEqual(pf.all_data(), [(i,) for i in range(1, 8)])
+        self.assertFalse(pf.has_more_pages)
+
+    def empty_final_page_test(self):
+        pf = PageFetcher(FakeResponseFuture([[(1,)], []])).request_all()
+        self.assertEqual((pf.retrieved_pages, pf.retrieved_empty_pages), (1, 1))
+
+    def prefetch_test(self):
+        """
+        Prefetched pages are held back until they are requested.
+        """
+        future = FakeResponseFuture(self.pages)
+        pf = PageFetcher(future, prefetch=2)
+        time.sleep(0.2)
+        self.assertEqual(future.fetches, 2)
+        self.assertEqual(pf.pagecount(), 1)
+
+        start = time.time()
+        pf.request_one()
+        self.assertLess(time.time() - start, 0.01)
+        self.assertEqual(pf.page_data(2), [(3,), (4,)])
+
+        pf.request_all()
+        self.assertEqual(pf.all_data(), [(i,) for i in range(1, 8)])
+
+    def error_ends_wait_test(self):
+        """
+        A failed fetch raises straight away instead of waiting out the timeout.
+        """
+        pf = PageFetcher(FakeResponseFuture(self.pages, fail_at=1))
+        start = time.time()
+        with self.assertRaisesRegexp(RuntimeError, 'Requested pages were not delivered before timeout'):
+            pf.request_all(timeout=10)
+        self.assertLess(time.time() - start, 1)
+
+
+class PageTest(TestCase):
+
+    def row_types_test(self):
+        """
+        Rows come back as the type they were added as.
+        """
+        Row = namedtuple('Row', ['a', 'b'])
+        for rows in ([(1, 'x'), (2, 'y')],
+                     [Row(1, 'x'), Row(2, 'y')],
+                     [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}],
+                     [OrderedDict([('b', 'x'), ('a', 1)])]):
+            page = Page(rows)
+            self.assertEqual(page.data, rows)
+            self.assertEqual([type(row) for row in page], [type(row) for row in rows])
+            self.assertEqual(page.row(len(rows) - 1), rows[-1])
+
+    def empty_page_test(self):
+        self.assertEqual(len(Page()), 0)
+        self.assertEqual(Page().data, [])
+
+
+class PagedRowsTest(TestCase):
+
+    def setUp(self):
+        self.rows = [(i, str(i)) for i in range(7)]
+        self.view = PagedRows([Page(self.rows[:3]), Page(self.rows[3:6]), Page(self.rows[6:])])
+
+    def list_like_test(self):
+        self.assertEqual(len(self.view), 7)
+        self.assertEqual(self.view, self.rows)
+        self.assertEqual(self.rows, self.view)
+        self.assertNotEqual(self.view, self.rows[:-1])
+        self.assertEqual(list(reversed(self.view)), list(reversed(self.rows)))
+
+    def indexing_test(self):
+        self.assertEqual([self.view[i] for i in range(7)], self.rows)
+        self.assertEqual(self.view[-1], self.rows[-1])
+        self.assertEqual(self.view[2:5], self.rows[2:5])
+        with self.assertRaises(IndexError):
+            self.view[7]
+
+    def view_is_a_snapshot_test(self):
+        """
+        Pages retrieved after view is called don't show up in its result.
+        """
+        future = FakeResponseFuture([[(1,), (2,)], [(3,)]])
+        pf = PageFetcher(future)
+        view = pf.view()
+        pf.request_all()
+        self.assertEqual(view, [(1,), (2,)])
+        self.assertEqual(list(pf.iter_rows()), [(1,), (2,), (3,)])
+
+    def all_data_is_a_mutable_list_test(self):
+        """
+        Callers may change all_data's list and its rows, as the paging tests do.
+        """
+        pf = PageFetcher(FakeResponseFuture([[{'a': 1}, {'a': 2}], [{'a': 3}]])).request_all()
+        data = pf.all_data()
+        self.assertIsInstance(data, list)
+        data.pop(0)
+        data[0]['a'] = None
+        self.assertEqual(data, [{'a': None}, {'a': 3}])
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock
+
+from tools.probe_cache import cached, file_state, git_head_state
+
+
+class CachedTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'probes.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def computes_once_per_key_test(self):
+        compute = Mock(return_value=['3.0.9', 'git:abc'])
+        for _ in range(3):
+            self.assertEqual(cached('version', ['/cassandra', (1.5, None)], compute, path=self.path), ['3.0.9', 'git:abc'])
+        self.assertEqual(compute.call_count, 1)
+
+        cached('version', ['/cassandra', (2.5, None)], compute, path=self.path)
+        self.assertEqual(compute.call_count, 2)
+
+    def keeps_other_entries_test(self):
+        cached('a', 1, lambda: 'a', path=self.path)
+        cached('b', 1, lambda: 'b', path=self.path)
+        self.assertEqual(cached('a', 1, Mock(side_effect=AssertionError), path=self.path), 'a')
+
+    def disabled_test(self):
+        compute = Mock(return_value=1)
+        cached('a', None, compute, path=self.path)
+        cached('a', 1, compute, path='')
+        cached('a', 1, compute, path='')
+        self.assertEqual(compute.call_count, 3)
+        self.assertFalse(os.path.exists(self.path))
+
+    def corrupt_file_test(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        self.assertEqual(cached('a', 1, lambda: 'a', path=self.path), 'a')
+
+
+class GitHeadStateTest(TestCase):
+
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.repo)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.repo, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    def not_a_repo_test(self):
+        self.assertIsNone(git_head_state(self.repo))
+
+    def follows_branch_test(self):
+        self._write('.git/HEAD', 'ref: refs/heads/trunk\n')
+        ref = self._write('.git/refs/heads/trunk', 'abc\n')
+        state = git_head_state(self.repo)
+        self.assertEqual(state, ['ref: refs/heads/trunk'] + file_state(ref, os.path.join(self.repo, '.git', 'packed-refs')))
+
+        os.utime(ref, (0, 0))
+        self.assertNotEqual(git_head_state(self.repo), state)
+
+    def detached_head_test(self):
+        self._write('.git/HEAD', 'abc\n')
+        self.assertEqual(git_head_state(self.repo), ['abc'])
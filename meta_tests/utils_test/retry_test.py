@@ -0,0 +1,99 @@
+import socket
+import time
+from itertools import islice
+from unittest import TestCase
+
+from mock import Mock, patch
+from tools.retry import (RETRY_STATS, backoff_delays, port_open,
+                         retry_till_success)
+
+
+class RetryTillSuccessTest(TestCase):
+
+    def setUp(self):
+        RETRY_STATS.drain()
+
+    def _failing(self, failures, exception=ValueError):
+        """
+        Return a mock that raises exception failures times, then returns 'done'.
+        """
+        return Mock(__name__='fun', side_effect=[exception()] * failures + ['done'])
+
+    def retries_until_success_test(self):
+        fun = self._failing(3)
+        with patch('time.sleep'):
+            self.assertEqual(retry_till_success(fun, 'a', key='b', timeout=10), 'done')
+        fun.assert_called_with('a', key='b')
+
+        [record] = RETRY_STATS.drain()
+        self.assertEqual((record.name, record.attempts, record.probes, record.succeeded), ('fun', 4, 0, True))
+        self.assertGreater(record.waited, 0)
+
+    def other_exceptions_not_retried_test(self):
+        fun = self._failing(1, exception=KeyError)
+        with self.assertRaises(KeyError):
+            retry_till_success(fun, bypassed_exception=ValueError)
+        self.assertEqual(fun.call_count, 1)
+
+    def raises_at_deadline_test(self):
+        """
+        Once the timeout has passed the last exception is raised, and waits
+        don't run past the deadline.
+        """
+        fun = Mock(__name__='fun', side_effect=ValueError)
+        start = time.time()
+        with self.assertRaises(ValueError):
+            retry_till_success(fun, timeout=0.3, max_delay=0.05)
+        self.assertLess(time.time() - start, 1)
+        self.assertGreater(fun.call_count, 2)
+
+        [record] = RETRY_STATS.drain()
+        self.assertFalse(record.succeeded)
+
+    def waits_for_readiness_probe_test(self):
+        """
+        fun isn't called until the readiness probe passes.
+        """
+        fun = self._failing(0)
+        ready = Mock(side_effect=[False, False, True])
+        with patch('time.sleep'):
+            self.assertEqual(retry_till_success(fun, ready=ready), 'done')
+        self.assertEqual(fun.call_count, 1)
+
+        [record] = RETRY_STATS.drain()
+        self.assertEqual((record.attempts, record.probes), (1, 3))
+
+    def failing_probe_still_attempts_at_deadline_test(self):
+        """
+        If the readiness probe never passes, fun is still called once at the
+        timeout so that its own exception is raised.
+        """
+        fun = Mock(__name__='fun', side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            retry_till_success(fun, ready=lambda: False, timeout=0.1, max_delay=0.02)
+        self.assertEqual(fun.call_count, 1)
+
+
+class BackoffDelaysTest(TestCase):
+
+    def grows_to_maximum_test(self):
+        delays = list(islice(backoff_delays(initial=0.1, maximum=1, jitter=0), 7))
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1, 1, 1])
+
+    def jitter_shortens_delays_test(self):
+        for delay in islice(backoff_delays(initial=1, maximum=1, jitter=0.5), 100):
+            self.assertTrue(0.5 <= delay <= 1)
+
+
+class PortOpenTest(TestCase):
+
+    def port_open_test(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+        self.assertFalse(port_open('127.0.0.1', port))
+        listener.listen(1)
+        try:
+            self.assertTrue(port_open('127.0.0.1', port))
+        finally:
+            listener.close()
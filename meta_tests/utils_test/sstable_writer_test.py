@@ -0,0 +1,145 @@
+import os
+import shutil
+import struct
+import tempfile
+from collections import OrderedDict
+from StringIO import StringIO
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from tools import sstable_writer
+
+
+class _FakeProcess(object):
+    """
+    A Popen of the seeder helper, recording what is written to its stdin, and
+    printing a count of 2 rows and an error message when it exits.
+    """
+
+    def __init__(self, args, stdin, stdout, stderr, returncode=0):
+        self.args = args
+        self.stdin = StringIO()
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+        self._exit_with = returncode
+
+    def communicate(self):
+        self.stdout.write('2\n')
+        self.stderr.write('it broke\n')
+        self.returncode = self._exit_with
+        return None, None
+
+
+class WriteSSTablesTest(TestCase):
+
+    def setUp(self):
+        self.processes = []
+        for name, value in (('compile_seeder', Mock(return_value='/seeder')),
+                            ('cassandra_classpath', Mock(return_value='/cassandra.jar')),
+                            ('refresh_table_metadata', Mock())):
+            patcher = patch.object(sstable_writer, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _session(self):
+        table = Mock(as_cql_query=Mock(return_value='CREATE TABLE ks.cf (k int PRIMARY KEY, v text)'))
+        session = Mock(keyspace='ks')
+        session.cluster.metadata.keyspaces = {'ks': Mock(tables={'cf': table})}
+        session.prepare.return_value.bind.side_effect = lambda values: Mock(values=[None if v is None else str(v) for v in values])
+        return session
+
+    def _popen(self, returncode=0):
+        def popen(args, stdin, stdout, stderr):
+            process = _FakeProcess(args, stdin, stdout, stderr, returncode)
+            self.processes.append(process)
+            return process
+        return patch.object(sstable_writer.subprocess, 'Popen', side_effect=popen)
+
+    def frames_each_value_with_its_length_test(self):
+        """
+        Each serialized value is written as its length, as a big-endian int,
+        followed by its bytes, and a null value as a length of -1.
+        """
+        with self._popen():
+            count = sstable_writer.write_sstables(self._session(), '/cassandra', 'cf',
+                                                  [OrderedDict([('k', 'abc'), ('v', None)]), {'k': '', 'v': 'xy'}], '/sstables')
+
+        self.assertEqual(count, 2)
+        process, = self.processes
+        self.assertEqual(process.stdin.getvalue(),
+                         struct.pack('>i', 3) + 'abc' + struct.pack('>i', -1) + struct.pack('>i', 0) + struct.pack('>i', 2) + 'xy')
+        self.assertEqual(process.args[-6:], ['SSTableSeeder', '/sstables', 'CREATE TABLE ks.cf (k int PRIMARY KEY, v text)',
+                                             'INSERT INTO ks.cf (k, v) VALUES (?, ?)', '2', '64'])
+
+    def no_rows_test(self):
+        with self._popen():
+            self.assertEqual(sstable_writer.write_sstables(self._session(), '/cassandra', 'cf', [], '/sstables'), 0)
+        self.assertEqual(self.processes, [])
+
+    def helper_failure_test(self):
+        with self._popen(returncode=1):
+            with self.assertRaisesRegexp(RuntimeError, 'it broke'):
+                sstable_writer.write_sstables(self._session(), '/cassandra', 'cf', [{'k': 1}], '/sstables')
+
+
+class SeedTableTest(TestCase):
+
+    def _node(self, node_count=1):
+        node = Mock()
+        node.cluster.nodelist.return_value = [node] * node_count
+        return node
+
+    def rejects_unknown_method_test(self):
+        with self.assertRaisesRegexp(ValueError, "method should be 'refresh' or 'sstableloader'"):
+            sstable_writer.seed_table(Mock(), self._node(), 'ks.cf', [], method='copy')
+
+    def rejects_refresh_with_several_nodes_test(self):
+        with self.assertRaisesRegexp(ValueError, "use 'sstableloader' with 3 nodes"):
+            sstable_writer.seed_table(Mock(), self._node(3), 'ks.cf', [], method='refresh')
+
+
+class RefreshTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.table_dir = os.path.join(self.directory, 'data', 'ks', 'cf-1234')
+        self.sstable_dir = os.path.join(self.directory, 'written')
+        os.makedirs(self.table_dir)
+        os.makedirs(self.sstable_dir)
+        self.node = Mock(data_directories=Mock(return_value=[os.path.join(self.directory, 'data')]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _touch(self, directory, *filenames):
+        for filename in filenames:
+            with open(os.path.join(directory, filename), 'w') as f:
+                f.write(filename)
+
+    def renumbers_after_existing_sstables_test(self):
+        self._touch(self.table_dir, 'mc-1-big-Data.db', 'mc-2-big-Data.db', 'mc-2-big-TOC.txt')
+        self._touch(self.sstable_dir, 'mc-1-big-Data.db', 'mc-1-big-TOC.txt', 'mc-2-big-Data.db')
+        sstable_writer._refresh(self.node, 'ks', 'cf', self.sstable_dir)
+
+        self.assertEqual(sorted(os.listdir(self.table_dir)),
+                         ['mc-1-big-Data.db', 'mc-2-big-Data.db', 'mc-2-big-TOC.txt',
+                          'mc-3-big-Data.db', 'mc-3-big-TOC.txt', 'mc-4-big-Data.db'])
+        with open(os.path.join(self.table_dir, 'mc-4-big-Data.db')) as f:
+            self.assertEqual(f.read(), 'mc-2-big-Data.db')
+        self.node.nodetool.assert_called_once_with('refresh ks cf')
+
+    def renumbers_pre_3_0_names_test(self):
+        self.assertEqual(sstable_writer._renumbered(['ks-cf-ka-1-Data.db', 'ks-cf-ka-3-Data.db', 'notes.txt'], 5),
+                         {'ks-cf-ka-1-Data.db': 'ks-cf-ka-5-Data.db', 'ks-cf-ka-3-Data.db': 'ks-cf-ka-6-Data.db',
+                          'notes.txt': 'notes.txt'})
+
+    def refuses_name_clash_test(self):
+        self._touch(self.table_dir, 'mc-1-big-Data.db', 'manifest.json')
+        self._touch(self.sstable_dir, 'mc-1-big-Data.db', 'manifest.json')
+        with self.assertRaisesRegexp(RuntimeError, 'already has files named like the ones written, manifest.json'):
+            sstable_writer._refresh(self.node, 'ks', 'cf', self.sstable_dir)
+
+        self.assertEqual(sorted(os.listdir(self.table_dir)), ['manifest.json', 'mc-1-big-Data.db'])
+        self.assertFalse(self.node.nodetool.called)
@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from tools.token_scan import (TableScan, assert_scanned_row_count,
+                              assert_scans_equal, scan_table, token_ranges)
+
+MURMUR3 = 'org.apache.cassandra.dht.Murmur3Partitioner'
+
+
+def _session(tokens, rows_by_token):
+    """
+    A session over a ring with the given node tokens (None for no token
+    metadata) and a table ks.cf holding rows_by_token.
+    """
+    def execute(query, params=None):
+        if 'system.local' in query:
+            return [(MURMUR3,)]
+        start, end = params
+        return [row for token, row in sorted(rows_by_token.items()) if start < token <= end]
+
+    session = Mock(keyspace='ks')
+    session.execute.side_effect = lambda statement, params=None: execute(getattr(statement, 'query_string', statement), params)
+    session.cluster.metadata.token_map = None if tokens is None else Mock(ring=[Mock(value=t) for t in tokens])
+    key = Mock()
+    key.name = 'k'
+    session.cluster.metadata.keyspaces = {'ks': Mock(tables={'cf': Mock(partition_key=[key])})}
+    return session
+
+
+class TokenRangesTest(TestCase):
+
+    def covers_ring_test(self):
+        for tokens in (None, [-100, 0, 100]):
+            ranges = token_ranges(_session(tokens, {}), splits=4)
+            self.assertEqual(ranges[0][0], -2 ** 63)
+            self.assertEqual(ranges[-1][1], 2 ** 63 - 1)
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+
+    def splits_between_node_tokens_test(self):
+        ranges = token_ranges(_session([-100, 0, 100], {}), splits=4)
+        self.assertEqual(len(ranges), 16)
+        self.assertIn((-25, 0), ranges)
+        self.assertIn((75, 100), ranges)
+
+
+class ScanTableTest(TestCase):
+
+    rows = dict((token, ('k{}'.format(token), token)) for token in range(-1000, 1000, 7))
+
+    def counts_rows_test(self):
+        scan = scan_table(_session([-500, 500], self.rows), 'cf', parallelism=3)
+        self.assertEqual(scan.count, len(self.rows))
+        assert_scanned_row_count(_session(None, self.rows), 'ks.cf', len(self.rows))
+        with self.assertRaises(AssertionError):
+            assert_scanned_row_count(_session(None, self.rows), 'ks.cf', len(self.rows) + 1)
+
+    def compares_scans_test(self):
+        changed = dict(self.rows)
+        changed[-1000] = ('k-1000', 'changed')
+        first = scan_table(_session([0], self.rows), 'cf', splits=2)
+        second = scan_table(_session([0], changed), 'cf', splits=2)
+        assert_scans_equal(first, scan_table(_session([0], self.rows), 'cf', splits=2))
+
+        self.assertEqual(first.count, second.count)
+        [(mine, theirs)] = first.differences(second)
+        self.assertEqual((mine.start, mine.end), (-2 ** 62, 0))
+        with self.assertRaisesRegexp(AssertionError, 'differ in 1 of 4 token ranges'):
+            assert_scans_equal(first, second)
+
+    def different_ranges_test(self):
+        with self.assertRaises(ValueError):
+            TableScan('cf', [Mock(start=0, end=1)]).differences(TableScan('cf', [Mock(start=0, end=2)]))
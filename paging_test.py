@@ -18,6 +18,7 @@ from tools.paging import PageAssertionMixin, PageFetcher
 
 
 class BasePagingTester(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def prepare(self):
         supports_v5_protocol = self.cluster.version() >= LooseVersion('3.10')
@@ -53,7 +54,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
 
         pf = PageFetcher(future)
         pf.request_all()
-        self.assertEqual([], pf.all_data())
+        self.assertEqual([], pf.view())
         self.assertFalse(pf.has_more_pages)
 
     def test_with_less_results_than_page_size(self):
@@ -79,7 +80,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
         pf.request_all()
 
         self.assertFalse(pf.has_more_pages)
-        self.assertEqual(len(expected_data), len(pf.all_data()))
+        self.assertEqual(len(expected_data), len(pf.view()))
 
     def test_with_more_results_than_page_size(self):
         session = self.prepare()
@@ -111,7 +112,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.num_results_all(), [5, 4])
 
         # make sure expected and actual have same data elements (ignoring order)
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_with_equal_results_to_page_size(self):
         session = self.prepare()
@@ -139,7 +140,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.pagecount(), 1)
 
         # make sure expected and actual have same data elements (ignoring order)
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_undefined_page_size_default(self):
         """
@@ -168,7 +169,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.num_results_all(), [5000, 1])
 
         # make sure expected and actual have same data elements (ignoring order)
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
 
 @since('2.0')
@@ -220,7 +221,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.num_results_all(), [5, 5])
 
         # these should be equal (in the same order)
-        self.assertEqual(pf.all_data(), expected_data)
+        self.assertEqual(pf.view(), expected_data)
 
         # make sure we don't allow paging over multiple partitions with order because that's weird
         with self.assertRaisesRegexp(InvalidRequest, 'Cannot page queries with both ORDER BY and a IN restriction on the partition key'):
@@ -270,7 +271,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.num_results_all(), [3, 3, 3, 1])
 
         # these should be equal (in the same order)
-        self.assertEqual(pf.all_data(), expected_data)
+        self.assertEqual(pf.view(), expected_data)
 
         # drop the ORDER BY
         future = session.execute_async(
@@ -283,7 +284,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.num_results_all(), [3, 3, 3, 1])
 
         # these should be equal (in the same order)
-        self.assertEqual(pf.all_data(), list(reversed(expected_data)))
+        self.assertEqual(pf.view(), list(reversed(expected_data)))
 
     def test_with_limit(self):
         session = self.prepare()
@@ -364,7 +365,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.pagecount(), scenario['expect_pgcount'])
 
             # make sure all the data retrieved is a subset of input data
-            self.assertIsSubsetOf(pf.all_data(), expected_data)
+            self.assertIsSubsetOf(pf.view(), expected_data)
 
         run_scenarios(scenarios, handle_scenario, deferred_exceptions=(AssertionError,))
 
@@ -399,7 +400,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
 
         # make sure the allow filtering query matches the expected results (ignoring order)
         self.assertEqualIgnoreOrder(
-            pf.all_data(),
+            pf.view(),
             parse_data_into_dicts(
                 """
                 |id|value           |
@@ -443,7 +444,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.pagecount(), 4)
         self.assertEqual(pf.num_results_all(), [3000, 3000, 3000, 1000])
 
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     @known_failure(failure_source='test',
                    jira_url='https://issues.apache.org/jira/browse/CASSANDRA-11249',
@@ -474,7 +475,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.pagecount(), 4)
         self.assertEqual(pf.num_results_all(), [3000, 3000, 3000, 1000])
 
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     @known_failure(failure_source='test',
                    jira_url='https://issues.apache.org/jira/browse/CASSANDRA-11253',
@@ -516,7 +517,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
 
         self.assertEqual(pf.pagecount(), 2)
         self.assertEqual(pf.num_results_all(), [400, 200])
-        self.assertEqualIgnoreOrder(expected_data, pf.all_data())
+        self.assertEqualIgnoreOrder(expected_data, pf.view())
 
     def test_paging_with_in_orderby_and_two_partition_keys(self):
         session = self.prepare()
@@ -1702,7 +1703,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
 
         self.assertEqual(pf.pagecount(), 2)
         self.assertEqual(pf.num_results_all(), [400, 200])
-        self.assertEqualIgnoreOrder(expected_data, pf.all_data())
+        self.assertEqualIgnoreOrder(expected_data, pf.view())
 
     def static_columns_with_empty_non_static_columns_paging_test(self):
         """
@@ -2798,7 +2799,7 @@ class TestPagingDatasetChanges(BasePagingTester, PageAssertionMixin):
         self.assertEqual(pf.pagecount(), 2)
         self.assertEqual(pf.num_results_all(), [501, 499])
 
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_data_change_impacting_later_page(self):
         session = self.prepare()
@@ -2833,7 +2834,7 @@ class TestPagingDatasetChanges(BasePagingTester, PageAssertionMixin):
 
         # add the new row to the expected data and then do a compare
         expected_data.append({u'id': 2, u'mytext': u'foo'})
-        self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+        self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_row_TTL_expiry_during_paging(self):
         session = self.prepare()
@@ -3054,17 +3055,17 @@ class TestPagingQueryIsolation(BasePagingTester, PageAssertionMixin):
         self.assertEqual(page_fetchers[9].pagecount(), 4)
         self.assertEqual(page_fetchers[10].pagecount(), 34)
 
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[0].all_data()), flatten_into_set(expected_data[:5000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[1].all_data()), flatten_into_set(expected_data[5000:10000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[2].all_data()), flatten_into_set(expected_data[10000:15000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[3].all_data()), flatten_into_set(expected_data[15000:20000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[4].all_data()), flatten_into_set(expected_data[20000:25000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[5].all_data()), flatten_into_set(expected_data[:5000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[6].all_data()), flatten_into_set(expected_data[5000:10000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[7].all_data()), flatten_into_set(expected_data[10000:15000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[8].all_data()), flatten_into_set(expected_data[15000:20000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[9].all_data()), flatten_into_set(expected_data[20000:25000]))
-        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[10].all_data()), flatten_into_set(expected_data[:50000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[0].view()), flatten_into_set(expected_data[:5000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[1].view()), flatten_into_set(expected_data[5000:10000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[2].view()), flatten_into_set(expected_data[10000:15000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[3].view()), flatten_into_set(expected_data[15000:20000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[4].view()), flatten_into_set(expected_data[20000:25000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[5].view()), flatten_into_set(expected_data[:5000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[6].view()), flatten_into_set(expected_data[5000:10000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[7].view()), flatten_into_set(expected_data[10000:15000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[8].view()), flatten_into_set(expected_data[15000:20000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[9].view()), flatten_into_set(expected_data[20000:25000]))
+        self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[10].view()), flatten_into_set(expected_data[:50000]))
 
 
 @since('2.0')
@@ -3104,6 +3105,7 @@ class TestPagingWithDeletions(BasePagingTester, PageAssertionMixin):
 
         pf = self.get_page_fetcher()
         pf.request_all()
+        # the tests change the rows returned, so copy them out of the pages
         return pf.all_data()
 
     def get_page_fetcher(self):
@@ -0,0 +1,42 @@
+import json
+
+from nose import plugins
+
+
+class DtestCollectPlugin(plugins.Plugin):
+    """
+    Record the address of every test nose would run, so a runner can split
+    them between several worker processes.
+
+    Meant to be used alongside nose's own --collect-only option, which turns
+    every test into a no-op; this plugin just writes down what was seen.
+    """
+    enabled = True  # if this plugin is loaded at all, we're using it
+    name = 'dtest_collect'
+
+    def __init__(self, output_file=None):
+        """
+        @param output_file path of the file the collected test addresses will
+                           be written to, as a JSON list of
+                           [module, callable] pairs. The callable is None for
+                           nose's Failure entries, which stand for a module
+                           that failed to import.
+        """
+        super(DtestCollectPlugin, self).__init__()
+        self.output_file = output_file
+        self.collected = []
+
+    def configure(self, options, conf):
+        pass
+
+    def startTest(self, test):
+        # Failure entries have no callable, and no address at all for names
+        # that don't resolve to anything a worker could run
+        filename, module, call = test.address() or (None, None, None)
+        if module or filename:
+            self.collected.append([module or filename, call])
+
+    def finalize(self, result):
+        if self.output_file is not None:
+            with open(self.output_file, 'w') as f:
+                json.dump(self.collected, f)
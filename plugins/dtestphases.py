@@ -0,0 +1,180 @@
+import csv
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from inspect import isclass
+from unittest import TestCase
+
+from monotonic import monotonic as _clock
+from nose import plugins
+
+# The PhaseTimings of the test that is running, set while DtestPhasesPlugin
+# is enabled. Like dtestconfig._CONFIG, this is module state so that test
+# framework code can reach it without access to the plugin.
+_CURRENT = None
+
+
+class PhaseTimings(object):
+    """
+    The time spent in each named phase of a single test, in seconds. A phase
+    entered several times accumulates.
+    """
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.thread = threading.current_thread()
+        self.phases = OrderedDict()
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Time the enclosed block as the phase name of the running test. Does
+    nothing unless the phase timing plugin is enabled, and ignores blocks run
+    by threads other than the test's own, such as the one preparing a spare
+    cluster.
+    """
+    timings = _CURRENT
+    if timings is None or threading.current_thread() is not timings.thread:
+        yield
+        return
+    start = _clock()
+    try:
+        yield
+    finally:
+        timings.add(name, _clock() - start)
+
+
+def _timed_method(name, method):
+    def timed(*args, **kwargs):
+        with timed_phase(name):
+            return method(*args, **kwargs)
+    return timed
+
+
+class DtestPhasesPlugin(plugins.Plugin):
+    """
+    Record how long each phase of every test takes, and report the slowest
+    ones at the end of the run.
+
+    setUp, tearDown and the whole test are timed here; dtest.py marks the
+    phases within them (cluster creation and start, log scanning, copying
+    logs, cleanup) with timed_phase. Phases nest, so a cluster started in
+    setUp counts towards both 'cluster_start' and 'setUp'. 'test' is the time
+    left for the test method itself.
+
+    The setUpClass of each test class, where a ReusableClusterTester builds
+    its cluster, is recorded as an entry of its own, named after the class,
+    with a 'setUpClass' phase. tearDownClass isn't timed, as nose has no hook
+    between the last test of a class and its class teardown.
+    """
+    name = 'phase-timings'
+
+    def __init__(self):
+        super(DtestPhasesPlugin, self).__init__()
+        self.results = []
+        self._start = None
+
+    def options(self, parser, env):
+        super(DtestPhasesPlugin, self).options(parser, env)
+        parser.add_option('--phase-timings-file', action='store', dest='phase_timings_file',
+                          default=env.get('NOSE_PHASE_TIMINGS_FILE', 'phase_timings.json'),
+                          metavar='FILE',
+                          help='Path to write the per-test phase timings to, as CSV if FILE '
+                          'ends in .csv and as JSON otherwise. [NOSE_PHASE_TIMINGS_FILE]')
+        parser.add_option('--phase-timings-report', action='store', dest='phase_timings_report',
+                          type='int', default=10, metavar='N',
+                          help='Number of slowest test phases to list at the end of the run.')
+
+    def configure(self, options, conf):
+        super(DtestPhasesPlugin, self).configure(options, conf)
+        if self.enabled:
+            self.output_file = options.phase_timings_file
+            self.report_size = options.phase_timings_report
+
+    def startContext(self, context):
+        global _CURRENT
+        if isclass(context):
+            _CURRENT = PhaseTimings('{}.{}'.format(context.__module__, context.__name__))
+            self._start = _clock()
+
+    def stopContext(self, context):
+        # a class whose setUpClass failed has no tests started
+        self._stop_class_setup()
+
+    def _stop_class_setup(self):
+        global _CURRENT
+        timings, _CURRENT = _CURRENT, None
+        if timings is None:
+            return
+        timings.phases['setUpClass'] = timings.phases['total'] = _clock() - self._start
+        self.results.append(timings)
+
+    def startTest(self, test):
+        global _CURRENT
+        self._stop_class_setup()
+        _CURRENT = PhaseTimings(test.id())
+        case = getattr(test, 'test', None)
+        if isinstance(case, TestCase):
+            # instance attributes shadow the methods unittest is about to call
+            case.setUp = _timed_method('setUp', case.setUp)
+            case.tearDown = _timed_method('tearDown', case.tearDown)
+        self._start = _clock()
+
+    def stopTest(self, test):
+        global _CURRENT
+        timings, _CURRENT = _CURRENT, None
+        if timings is None:
+            return
+        total = _clock() - self._start
+        timings.phases['test'] = total - timings.phases.get('setUp', 0) - timings.phases.get('tearDown', 0)
+        timings.phases['total'] = total
+        self.results.append(timings)
+
+    def slowest_phases(self, count):
+        """
+        Return the count slowest (seconds, test id, phase) of any test, leaving
+        out the 'total' of each test.
+        """
+        timed = [(seconds, timings.test_id, phase)
+                 for timings in self.results for phase, seconds in timings.phases.items() if phase != 'total']
+        return sorted(timed, reverse=True)[:count]
+
+    def phase_totals(self):
+        """
+        Return (seconds, phase) summed over all tests, slowest first.
+        """
+        totals = defaultdict(float)
+        for timings in self.results:
+            for phase, seconds in timings.phases.items():
+                totals[phase] += seconds
+        return sorted(((seconds, phase) for phase, seconds in totals.items()), reverse=True)
+
+    def write(self, path):
+        if path.endswith('.csv'):
+            with open(path, 'wb') as f:
+                writer = csv.writer(f)
+                writer.writerow(['test', 'phase', 'seconds'])
+                for timings in self.results:
+                    for phase, seconds in timings.phases.items():
+                        writer.writerow([timings.test_id, phase, '{:.3f}'.format(seconds)])
+        else:
+            with open(path, 'w') as f:
+                json.dump([OrderedDict([('test', timings.test_id), ('phases', timings.phases)]) for timings in self.results],
+                          f, indent=2)
+
+    def report(self, stream):
+        if not self.results:
+            return
+        self.write(self.output_file)
+        stream.writeln('Time spent per phase, over all tests:')
+        for seconds, phase in self.phase_totals():
+            stream.writeln('  {:10.2f}s  {}'.format(seconds, phase))
+        stream.writeln('Slowest test phases:')
+        for seconds, test_id, phase in self.slowest_phases(self.report_size):
+            stream.writeln('  {:10.2f}s  {} {}'.format(seconds, phase, test_id))
+        stream.writeln('Phase timings written to {}'.format(self.output_file))
@@ -8,10 +8,12 @@ from dtest import Tester
 from tools.data import (create_c1c2_table, insert_c1c2, insert_columns, putget,
                         query_c1c2, query_columns, range_putget)
 from tools.decorators import known_failure, no_vnodes
-from tools.misc import ImmutableMapping, retry_till_success
+from tools.misc import ImmutableMapping
+from tools.retry import retry_till_success
 
 
 class TestPutGet(Tester):
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
     cluster_options = ImmutableMapping({'start_rpc': 'true'})
 
     def putget_test(self):
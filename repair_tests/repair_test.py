@@ -12,6 +12,7 @@ from nose.plugins.attrib import attr
 from dtest import CASSANDRA_VERSION_FROM_BUILD, FlakyRetryPolicy, Tester, debug
 from tools.data import insert_c1c2, query_c1c2
 from tools.decorators import known_failure, no_vnodes, since
+from tools.token_scan import assert_scanned_row_count
 
 
 def _repair_options(version, ks='', cf=None, sequential=True):
@@ -67,8 +68,7 @@ class BaseRepairTest(Tester):
                 node.stop(wait_other_notice=True)
 
         session = self.patient_exclusive_cql_connection(node_to_check, 'ks')
-        result = list(session.execute("SELECT * FROM cf LIMIT {}".format(rows * 2)))
-        self.assertEqual(len(result), rows)
+        assert_scanned_row_count(session, 'ks.cf', rows)
 
         for k in found:
             query_c1c2(session, k, ConsistencyLevel.ONE)
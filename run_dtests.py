@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """
 Usage: run_dtests.py [--nose-options NOSE_OPTIONS] [TESTS...] [--vnodes VNODES_OPTIONS...]
-                 [--runner-debug | --runner-quiet] [--dry-run]
+                 [--runner-debug | --runner-quiet] [--dry-run] [--workers WORKERS]
 
 nosetests options:
     --nose-options NOSE_OPTIONS  specify options to pass to `nosetests`.
@@ -15,15 +15,39 @@ cluster configuration options:
     --vnodes VNODES_OPTIONS...   specify whether to run with or without vnodes.
                                  valid values: 'true' and 'false'
 
+parallelism options:
+    --workers WORKERS            split the collected tests between WORKERS
+                                 nosetests processes run at the same time.
+                                 Worker N puts its nodes on 127.0.N.x and
+                                 shifts its JMX ports by N, so the loopback
+                                 addresses must be usable (always true on
+                                 Linux; needs aliases on OS X). Each worker's
+                                 output goes to logs/workers/, and their
+                                 xunit reports are merged into nosetests.xml.
+                                 At most 50 workers are allowed; blocks from
+                                 127.0.50.x up are kept for spare clusters.
+
 example:
     The following command will execute nosetests with the '-v' (verbose) option, vnodes disabled, and run a single test:
     ./run_dtests.py --nose-options -v --vnodes false repair_tests/repair_test.py:TestRepair.token_range_repair_test_with_cf
 
+    The following command will run the whole suite with vnodes enabled, eight clusters at a time:
+    ./run_dtests.py --vnodes true --workers 8
+
+    The following command will run the repair tests and report how long setUp, cluster start, log checks,
+    cleanup and so on took in each of them, writing the timings to phase_timings.json:
+    ./run_dtests.py --nose-options --with-phase-timings repair_tests
+
 """
 from __future__ import print_function
 
+import json
+import os
+import shutil
 import subprocess
-from collections import namedtuple
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, namedtuple
 from itertools import product
 from os import getcwd
 from tempfile import NamedTemporaryFile
@@ -163,9 +187,215 @@ def product_of_values(d):
     return tuple(dict(result) for result in product(*tuple_list))
 
 
+# Worker N uses the 127.0.N.x block and a port offset of N, and keeps its
+# spare clusters on 127.0.(N + MAX_WORKERS).x with an offset of N + MAX_WORKERS,
+# so no two workers' blocks overlap as long as 2 * MAX_WORKERS <= 256.
+MAX_WORKERS = 50
+
+
+def _validate_workers(workers_value):
+    """
+    Validate the value received for the --workers option. Returns a
+    ValidationResult whose 'serialized' value is the worker count as an int,
+    or 1 if the option wasn't given.
+    """
+    if workers_value is None:
+        return ValidationResult(serialized=1)
+    try:
+        workers = int(workers_value)
+    except ValueError:
+        workers = 0
+    if not 1 <= workers <= MAX_WORKERS:
+        return ValidationResult(error_messages=['{} not a valid value for --workers option. '
+                                                'valid values are integers from 1 to {}'.format(workers_value, MAX_WORKERS)])
+    return ValidationResult(serialized=workers)
+
+
+def write_nose_script(to_execute, debug):
+    """
+    Write the python source to_execute to a temporary file in the current
+    directory and return the open file object; the file is deleted when the
+    object is closed or garbage-collected.
+    """
+    temp = NamedTemporaryFile(dir=getcwd())
+    debug('Writing the following to {}:'.format(temp.name))
+
+    debug('```\n{to_execute}```\n'.format(to_execute=to_execute))
+    temp.write(to_execute)
+    temp.flush()
+    return temp
+
+
+def collect_tests(config, nose_argv, debug):
+    """
+    Run nosetests in --collect-only mode with the given config and arguments,
+    and return the address of every test it would run, as a list of
+    (module, callable) tuples in collection order.
+    """
+    collected_file = NamedTemporaryFile(dir=getcwd(), suffix='.json')
+    to_execute = (
+        'import nose\n'
+        'from plugins.dtestcollect import DtestCollectPlugin\n'
+        'from plugins.dtestconfig import DtestConfigPlugin, GlobalConfigObject\n'
+        'nose.main(addplugins=[DtestConfigPlugin({config}), DtestCollectPlugin({collected_file})])\n'
+    ).format(config=repr(config), collected_file=repr(collected_file.name))
+    temp = write_nose_script(to_execute, debug)
+
+    cmd_list = ['python', temp.name, '--collect-only'] + nose_argv
+    debug('subprocess.check_call-ing {cmd_list}'.format(cmd_list=cmd_list))
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(cmd_list, stdout=devnull, stderr=devnull)
+
+    with open(collected_file.name) as f:
+        return [tuple(address) for address in json.load(f)]
+
+
+def shard_tests(addresses, worker_count):
+    """
+    Split a list of (module, callable) test addresses into worker_count lists
+    of nose test names.
+
+    Tests are assigned a whole class at a time, so that class-level fixtures
+    (and ReusableClusterTester clusters) are only set up in one worker. The
+    biggest classes are handed out first, each to the worker with the fewest
+    tests so far, which keeps the shards close to even.
+    """
+    groups = OrderedDict()
+    for module, call in addresses:
+        if call is None:
+            # a module that failed to import; running it again reports the error
+            names = groups.setdefault((module, None), [])
+            if module not in names:
+                names.append(module)
+            continue
+        # call is 'Class.method' for test methods and 'function' for test functions
+        groups.setdefault((module, call.split('.')[0]), []).append('{}:{}'.format(module, call))
+
+    shards = [[] for _ in range(worker_count)]
+    for names in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(names)
+    return [shard for shard in shards if shard]
+
+
+def worker_environment(worker_id, test_path_root):
+    """
+    Return the environment for the worker numbered worker_id. dtest.py reads
+    these variables to pick the worker's loopback address block and port
+    offset, those of its spare clusters, and the directory its test_paths are
+    created in.
+    """
+    env = os.environ.copy()
+    env.update({
+        'DTEST_WORKER_ID': str(worker_id),
+        'DTEST_IP_PREFIX': '127.0.{}.'.format(worker_id),
+        'DTEST_PORT_OFFSET': str(worker_id),
+        'DTEST_SPARE_IP_PREFIX': '127.0.{}.'.format(worker_id + MAX_WORKERS),
+        'DTEST_SPARE_PORT_OFFSET': str(worker_id + MAX_WORKERS),
+        'DTEST_TEST_PATH_ROOT': test_path_root,
+    })
+    return env
+
+
+def merge_xunit_reports(report_paths, output_path):
+    """
+    Merge the xunit xml reports written by each worker into a single report at
+    output_path. Returns a dict with the summed 'tests', 'errors', 'failures'
+    and 'skip' counts. Reports that don't exist (e.g. because a worker
+    crashed before writing one) are skipped.
+    """
+    counts = OrderedDict((attr, 0) for attr in ('tests', 'errors', 'failures', 'skip'))
+    merged = ET.Element('testsuite', name='nosetests')
+    for path in report_paths:
+        if not os.path.exists(path):
+            continue
+        suite = ET.parse(path).getroot()
+        for attr in counts:
+            counts[attr] += int(suite.get(attr, 0))
+        merged.extend(list(suite))
+
+    for attr, count in counts.items():
+        merged.set(attr, str(count))
+    ET.ElementTree(merged).write(output_path, encoding='UTF-8', xml_declaration=True)
+    return counts
+
+
+def run_workers(config, nose_option_list, test_list, worker_count, dry_run, debug, output):
+    """
+    Run the tests selected by nose_option_list and test_list under config,
+    split between worker_count nosetests processes running at the same time.
+    Returns the highest exit code of any worker.
+    """
+    addresses = collect_tests(config, nose_option_list + test_list, debug)
+    shards = shard_tests(addresses, worker_count)
+    output('Collected {} tests, split between {} workers'.format(len(addresses), len(shards)))
+
+    # the workers run their own test selection, so drop any test names and
+    # xunit options we were given and keep only the remaining nose options.
+    # Phase timings are likewise written to a file per worker.
+    worker_options = [arg for arg in nose_option_list
+                      if arg != '--with-xunit' and not arg.startswith('--xunit-file') and not arg.startswith('--phase-timings-file')]
+    time_phases = '--with-phase-timings' in nose_option_list
+    merged_report = next((arg.split('=', 1)[1] for arg in nose_option_list if arg.startswith('--xunit-file=')),
+                         'nosetests.xml')
+
+    log_dir = os.path.join('logs', 'workers')
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    to_execute = (
+        'import nose\n'
+        'from plugins.dtestconfig import DtestConfigPlugin, GlobalConfigObject\n'
+        'from plugins.dtestphases import DtestPhasesPlugin\n'
+        'nose.main(addplugins=[DtestConfigPlugin({config}), DtestPhasesPlugin()])\n'
+    ).format(config=repr(config))
+    temp = write_nose_script(to_execute, debug)
+
+    processes, report_paths, test_path_roots = [], [], []
+    for worker_id, shard in enumerate(shards):
+        report_path = os.path.join(log_dir, 'worker{}.xml'.format(worker_id))
+        log_path = os.path.join(log_dir, 'worker{}.log'.format(worker_id))
+        report_paths.append(report_path)
+        report_options = ['--with-xunit', '--xunit-file={}'.format(report_path)]
+        if time_phases:
+            report_options.append('--phase-timings-file={}'.format(os.path.join(log_dir, 'worker{}-phases.json'.format(worker_id))))
+        cmd_list = ['python', temp.name] + worker_options + report_options + shard
+
+        if dry_run:
+            print('Worker {} would run the following command with {} tests:\n\t{}'.format(worker_id, len(shard), cmd_list))
+            continue
+
+        debug('subprocess.Popen-ing {cmd_list}'.format(cmd_list=cmd_list))
+        output('Starting worker {} with {} tests, logging to {}'.format(worker_id, len(shard), log_path))
+        log_file = open(log_path, 'w')
+        test_path_roots.append(tempfile.mkdtemp(prefix='dtest-worker{}-'.format(worker_id)))
+        env = worker_environment(worker_id, test_path_roots[-1])
+        processes.append((subprocess.Popen(cmd_list, stdout=log_file, stderr=subprocess.STDOUT, env=env), log_file))
+
+    returncodes = []
+    for process, log_file in processes:
+        returncodes.append(process.wait())
+        log_file.close()
+
+    if processes:
+        counts = merge_xunit_reports(report_paths, merged_report)
+        output('Ran {tests} tests in {workers} workers: {errors} errors, {failures} failures, {skip} skipped. '
+               'Merged xunit report written to {report}'.format(workers=len(processes), report=merged_report, **counts))
+
+    # the workers remove their test directories, unless asked to keep them or killed first
+    if os.environ.get('KEEP_TEST_DIR', '').lower() not in ('yes', 'true'):
+        for test_path_root in test_path_roots:
+            shutil.rmtree(test_path_root, ignore_errors=True)
+
+    return max(returncodes) if returncodes else 0
+
+
 if __name__ == '__main__':
     options = docopt(__doc__)
     validated_options = validate_and_serialize_options(options)
+    workers = _validate_workers(options['--workers'])
+    if workers.error_messages:
+        raise ValueError('Validation error:\n{}'.format('\t\n'.join(list(workers.error_messages))))
+    worker_count = workers.serialized
 
     nose_options = options['--nose-options'] or ''
     nose_option_list = nose_options.split()
@@ -198,6 +428,11 @@ if __name__ == '__main__':
 
         output('Running dtests with config object {}'.format(config))
 
+        if worker_count > 1:
+            results.append(run_workers(config, nose_option_list, test_list, worker_count, options['--dry-run'], debug, output))
+            print()
+            continue
+
         # Generate a file that runs nose, passing in config as the
         # configuration object.
         #
@@ -214,14 +449,10 @@ if __name__ == '__main__':
         to_execute = (
             'import nose\n'
             'from plugins.dtestconfig import DtestConfigPlugin, GlobalConfigObject\n'
-            'nose.main(addplugins=[DtestConfigPlugin({config})])\n'
+            'from plugins.dtestphases import DtestPhasesPlugin\n'
+            'nose.main(addplugins=[DtestConfigPlugin({config}), DtestPhasesPlugin()])\n'
         ).format(config=repr(config))
-        temp = NamedTemporaryFile(dir=getcwd())
-        debug('Writing the following to {}:'.format(temp.name))
-
-        debug('```\n{to_execute}```\n'.format(to_execute=to_execute))
-        temp.write(to_execute)
-        temp.flush()
+        temp = write_nose_script(to_execute, debug)
 
         # We pass nose_argv as options to the python call to maintain
         # compatibility with the nosetests command. Arguments passed in via the
@@ -9,7 +9,7 @@ from thrift.Thrift import TApplicationException
 from thrift.transport import TSocket, TTransport
 
 from dtest import (CASSANDRA_VERSION_FROM_BUILD, DISABLE_VNODES, NUM_TOKENS,
-                   ReusableClusterTester, debug, init_default_config)
+                   ReusableClusterTester, debug)
 from thrift_bindings.v22 import Cassandra
 from thrift_bindings.v22.Cassandra import (CfDef, Column, ColumnDef,
                                            ColumnOrSuperColumn, ColumnParent,
@@ -43,7 +43,6 @@ def pid():
 
 
 class ThriftTester(ReusableClusterTester):
-    client = None
     extra_args = []
     cluster_options = {'partitioner': 'org.apache.cassandra.dht.ByteOrderedPartitioner',
                        'start_rpc': 'true'}
@@ -58,7 +57,7 @@ class ThriftTester(ReusableClusterTester):
 
         # this is ugly, but the whole test module is written against a global client
         global client
-        client = get_thrift_client()
+        client = get_thrift_client(self.cluster.nodelist()[0].address())
         client.transport.open()
 
     def tearDown(self):
@@ -66,8 +65,7 @@ class ThriftTester(ReusableClusterTester):
         ReusableClusterTester.tearDown(self)
 
     @classmethod
-    def post_initialize_cluster(cls):
-        cluster = cls.cluster
+    def prepare_cluster(cls, cluster):
         cluster.populate(1)
         node1, = cluster.nodelist()
 
@@ -79,18 +77,17 @@ class ThriftTester(ReusableClusterTester):
             node1.set_configuration_options(values={'initial_token': "a".encode('hex')})
 
         cluster.start(wait_for_binary_proto=True)
-        cluster.nodelist()[0].watch_log_for("Listening for thrift clients")  # Wait for the thrift port to open
+        node1.watch_log_for("Listening for thrift clients")  # Wait for the thrift port to open
         time.sleep(0.1)
-        cls.client = get_thrift_client()
-        cls.client.transport.open()
-        cls.define_schema()
-
-    @classmethod
-    def init_config(cls):
-        init_default_config(cls.cluster, ThriftTester.cluster_options)
+        schema_client = get_thrift_client(node1.address())
+        schema_client.transport.open()
+        try:
+            cls.define_schema(schema_client)
+        finally:
+            schema_client.transport.close()
 
     @classmethod
-    def define_schema(cls):
+    def define_schema(cls, schema_client):
         keyspace1 = Cassandra.KsDef('Keyspace1', 'org.apache.cassandra.locator.SimpleStrategy', {'replication_factor': '1'},
                                     cf_defs=[
             Cassandra.CfDef('Keyspace1', 'Standard1'),
@@ -120,7 +117,7 @@ class ThriftTester(ReusableClusterTester):
                                         Cassandra.CfDef('Keyspace2', 'Super4', column_type='Super', subcomparator_type='TimeUUIDType'), ])
 
         for ks in [keyspace1, keyspace2]:
-            cls.client.system_add_keyspace(ks)
+            schema_client.system_add_keyspace(ks)
 
 
 def i64(n):
@@ -1549,7 +1546,7 @@ class TestMutations(ThriftTester):
         assert client.describe_cluster_name() == 'test'
 
     def test_describe_ring(self):
-        assert list(client.describe_ring('Keyspace1'))[0].endpoints == ['127.0.0.1']
+        assert list(client.describe_ring('Keyspace1'))[0].endpoints == [self.cluster.nodelist()[0].address()]
 
     def test_describe_token_map(self):
         # test/conf/cassandra.yaml specifies org.apache.cassandra.dht.ByteOrderedPartitioner
@@ -1563,7 +1560,7 @@ class TestMutations(ThriftTester):
         token, node = ring[0]
         if not DISABLE_VNODES:
             assert re.match("[0-9A-Fa-f]{32}", token)
-        assert node == '127.0.0.1'
+        assert node == self.cluster.nodelist()[0].address()
 
     def test_describe_partitioner(self):
         # Make sure this just reads back the values from the config.
@@ -1,10 +1,12 @@
 
 import re
+from collections import Counter, Mapping, Set
 from time import sleep
 
 from cassandra import (InvalidRequest, ReadFailure, ReadTimeout, Unauthorized,
                        Unavailable, WriteFailure, WriteTimeout)
 from cassandra.query import SimpleStatement
+from cassandra.util import SortedSet
 from nose.tools import (assert_equal, assert_false, assert_regexp_matches,
                         assert_true)
 
@@ -47,6 +49,119 @@ def _rows_to_list(rows):
     return new_list
 
 
+def row_key(row):
+    """
+    Return a hashable value standing for row, equal for rows that compare
+    equal: lists and tuples become tuples, and maps and sets become frozensets,
+    so their order doesn't matter. Values that can't be hashed are replaced by
+    their repr.
+
+    Sets that aren't a collections.Set, like the driver's SortedSet, hash by
+    identity, so any iterable with the set methods counts as a set.
+    """
+    if isinstance(row, (list, tuple)):
+        return tuple(row_key(value) for value in row)
+    if isinstance(row, Mapping):
+        return frozenset((row_key(k), row_key(v)) for k, v in row.items())
+    if isinstance(row, (Set, SortedSet)) or (hasattr(row, '__iter__') and hasattr(row, 'issubset')):
+        return frozenset(row_key(value) for value in row)
+    try:
+        hash(row)
+    except TypeError:
+        return repr(row)
+    return row
+
+
+# row digests are summed modulo this, so the sum doesn't depend on row order
+DIGEST_MODULUS = 2 ** 64
+
+
+def row_digest(row, key=row_key):
+    """
+    Return the digest of a single row, the hash of key(row). Summed modulo
+    DIGEST_MODULUS, the digests of some rows make a digest of them all that
+    doesn't depend on their order.
+    """
+    return hash(key(row)) % DIGEST_MODULUS
+
+
+def multiset_digest(rows, key=row_key):
+    """
+    Return (number of rows, digest) for an iterable of rows. Two iterables
+    holding the same rows, in any order and with the same repetitions, have
+    the same count and digest. Each row is only looked at once, so this runs
+    in linear time and constant memory.
+    @param rows Rows to digest
+    @param key Optional function returning a hashable value that stands for a row. Default row_key
+    """
+    count, digest = 0, 0
+    for row in rows:
+        count += 1
+        digest = (digest + row_digest(row, key)) % DIGEST_MODULUS
+    return count, digest
+
+
+def multiset_difference(actual, expected):
+    """
+    Compare two iterables of rows as multisets, in one pass over each.
+    @param actual Rows received
+    @param expected Rows that should have been received
+    @return (missing, extra, actual count, expected count), where missing and
+    extra are lists of (row, times) for the rows expected more often than
+    received and the other way round.
+    """
+    counts = Counter()
+    examples = {}
+    expected_count = 0
+    for row in expected:
+        key = row_key(row)
+        counts[key] += 1
+        examples.setdefault(key, row)
+        expected_count += 1
+    actual_count = 0
+    for row in actual:
+        key = row_key(row)
+        counts[key] -= 1
+        examples.setdefault(key, row)
+        actual_count += 1
+    missing = [(examples[k], n) for k, n in counts.items() if n > 0]
+    extra = [(examples[k], -n) for k, n in counts.items() if n < 0]
+    return missing, extra, actual_count, expected_count
+
+
+def _describe_rows(title, rows, max_shown):
+    lines = ['{} ({} distinct, showing at most {}):'.format(title, len(rows), max_shown)]
+    for row, times in rows[:max_shown]:
+        lines.append('    {!r}{}'.format(row, ' (x{})'.format(times) if times > 1 else ''))
+    return lines
+
+
+def assert_items_equal_ignore_order(actual, expected, message=None, max_shown=10):
+    """
+    Assert two iterables hold the same rows, each the same number of times, in
+    any order. Rows are hashed rather than sorted, so this is linear in the
+    number of rows, and at most max_shown missing and extra rows are listed on
+    failure.
+    @param actual Rows received
+    @param expected Rows that should have been received
+    @param message Optional first line of the failure message
+    @param max_shown Optional number of missing and extra rows to list. Default 10
+
+    Examples:
+    assert_items_equal_ignore_order(rows_to_list(session.execute(query)), [[1, 'a'], [2, 'b']])
+    """
+    missing, extra, actual_count, expected_count = multiset_difference(actual, expected)
+    if not missing and not extra:
+        return
+    lines = [message] if message else []
+    lines.append('Expected {} rows, got {}.'.format(expected_count, actual_count))
+    if missing:
+        lines.extend(_describe_rows('Missing rows', missing, max_shown))
+    if extra:
+        lines.extend(_describe_rows('Unexpected rows', extra, max_shown))
+    raise AssertionError('\n'.join(lines))
+
+
 def _assert_exception(fun, *args, **kwargs):
     matching = kwargs.pop('matching', None)
     expected = kwargs['expected']
@@ -164,8 +279,8 @@ def assert_all(session, query, expected, cl=None, ignore_order=False):
     res = session.execute(simple_query)
     list_res = _rows_to_list(res)
     if ignore_order:
-        expected = sorted(expected)
-        list_res = sorted(list_res)
+        assert_items_equal_ignore_order(list_res, expected, message="Unexpected results from {}".format(query))
+        return
     assert list_res == expected, "Expected {} from {}, but got {}".format(expected, query, list_res)
 
 
@@ -0,0 +1,146 @@
+"""
+Helpers for caching the on-disk state of a freshly bootstrapped ccm cluster,
+so later tests with an identical cluster can start from a copy of it instead
+of bootstrapping from scratch.
+
+An image holds each node's data, commitlog, hints and saved caches
+directories, and is stored under a directory named after a hash of
+everything that influences what a fresh node writes to disk: the Cassandra
+install and build, the cluster name, the node names, addresses, tokens and
+install directories, the cluster's and each node's configuration options,
+and the JVM arguments the cluster is started with. ccm regenerates each
+node's conf directory from the same options, so conf isn't part of the
+image. Files are copied both into and out of an image, never hardlinked, so
+a test that modifies an SSTable in place can't alter the image. An image can also be taken
+once a schema has been created, as the upgrade tests do for their baseline
+keyspace, in which case the key includes a description of that schema.
+"""
+import errno
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from tools.probe_cache import file_state, git_head_state
+
+COPIED_DIRECTORIES = ('commitlogs', 'hints', 'saved_caches')
+
+
+def _image_directories(node):
+    return [os.path.basename(d) for d in node.data_directories()] + list(COPIED_DIRECTORIES)
+
+
+def build_state(install_dir):
+    """
+    Return what identifies the build of the Cassandra at install_dir: the
+    commit checked out, if it is a git checkout, and the modification times
+    of its jars and compiled classes, which change whenever it is rebuilt.
+    """
+    jars = sorted(glob.glob(os.path.join(install_dir, 'build', '*.jar')) +
+                  glob.glob(os.path.join(install_dir, 'lib', 'apache-cassandra*.jar')))
+    return [git_head_state(install_dir),
+            [(os.path.basename(jar), file_state(jar)) for jar in jars],
+            file_state(os.path.join(install_dir, 'build', 'classes', 'main'))]
+
+
+def image_key(cluster, schema=None, jvm_args=None):
+    """
+    Return a string uniquely identifying the on-disk state a fresh start of
+    this (populated, never started) cluster would produce. If the image is
+    taken after creating a schema, schema must describe it, so images with
+    and without it, or with different schemas, don't share a key.
+    jvm_args are the JVM arguments the cluster is started with.
+    """
+    install_dirs = sorted(set([cluster.get_install_dir()] + [node.get_install_dir() for node in cluster.nodelist()]))
+    description = {
+        'version': str(cluster.version()),
+        'name': cluster.name,
+        'install_dir': cluster.get_install_dir(),
+        'builds': [(install_dir, build_state(install_dir)) for install_dir in install_dirs],
+        'partitioner': cluster.partitioner,
+        'use_vnodes': cluster.use_vnodes,
+        'data_dir_count': cluster.data_dir_count,
+        'config_options': cluster._config_options,
+        # ccm keeps each node's own options in a private attribute
+        'nodes': [(node.name, node.network_interfaces['storage'], node.data_center, node.initial_token,
+                   node.get_install_dir(), getattr(node, '_Node__config_options', {}))
+                  for node in cluster.nodelist()],
+        'jvm_args': jvm_args or [],
+    }
+    if schema is not None:
+        description['schema'] = schema
+    return hashlib.sha1(json.dumps(description, sort_keys=True, default=str)).hexdigest()
+
+
+def is_pristine(cluster):
+    """
+    Return True if the cluster has been populated but none of its nodes has
+    ever been started, i.e. no node has written any data or commitlog yet.
+    """
+    if not cluster.nodelist():
+        return False
+    for node in cluster.nodelist():
+        if node.is_running():
+            return False
+        for name in _image_directories(node):
+            path = os.path.join(node.get_path(), name)
+            if os.path.isdir(path) and os.listdir(path):
+                return False
+    return True
+
+
+def _copy_tree(src, dst):
+    """
+    Recreate the directory tree at src under dst, copying its files.
+    """
+    for root, _, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        if not os.path.isdir(target_root):
+            os.makedirs(target_root)
+        for filename in files:
+            shutil.copy2(os.path.join(root, filename), os.path.join(target_root, filename))
+
+
+def restore_image(image_path, cluster):
+    """
+    Populate each (stopped, pristine) node of cluster with the directories
+    saved in the image at image_path.
+    """
+    for node in cluster.nodelist():
+        for name in _image_directories(node):
+            source = os.path.join(image_path, node.name, name)
+            if os.path.isdir(source):
+                _copy_tree(source, os.path.join(node.get_path(), name))
+
+
+def save_image(image_path, cluster):
+    """
+    Save the directories of each node of the (stopped) cluster as an image at
+    image_path. The image is written to a temporary directory and renamed into
+    place, so concurrent test processes never see a partial image; if another
+    process saved the same image first, theirs is kept.
+    """
+    image_root = os.path.dirname(image_path)
+    if not os.path.isdir(image_root):
+        try:
+            os.makedirs(image_root)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    staging_path = tempfile.mkdtemp(prefix='.staging-', dir=image_root)
+    try:
+        for node in cluster.nodelist():
+            for name in _image_directories(node):
+                source = os.path.join(node.get_path(), name)
+                if os.path.isdir(source):
+                    _copy_tree(source, os.path.join(staging_path, node.name, name))
+        os.rename(staging_path, image_path)
+    except OSError as e:
+        if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+    finally:
+        if os.path.exists(staging_path):
+            shutil.rmtree(staging_path)
@@ -1,11 +1,66 @@
-import time
+from itertools import groupby, islice
+from weakref import WeakKeyDictionary
 
 from cassandra import ConsistencyLevel
-from cassandra.concurrent import execute_concurrent_with_args
-from cassandra.query import SimpleStatement
+from cassandra.concurrent import (execute_concurrent,
+                                  execute_concurrent_with_args)
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
 from nose.tools import assert_equal, assert_true
 
 import assertions
+from metadata_wrapper import refresh_keyspace_metadata, refresh_table_metadata
+
+
+# the statements prepared by _prepare, per session
+_PREPARED = WeakKeyDictionary()
+
+
+def _prepare(session, query):
+    """
+    Prepare query on session, only once per session and keyspace, as the
+    tables of an unqualified query are those of the session's keyspace.
+    """
+    prepared = _PREPARED.setdefault(session, {})
+    key = (session.keyspace, query)
+    if key not in prepared:
+        prepared[key] = session.prepare(query)
+    return prepared[key]
+
+
+def execute_pipelined(session, statement, parameters, consistency=None, concurrency=100, batch_key=None, batch_size=100):
+    """
+    Execute statement once for each set of parameters, keeping up to
+    concurrency executions in flight rather than waiting for each in turn.
+    parameters is only read as fast as the statements complete, so it can be
+    a generator. Returns once all have succeeded, and raises the first error.
+    @param session Session to use
+    @param statement Prepared statement to execute
+    @param parameters Iterable of parameters to bind to statement
+    @param consistency Optional Consistency Level setting. Default that of statement
+    @param concurrency Optional maximum number of executions in flight. Default 100
+    @param batch_key Optional function returning the partition key of a set of parameters. If given,
+    consecutive sets of parameters with the same key are executed together in UNLOGGED batches
+    @param batch_size Optional maximum number of statements in a batch. Default 100
+    """
+    def bound_statements():
+        for params in parameters:
+            bound = statement.bind(params)
+            if consistency is not None:
+                bound.consistency_level = consistency
+            yield bound, ()
+
+    def batches():
+        cl = consistency if consistency is not None else statement.consistency_level
+        for _, partition in groupby(parameters, key=batch_key):
+            for chunk in iter(lambda: list(islice(partition, batch_size)), []):
+                batch = BatchStatement(BatchType.UNLOGGED, consistency_level=cl)
+                for params in chunk:
+                    batch.add(statement, params)
+                yield batch, ()
+
+    statements = bound_statements() if batch_key is None else batches()
+    for _ in execute_concurrent(session, statements, concurrency=concurrency, results_generator=True):
+        pass
 
 
 def create_c1c2_table(tester, session, read_repair=None):
@@ -36,11 +91,19 @@ def query_c1c2(session, key, consistency=ConsistencyLevel.QUORUM, tolerate_missi
         assertions.assert_length_equal(rows, 0)
 
 
-def insert_columns(tester, session, key, columns_count, consistency=ConsistencyLevel.QUORUM, offset=0):
-    upds = ["UPDATE cf SET v=\'value%d\' WHERE key=\'k%s\' AND c=\'c%06d\'" % (i, key, i) for i in xrange(offset * columns_count, columns_count * (offset + 1))]
-    query = 'BEGIN BATCH %s; APPLY BATCH' % '; '.join(upds)
-    simple_query = SimpleStatement(query, consistency_level=consistency)
-    session.execute(simple_query)
+def _update_key(params):
+    """
+    The partition key of a set of parameters of 'UPDATE cf SET v=? WHERE key=? AND c=?'.
+    """
+    return params[1]
+
+
+def insert_columns(tester, session, key, columns_count, consistency=ConsistencyLevel.QUORUM, offset=0, concurrency=100):
+    statement = _prepare(session, 'UPDATE cf SET v=? WHERE key=? AND c=?')
+    columns = xrange(offset * columns_count, columns_count * (offset + 1))
+    # all the columns go in one batch, so a read never sees only some of them
+    execute_pipelined(session, statement, (('value%d' % i, 'k%s' % key, 'c%06d' % i) for i in columns),
+                      consistency=consistency, concurrency=concurrency, batch_key=_update_key, batch_size=columns_count)
 
 
 def query_columns(tester, session, key, columns_count, consistency=ConsistencyLevel.QUORUM, offset=0):
@@ -71,25 +134,15 @@ def putget(cluster, session, cl=ConsistencyLevel.QUORUM):
     _validate_row(cluster, rows)
 
 
-def _put_with_overwrite(cluster, session, nb_keys, cl=ConsistencyLevel.QUORUM):
-    for k in xrange(0, nb_keys):
-        kvs = ["UPDATE cf SET v=\'value%d\' WHERE key=\'k%s\' AND c=\'c%02d\'" % (i, k, i) for i in xrange(0, 100)]
-        query = SimpleStatement('BEGIN BATCH %s APPLY BATCH' % '; '.join(kvs), consistency_level=cl)
-        session.execute(query)
-        time.sleep(.01)
-    cluster.flush()
-    for k in xrange(0, nb_keys):
-        kvs = ["UPDATE cf SET v=\'value%d\' WHERE key=\'k%s\' AND c=\'c%02d\'" % (i * 4, k, i * 2) for i in xrange(0, 50)]
-        query = SimpleStatement('BEGIN BATCH %s APPLY BATCH' % '; '.join(kvs), consistency_level=cl)
-        session.execute(query)
-        time.sleep(.01)
-    cluster.flush()
-    for k in xrange(0, nb_keys):
-        kvs = ["UPDATE cf SET v=\'value%d\' WHERE key=\'k%s\' AND c=\'c%02d\'" % (i * 20, k, i * 5) for i in xrange(0, 20)]
-        query = SimpleStatement('BEGIN BATCH %s APPLY BATCH' % '; '.join(kvs), consistency_level=cl)
-        session.execute(query)
-        time.sleep(.01)
-    cluster.flush()
+def _put_with_overwrite(cluster, session, nb_keys, cl=ConsistencyLevel.QUORUM, concurrency=100):
+    statement = _prepare(session, 'UPDATE cf SET v=? WHERE key=? AND c=?')
+    # each pass overwrites some of the columns of the one before, in a new sstable
+    for columns, value_factor, column_factor in ((100, 1, 1), (50, 4, 2), (20, 20, 5)):
+        execute_pipelined(session, statement,
+                          (('value%d' % (i * value_factor), 'k%s' % k, 'c%02d' % (i * column_factor))
+                           for k in xrange(0, nb_keys) for i in xrange(0, columns)),
+                          consistency=cl, concurrency=concurrency, batch_key=_update_key)
+        cluster.flush()
 
 
 def _validate_row(cluster, res):
@@ -110,19 +163,19 @@ def range_putget(cluster, session, cl=ConsistencyLevel.QUORUM):
 
     _put_with_overwrite(cluster, session, keys, cl)
 
-    paged_results = session.execute('SELECT * FROM cf LIMIT 10000000')
-    rows = [result for result in paged_results]
+    # rows are paged in, and checked a partition at a time
+    paged_results = session.execute(SimpleStatement('SELECT * FROM cf', fetch_size=1000))
+    partitions = 0
+    for _, res in groupby(paged_results, key=lambda row: row[0]):
+        _validate_row(cluster, list(res))
+        partitions += 1
 
-    assertions.assert_length_equal(rows, keys * 100)
-    for k in xrange(0, keys):
-        res = rows[:100]
-        del rows[:100]
-        _validate_row(cluster, res)
+    assert_equal(partitions, keys, 'Expected {} partitions, got {}'.format(keys, partitions))
 
 
 def get_keyspace_metadata(session, keyspace_name):
     cluster = session.cluster
-    cluster.refresh_keyspace_metadata(keyspace_name)
+    refresh_keyspace_metadata(cluster, keyspace_name)
     return cluster.metadata.keyspaces[keyspace_name]
 
 
@@ -134,7 +187,7 @@ def get_schema_metadata(session):
 
 def get_table_metadata(session, keyspace_name, table_name):
     cluster = session.cluster
-    cluster.refresh_table_metadata(keyspace_name, table_name)
+    refresh_table_metadata(cluster, keyspace_name, table_name)
     return cluster.metadata.keyspaces[keyspace_name].tables[table_name]
 
 
@@ -20,10 +20,21 @@ create_rows returns a data structure which represents what the data _should_ be
 It's meant to be used in tests when comparing expected to actual data, for validation.
 
 For more examples reference paging_test.py
+
+For data sets too big to keep in memory, bulk_load takes the same tables, or
+generated rows, and streams them into the table instead; it returns a
+LoadedData that checks the table's contents without holding the rows.
 """
 import re
+from itertools import chain
+
+from cassandra.concurrent import (execute_concurrent,
+                                  execute_concurrent_with_args)
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
 
-from cassandra.concurrent import execute_concurrent_with_args
+from tools.assertions import (DIGEST_MODULUS, assert_items_equal_ignore_order,
+                              multiset_digest, row_digest)
+from tools.metadata_wrapper import refresh_table_metadata
 
 
 def strip(val):
@@ -106,7 +117,11 @@ def row_describes_data(row):
     return False
 
 
-def parse_data_into_dicts(data, format_funcs=None):
+def iter_data_dicts(data, format_funcs=None):
+    """
+    Like parse_data_into_dicts, but yields the rows one at a time, so a row
+    with a multiplier like *1000000 doesn't have to fit in memory.
+    """
     # throw out leading/trailing space and pipes
     # so we can split on the data without getting
     # extra empty fields
@@ -118,15 +133,18 @@ def parse_data_into_dicts(data, format_funcs=None):
     # remove headers
     headers = parse_headers_into_list(rows.pop(0))
 
-    values = []
-
     for row in rows:
-        if row_has_multiplier(row):
-            values.extend(parse_row_into_dict(row, headers, format_funcs=format_funcs))
+        row_multiplier = get_row_multiplier(row)
+        if row_multiplier is None:
+            yield parse_row_into_dict(row, headers, format_funcs=format_funcs)
         else:
-            values.append(parse_row_into_dict(row, headers, format_funcs=format_funcs))
+            row = '|'.join(l.strip() for l in row.split('|')[1:])
+            for _ in xrange(row_multiplier):
+                yield parse_row_into_dict(row, headers, format_funcs=format_funcs)
 
-    return values
+
+def parse_data_into_dicts(data, format_funcs=None):
+    return list(iter_data_dicts(data, format_funcs=format_funcs))
 
 
 def create_rows(data, session, table_name, cl=None, format_funcs=None, prefix='', postfix=''):
@@ -164,6 +182,144 @@ def create_rows(data, session, table_name, cl=None, format_funcs=None, prefix=''
     return values
 
 
+class LoadedData(object):
+    """
+    What bulk_load wrote to a table: how many rows, and a digest of them that
+    doesn't depend on their order, so the table can be checked against them
+    without keeping the rows in memory.
+
+    Rows are compared as the driver reads them back, so the loaded values
+    should be of the types the driver returns (e.g. datetime rather than
+    an int for a timestamp column).
+    """
+
+    def __init__(self, table_name, columns, source=None):
+        self.table_name = table_name
+        self.columns = columns
+        self.count = 0
+        self.digest = 0
+        self._source = source
+
+    def add(self, values):
+        self.count += 1
+        self.digest = (self.digest + row_digest(values)) % DIGEST_MODULUS
+
+    def rows(self):
+        """
+        Iterate over the loaded rows again, as lists of values in the order of
+        self.columns. Only possible when bulk_load was given a function.
+        """
+        if self._source is None:
+            raise ValueError('The rows loaded into {} were not given as a function, so they cannot be read again'.format(self.table_name))
+        return ([row[c] for c in self.columns] for row in self._source())
+
+    def verify(self, session, cl=None, fetch_size=5000):
+        """
+        Assert the table holds exactly the loaded rows, paging through it with
+        session. If it doesn't, the missing and unexpected rows are listed when
+        the rows can be read again, and only the row counts otherwise.
+        @param session Session to read the table with
+        @param cl Optional Consistency Level setting. Default the session's
+        @param fetch_size Optional number of rows to fetch at a time. Default 5000
+        """
+        def table_rows():
+            # nothing was loaded when there are no columns, so any row is unexpected
+            statement = SimpleStatement('SELECT {} FROM {}'.format(', '.join(self.columns) or '*', self.table_name),
+                                        consistency_level=cl, fetch_size=fetch_size)
+            for row in session.execute(statement):
+                yield [row[c] for c in self.columns or row] if isinstance(row, dict) else list(row)
+
+        count, digest = multiset_digest(table_rows())
+        if (count, digest) == (self.count, self.digest):
+            return
+
+        message = 'The contents of {} do not match the {} rows loaded into it'.format(self.table_name, self.count)
+        if self._source is None:
+            raise AssertionError('{}: found {} rows'.format(message, count))
+        assert_items_equal_ignore_order(table_rows(), self.rows(), message=message)
+
+
+def _partition_key_columns(session, table_name):
+    ks_name, _, name = table_name.rpartition('.')
+    ks_name = ks_name or session.keyspace
+    refresh_table_metadata(session.cluster, ks_name, name)
+    return [column.name for column in session.cluster.metadata.keyspaces[ks_name].tables[name].partition_key]
+
+
+def _partition_batches(prepared, rows, loaded, key_columns, batch_size, cl):
+    """
+    Yield (UNLOGGED batch, no parameters) for execute_concurrent, putting
+    consecutive rows of the same partition in the same batch, and adding
+    each row to loaded as it is read.
+    """
+    batch, batch_key, batch_rows = None, None, 0
+    for row in rows:
+        values = [row[c] for c in loaded.columns]
+        loaded.add(values)
+        key = [row[c] for c in key_columns]
+        if batch is not None and (key != batch_key or batch_rows >= batch_size):
+            yield batch, ()
+            batch = None
+        if batch is None:
+            batch, batch_key, batch_rows = BatchStatement(BatchType.UNLOGGED, consistency_level=cl), key, 0
+        batch.add(prepared, values)
+        batch_rows += 1
+    if batch is not None:
+        yield batch, ()
+
+
+def bulk_load(session, table_name, rows, format_funcs=None, cl=None, batch_size=50, concurrency=100, partition_key=None):
+    """
+    Insert rows into table_name, reading them only as fast as they are
+    written, so generated data sets of any size can be loaded without
+    building them in memory first.
+
+    Consecutive rows of the same partition are written together in UNLOGGED
+    batches of at most batch_size rows, with at most concurrency batches in
+    flight at once.
+
+    @param session Session to use
+    @param table_name Table to insert into, optionally qualified by its keyspace
+    @param rows A table of data like create_rows takes, an iterable of dicts of
+    column name to value, or a function returning such an iterable. Only for a
+    function can LoadedData.verify list the rows that differ, so it must return
+    the same rows each time.
+    @param format_funcs Optional dictionary of {columnname: function} formatting values of a table of data
+    @param cl Optional Consistency Level setting. Default the session's
+    @param batch_size Optional maximum number of rows in a batch. Default 50
+    @param concurrency Optional maximum number of batches in flight. Default 100
+    @param partition_key Optional list of the table's partition key columns. Default read from the driver's metadata
+    @return a LoadedData for checking the table's contents
+
+    Examples:
+    loaded = bulk_load(session, 'ks.cf', lambda: ({'k': i % 1000, 'c': i, 'v': str(i)} for i in xrange(1000000)))
+    loaded.verify(session)
+    """
+    source = None
+    if isinstance(rows, basestring):
+        rows = iter_data_dicts(rows, format_funcs=format_funcs)
+    elif callable(rows):
+        source = rows
+        rows = source()
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return LoadedData(table_name, [], source=source)
+    loaded = LoadedData(table_name, list(first.keys()), source=source)
+
+    if partition_key is None:
+        partition_key = _partition_key_columns(session, table_name)
+    prepared = session.prepare("INSERT INTO {table} ({cols}) VALUES ({vals})".format(
+        table=table_name, cols=', '.join(loaded.columns), vals=', '.join('?' for _ in loaded.columns)))
+
+    batches = _partition_batches(prepared, chain([first], rows), loaded, partition_key, batch_size, cl)
+    for _ in execute_concurrent(session, batches, concurrency=concurrency, results_generator=True):
+        pass
+
+    return loaded
+
+
 def flatten_into_set(iterable):
     # use flatten() then convert to a set for set comparisons
     return set(flatten(iterable))
@@ -0,0 +1,127 @@
+"""
+Driver Clusters shared by the sessions a test opens with the same connection
+settings, see Tester._create_session.
+
+A test's sessions on a shared Cluster each get their own session.cluster,
+which behaves like the driver Cluster except that shutting it down only shuts
+down that session, and the Cluster once its last session is shut down. Tests
+written for a Cluster per session, which shut down session.cluster when done
+with a session, keep working without closing the Cluster under the test's
+other sessions.
+
+Settings, like a registered user type or a changed attribute, still belong
+to the Cluster, so they apply to every session on it. A Cluster whose
+settings have been changed through a session is no longer handed out to new
+sessions, but the sessions already on it see the change.
+"""
+import threading
+
+# driver Cluster methods that change the Cluster's settings
+_SETTINGS_METHODS = frozenset(['add_execution_profile', 'register_listener', 'register_user_type',
+                               'set_core_connections_per_host', 'set_max_connections_per_host',
+                               'set_max_requests_per_connection', 'set_meta_refresh_enabled',
+                               'set_min_requests_per_connection', 'unregister_listener'])
+
+
+class _SessionCluster(object):
+    """
+    What session.cluster is for a session of a SharedDriverCluster. Anything
+    but shutting it down or connecting goes to the driver Cluster; changing
+    its settings marks the SharedDriverCluster as customized.
+    """
+
+    def __init__(self, shared, session):
+        # set through object, since setting any other attribute sets it on the Cluster
+        object.__setattr__(self, '_shared', shared)
+        object.__setattr__(self, '_session', session)
+
+    def __getattr__(self, name):
+        if name in _SETTINGS_METHODS:
+            self._shared.customized = True
+        return getattr(self._shared.cluster, name)
+
+    def __setattr__(self, name, value):
+        self._shared.customized = True
+        setattr(self._shared.cluster, name, value)
+
+    @property
+    def is_shutdown(self):
+        return self._session.is_shutdown or self._shared.cluster.is_shutdown
+
+    def connect(self, *args, **kwargs):
+        return self._shared.connect(*args, **kwargs)
+
+    def shutdown(self):
+        self._shared.release(self._session)
+
+
+class SharedDriverCluster(object):
+    """
+    A driver Cluster and the sessions opened on it, which is shut down along
+    with the last of them.
+    """
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.customized = False
+        self._sessions = set()
+        self._lock = threading.Lock()
+
+    @property
+    def is_shutdown(self):
+        return self.cluster.is_shutdown
+
+    def connect(self, *args, **kwargs):
+        """
+        Return a new session on the Cluster, taking the same arguments as Cluster.connect.
+        """
+        session = self.cluster.connect(*args, **kwargs)
+        with self._lock:
+            self._sessions.add(session)
+        session.cluster = _SessionCluster(self, session)
+        return session
+
+    def release(self, session):
+        """
+        Shut down session, and the Cluster if no other session is left on it.
+        Releasing a session again does nothing.
+        """
+        with self._lock:
+            if session not in self._sessions:
+                return
+            self._sessions.remove(session)
+            last = not self._sessions
+        session.shutdown()
+        if last:
+            self.cluster.shutdown()
+
+
+class DriverClusterCache(object):
+    """
+    The SharedDriverClusters of a test, by connection settings. A Cluster is
+    only handed out again while the nodes are in the state they were in when
+    it was created, since the driver is slow to notice nodes starting and
+    stopping, and while no session has changed its settings.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, key, node_states):
+        """
+        Return the SharedDriverCluster cached under key, if it is still usable:
+        it hasn't been shut down or customized, and node_states is the same as
+        when it was added. Otherwise return None.
+        """
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        cached_node_states, shared = cached
+        if shared.is_shutdown or shared.customized or cached_node_states != node_states:
+            # sessions already handed out keep working, until they are shut down
+            del self._entries[key]
+            return None
+        return shared
+
+    def put(self, key, node_states, shared):
+        self._entries[key] = (node_states, shared)
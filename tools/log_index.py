@@ -0,0 +1,211 @@
+"""
+An incremental index over Cassandra log files.
+
+ccm's Node.grep_log and Node.grep_log_for_errors re-read a log from the start
+on every call, which gets expensive when tests poll large DEBUG logs. A
+LogIndex instead reads each log once, remembering how far it got, and keeps
+what later queries need: the errors (with their stack traces) and the lines
+matching every pattern anyone has asked about. Each query only reads what has
+been appended since the previous one.
+"""
+import os
+import re
+import threading
+
+# same categorization ccm uses for grep_log_for_errors
+_LOG_LEVEL = re.compile(r'(INFO|DEBUG|WARN|ERROR)')
+
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+_INLINE_FLAGS = re.compile(r'\(\?[iLmsux]+\)')
+_any_pattern_cache = {}
+
+
+class _AnyOf(object):
+    """
+    Matches wherever any of a list of compiled regexes matches; used for
+    regexes that can't be combined into a single one.
+    """
+
+    def __init__(self, compiled_patterns):
+        self._compiled_patterns = compiled_patterns
+
+    def search(self, string):
+        for compiled in self._compiled_patterns:
+            m = compiled.search(string)
+            if m:
+                return m
+        return None
+
+
+def _must_stand_alone(pattern):
+    return _BACKREFERENCE.search(pattern) or _INLINE_FLAGS.search(pattern)
+
+
+def any_pattern(patterns):
+    """
+    Return an object whose search method finds a match wherever any of the
+    regex strings in patterns would. When possible this is one compiled
+    alternation, so a string is checked against all the patterns in a single
+    pass. Results are cached, so each distinct list of patterns is only
+    compiled once per process.
+    """
+    key = tuple(patterns)
+    if key not in _any_pattern_cache:
+        # backreferences would point at the wrong groups once the patterns
+        # are joined, and inline flags would apply to all of them, so
+        # patterns using either are checked on their own
+        combinable = [p for p in key if not _must_stand_alone(p)]
+        separate = [re.compile(p) for p in key if _must_stand_alone(p)]
+        compiled = [re.compile(p) for p in combinable]
+        if len(combinable) > 1:
+            try:
+                compiled = [re.compile('|'.join('(?:{})'.format(p) for p in combinable))]
+            except (re.error, AssertionError):
+                # e.g. the same named group in two patterns, or more groups
+                # than python 2 allows in one regex
+                pass
+        compiled.extend(separate)
+        # an empty _AnyOf matches nothing, unlike an empty alternation
+        _any_pattern_cache[key] = compiled[0] if len(compiled) == 1 else _AnyOf(compiled)
+    return _any_pattern_cache[key]
+
+
+class _IndexedLog(object):
+    """
+    The index for a single log file. Only complete lines are consumed; a
+    partially written last line is left for the next update.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.patterns = {}  # pattern string -> (compiled pattern, [(offset, line, match), ...])
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.errors = []  # [(offset, [line, ...]), ...]
+        self.in_error = False
+        for pattern, (compiled, _) in self.patterns.items():
+            self.patterns[pattern] = (compiled, [])
+
+    def _read_lines(self, start, end=None):
+        """
+        Yield (offset, line) for each complete line in the file from byte
+        start, stopping at byte end if given.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith('\n') or (end is not None and offset >= end):
+                    return
+                yield offset, line
+                offset += len(line)
+
+    def add_pattern(self, pattern):
+        """
+        Start indexing lines matching pattern, catching up on the part of the
+        file that has already been read.
+        """
+        if pattern in self.patterns:
+            return
+        compiled, matches = re.compile(pattern), []
+        if self.offset and os.path.exists(self.path):
+            for offset, line in self._read_lines(0, self.offset):
+                m = compiled.search(line)
+                if m:
+                    matches.append((offset, line, m))
+        self.patterns[pattern] = (compiled, matches)
+
+    def update(self):
+        """
+        Read and index anything appended to the file since the last update.
+        If the file shrank, it was truncated or rotated, so start over.
+        """
+        if not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < self.offset:
+            self._reset()
+
+        # used to skip, in one search, lines none of the patterns care about
+        combined = any_pattern(sorted(self.patterns))
+        for offset, line in self._read_lines(self.offset):
+            self.offset = offset + len(line)
+
+            category = _LOG_LEVEL.search(line)
+            if category is not None and category.group(0) == 'ERROR':
+                self.errors.append((offset, [line.rstrip('\r\n')]))
+                self.in_error = True
+            elif category is None and self.in_error:
+                # a line without a log level continues the last ERROR, e.g. a stack trace
+                self.errors[-1][1].append(line.rstrip('\r\n'))
+            else:
+                self.in_error = False
+
+            if combined.search(line):
+                for compiled, matches in self.patterns.values():
+                    m = compiled.search(line)
+                    if m:
+                        matches.append((offset, line, m))
+
+
+class LogIndex(object):
+    """
+    Indexes any number of log files, identified by path. Safe to use from
+    several threads at once.
+    """
+
+    def __init__(self):
+        self._logs = {}
+        self._lock = threading.Lock()
+
+    def _log(self, path):
+        with self._lock:
+            if path not in self._logs:
+                self._logs[path] = _IndexedLog(path)
+            return self._logs[path]
+
+    def grep(self, path, pattern, since=0):
+        """
+        Return a list of (line, match) tuples for the lines of the log at path
+        that match the regex pattern, like ccmlib's Node.grep_log. Only lines
+        starting at or after byte offset since are returned.
+        """
+        log = self._log(path)
+        with log.lock:
+            log.add_pattern(pattern)
+            log.update()
+            return [(line, m) for offset, line, m in log.patterns[pattern][1] if offset >= since]
+
+    def errors(self, path, since=0):
+        """
+        Return the errors logged at or after byte offset since in the log at
+        path, each as a list of lines made of the ERROR line and any lines
+        continuing it, like ccmlib's Node.grep_log_for_errors_from.
+        """
+        log = self._log(path)
+        with log.lock:
+            log.update()
+            return [list(lines) for offset, lines in log.errors if offset >= since]
+
+    def errors_and_mark(self, path, since=0):
+        """
+        Return the errors logged at or after byte offset since in the log at
+        path, like errors(), along with a mark to pass as since next time, so
+        that a caller can consume errors without missing or repeating any.
+        """
+        log = self._log(path)
+        with log.lock:
+            log.update()
+            return [list(lines) for offset, lines in log.errors if offset >= since], log.offset
+
+    def forget(self, directory):
+        """
+        Drop the index of every log under directory, e.g. once the cluster
+        that wrote them has been removed.
+        """
+        prefix = os.path.join(directory, '')
+        with self._lock:
+            for path in [p for p in self._logs if p.startswith(prefix)]:
+                del self._logs[path]
@@ -0,0 +1,226 @@
+"""
+Event-driven watching of Cassandra log files.
+
+A LogWatcher blocks until one of the files it watches grows, instead of
+making callers sleep and re-check on a fixed interval. On Linux it uses
+inotify (through ctypes, so no extra dependency is needed) on the directories
+holding the logs, which also catches logs that don't exist yet. Elsewhere, or
+if inotify can't be used, it falls back to checking file sizes every
+poll_interval seconds.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len; followed by len bytes of name
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+class LogWatcher(object):
+    """
+    Watches a set of files and reports when any of them is written to.
+
+    Can be used as a context manager, which closes the watcher on exit.
+    """
+
+    def __init__(self, paths=(), poll_interval=0.25):
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._watched_dirs = {}  # inotify watch descriptor -> directory
+        self._files_by_dir = defaultdict(set)  # directory -> names of files watched in it
+        self._polled = {}  # path -> last seen size, for files inotify can't watch
+        if _libc is not None:
+            fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+        for path in paths:
+            self.watch(path)
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def watch(self, path):
+        """
+        Start watching the file at path, which doesn't need to exist yet.
+        """
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        if name in self._files_by_dir.get(directory, ()) or path in self._polled:
+            return
+        if self._fd is not None and os.path.isdir(directory):
+            if directory not in self._files_by_dir:
+                wd = _libc.inotify_add_watch(self._fd, directory, _WATCH_MASK)
+                if wd < 0:
+                    self._polled[path] = self._size(path)
+                    return
+                self._watched_dirs[wd] = directory
+            self._files_by_dir[directory].add(name)
+        else:
+            self._polled[path] = self._size(path)
+
+    def _size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return -1
+
+    def _read_events(self):
+        """
+        Return the watched paths named by pending inotify events.
+        """
+        changed = set()
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return changed
+            raise
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip('\0')
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, so assume everything changed
+                for directory, names in self._files_by_dir.items():
+                    changed.update(os.path.join(directory, n) for n in names)
+                continue
+            directory = self._watched_dirs.get(wd)
+            if directory is not None and name in self._files_by_dir[directory]:
+                changed.add(os.path.join(directory, name))
+        return changed
+
+    def _poll(self):
+        changed = set()
+        for path, last_size in self._polled.items():
+            size = self._size(path)
+            if size != last_size:
+                self._polled[path] = size
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout):
+        """
+        Block until at least one watched file is written to, or timeout
+        seconds have passed. Returns the set of paths that changed, which is
+        empty on timeout.
+        """
+        deadline = time.time() + timeout
+        while True:
+            changed = self._poll()
+            remaining = deadline - time.time()
+            if changed or remaining <= 0:
+                return changed
+            if self._fd is None or not self._files_by_dir:
+                time.sleep(min(remaining, self.poll_interval))
+                continue
+            # files that inotify couldn't watch still need checking every poll_interval
+            readable, _, _ = select.select([self._fd], [], [], min(remaining, self.poll_interval) if self._polled else remaining)
+            if readable:
+                changed = self._read_events() | self._poll()
+                if changed:
+                    return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ActiveLogWatch(threading.Thread):
+    """
+    A thread that reports errors in a cluster's system.log files as soon as
+    they are written, by calling on_error_call with an OrderedDict mapping
+    node name to a list of errors, each a list of lines. Errors are read
+    through log_index, a tools.log_index.LogIndex.
+
+    This has the same interface as the thread returned by ccm's
+    Cluster.actively_watch_logs_for_error: call join() to stop it, after a
+    final scan.
+    """
+
+    def __init__(self, cluster, log_index, on_error_call, poll_interval=0.25, resync_interval=1):
+        super(ActiveLogWatch, self).__init__()
+        self.cluster = cluster
+        self.log_index = log_index
+        self.on_error_call = on_error_call
+        self.poll_interval = poll_interval
+        # how often to check for nodes added to the cluster while nothing is being logged
+        self.resync_interval = resync_interval
+        self.daemon = True  # set so that thread will exit when main thread exits
+        self.req_stop_event = threading.Event()
+        self.done_event = threading.Event()
+        self.log_positions = defaultdict(int)
+
+    def scan(self):
+        errordata = OrderedDict()
+        for node in self.cluster.nodelist():
+            errors, self.log_positions[node.name] = self.log_index.errors_and_mark(node.logfilename(), since=self.log_positions[node.name])
+            if errors:
+                errordata[node.name] = errors
+        return errordata
+
+    def scan_and_report(self):
+        try:
+            errordata = self.scan()
+        except (IOError, OSError) as e:
+            # in the case of unexpected error, report this thread to the callback
+            errordata = OrderedDict([('log_scanner', [[str(e)]])])
+        if errordata:
+            self.on_error_call(errordata)
+
+    def run(self):
+        try:
+            with LogWatcher(poll_interval=self.poll_interval) as watcher:
+                while not self.req_stop_event.is_set():
+                    for node in self.cluster.nodelist():
+                        watcher.watch(node.logfilename())
+                    self.scan_and_report()
+                    watcher.wait(self.resync_interval)
+            # do a final scan to make sure we got to the very end of the files
+            self.scan_and_report()
+        finally:
+            # done_event signals that the scan completed a final pass
+            self.done_event.set()
+
+    def join(self, timeout=None):
+        # signals to the main run() loop that a stop is requested
+        self.req_stop_event.set()
+        # the loop notices the request at the latest resync_interval seconds later
+        self.done_event.wait(timeout=self.resync_interval * 2)
+        super(ActiveLogWatch, self).join(timeout)
@@ -1,6 +1,32 @@
 from abc import ABCMeta, abstractproperty
 
 
+def refresh_keyspace_metadata(cluster, ks_name):
+    """
+    Refresh the driver's metadata for the keyspace ks_name.
+
+    If the driver isn't keeping schema metadata up to date (see
+    Cluster.schema_metadata_enabled), the keyspace's tables, types and
+    functions may be missing or stale, and refreshing the keyspace alone
+    doesn't reload them, so the whole schema is refreshed instead.
+    """
+    if cluster.schema_metadata_enabled:
+        cluster.refresh_keyspace_metadata(ks_name)
+    else:
+        cluster.refresh_schema_metadata()
+
+
+def refresh_table_metadata(cluster, ks_name, table_name):
+    """
+    Refresh the driver's metadata for the table ks_name.table_name, first
+    loading its keyspace if the driver doesn't know about it yet, which is
+    usual when schema metadata isn't kept up to date.
+    """
+    if ks_name not in cluster.metadata.keyspaces:
+        cluster.refresh_keyspace_metadata(ks_name)
+    cluster.refresh_table_metadata(ks_name, table_name)
+
+
 class UpdatingMetadataWrapperBase(object):
     __metaclass__ = ABCMeta
 
@@ -27,7 +53,7 @@ class UpdatingTableMetadataWrapper(UpdatingMetadataWrapperBase):
 
     @property
     def _wrapped(self):
-        self._cluster.refresh_table_metadata(self._ks_name, self._table_name)
+        refresh_table_metadata(self._cluster, self._ks_name, self._table_name)
         return self._cluster.metadata.keyspaces[self._ks_name].tables[self._table_name]
 
     def __repr__(self):
@@ -49,7 +75,7 @@ class UpdatingKeyspaceMetadataWrapper(UpdatingMetadataWrapperBase):
 
     @property
     def _wrapped(self):
-        self._cluster.refresh_keyspace_metadata(self._ks_name)
+        refresh_keyspace_metadata(self._cluster, self._ks_name)
         return self._cluster.metadata.keyspaces[self._ks_name]
 
     def __repr__(self):
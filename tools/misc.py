@@ -1,43 +1,52 @@
 import os
 import subprocess
-import time
 from collections import Mapping
+from multiprocessing.pool import ThreadPool
 
 from ccmlib.node import Node
 
-from dtest import debug
+from dtest import IP_PREFIX, debug, offset_port
 
 
 # work for cluster started by populate
 def new_node(cluster, bootstrap=True, token=None, remote_debug_port='0', data_center=None):
     i = len(cluster.nodes) + 1
+    # clusters created by dtest.create_ccm_cluster know their address block and port offset
+    ip_prefix = getattr(cluster, 'ip_prefix', IP_PREFIX)
     node = Node('node%s' % i,
                 cluster,
                 bootstrap,
-                ('127.0.0.%s' % i, 9160),
-                ('127.0.0.%s' % i, 7000),
-                str(7000 + i * 100),
+                ('%s%s' % (ip_prefix, i), 9160),
+                ('%s%s' % (ip_prefix, i), 7000),
+                offset_port(7000 + i * 100, getattr(cluster, 'port_offset', None)),
                 remote_debug_port,
                 token,
-                binary_interface=('127.0.0.%s' % i, 9042))
+                binary_interface=('%s%s' % (ip_prefix, i), 9042))
     cluster.add(node, not bootstrap, data_center=data_center)
     return node
 
 
-def retry_till_success(fun, *args, **kwargs):
-    timeout = kwargs.pop('timeout', 60)
-    bypassed_exception = kwargs.pop('bypassed_exception', Exception)
-
-    deadline = time.time() + timeout
-    while True:
-        try:
-            return fun(*args, **kwargs)
-        except bypassed_exception:
-            if time.time() > deadline:
-                raise
-            else:
-                # brief pause before next attempt
-                time.sleep(0.25)
+def run_on_nodes(func, nodes, concurrency=None):
+    """
+    Call func on each of nodes, concurrency of them at a time, or all of them
+    at once if concurrency is None, and return the results in the order of
+    nodes. If func raises for any node, the exception of the first such node
+    is raised once func has been called on every node, or straight away when
+    the calls are made one at a time.
+    """
+    nodes = list(nodes)
+    if len(nodes) <= 1 or concurrency == 1:
+        return [func(node) for node in nodes]
+
+    pool = ThreadPool(min(concurrency or len(nodes), len(nodes)))
+    try:
+        # unlike pool.map, which returns as soon as a call fails, wait for all of them
+        results = [pool.apply_async(func, (node,)) for node in nodes]
+        for result in results:
+            result.wait()
+        return [result.get() for result in results]
+    finally:
+        pool.terminate()
 
 
 def generate_ssl_stores(base_dir, passphrase='cassandra'):
@@ -1,16 +1,115 @@
+import threading
 import time
+from bisect import bisect_right
+from collections import Sequence, deque
+from itertools import chain, izip
 
+from tools.assertions import assert_items_equal_ignore_order
 from tools.datahelp import flatten_into_set
 
 
 class Page(object):
-    data = None
+    """
+    A page of rows, stored as one list per column rather than one object per
+    row, so a page of wide rows doesn't pay for a dict or tuple per row.
+
+    Rows are rebuilt on access with the type the driver's row factory made
+    them with (dict, namedtuple, tuple...), so they compare equal to the rows
+    received. All rows of a page must have the same columns.
+    """
+    __slots__ = ('_columns', '_names', '_make_row', '_size')
 
-    def __init__(self):
-        self.data = []
+    def __init__(self, rows=()):
+        self._columns = None
+        self._names = None
+        self._make_row = None
+        self._size = 0
+        for row in rows:
+            self.add_row(row)
+
+    def _set_shape(self, row):
+        row_type = type(row)
+        if isinstance(row, dict):
+            self._names = list(row.keys())
+            self._make_row = lambda values: row_type(zip(self._names, values))
+        elif hasattr(row_type, '_make'):  # namedtuple
+            self._make_row = row_type._make
+        else:
+            self._make_row = row_type
+        self._columns = [[] for _ in range(len(self._names or row))]
 
     def add_row(self, row):
-        self.data.append(row)
+        if self._columns is None:
+            self._set_shape(row)
+        values = [row[name] for name in self._names] if self._names is not None else row
+        for column, value in zip(self._columns, values):
+            column.append(value)
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        if self._size:
+            for values in izip(*self._columns):
+                yield self._make_row(values)
+
+    def row(self, index):
+        return self._make_row([column[index] for column in self._columns])
+
+    @property
+    def data(self):
+        """
+        The rows of this page, as a new list.
+        """
+        return list(self)
+
+
+class PagedRows(Sequence):
+    """
+    A read-only list of the rows of several pages, read from the pages as it
+    is used rather than copied out of them. Compares equal to a list or tuple
+    of the same rows; slicing returns a list.
+    """
+
+    def __init__(self, pages):
+        self._pages = list(pages)
+        self._starts = []
+        size = 0
+        for page in self._pages:
+            self._starts.append(size)
+            size += len(page)
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return chain.from_iterable(self._pages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('row index out of range')
+        page_num = bisect_right(self._starts, index) - 1
+        return self._pages[page_num].row(index - self._starts[page_num])
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, PagedRows)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in izip(self, other))
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
 
 
 class PageFetcher(object):
@@ -20,6 +119,12 @@ class PageFetcher(object):
 
     The first page is automatically retrieved, so an initial
     call to request_one is actually getting the *second* page!
+
+    Pages arrive on the driver's event loop thread, which wakes up any wait()
+    as soon as the pages it is waiting for are in. With prefetch set, up to
+    that many pages beyond those requested are fetched in the background and
+    held back until they are requested, so request_one often doesn't have to
+    wait at all. Leave it at 0 when the data is changed between requests.
     """
     pages = None
     error = None
@@ -28,8 +133,9 @@ class PageFetcher(object):
     retrieved_pages = None
     retrieved_empty_pages = None
 
-    def __init__(self, future):
+    def __init__(self, future, prefetch=0):
         self.pages = []
+        self.prefetch = prefetch
 
         # the first page is automagically returned (eventually)
         # so we'll count this as a request, but the retrieved count
@@ -38,6 +144,11 @@ class PageFetcher(object):
         self.retrieved_pages = 0
         self.retrieved_empty_pages = 0
 
+        self._condition = threading.Condition()
+        self._prefetched = deque()  # pages received but not requested yet; None for an empty page
+        self._fetching = True  # the first page is on its way
+        self._fetch_all = False  # set by request_all, so every page is fetched as soon as the previous one arrives
+
         self.future = future
         self.future.add_callbacks(
             callback=self.handle_page,
@@ -49,22 +160,55 @@ class PageFetcher(object):
         # called after the first page is returned
         self.wait(seconds=30)
 
-    def handle_page(self, rows):
-        # occasionally get a final blank page that is useless
-        if rows == []:
-            self.retrieved_empty_pages += 1
-            return
+    def _delivered_pages(self):
+        return self.retrieved_pages + self.retrieved_empty_pages
 
-        page = Page()
-        self.pages.append(page)
+    def _more_pages(self):
+        """
+        Whether any page is yet to be handed out. Must hold self._condition.
+        """
+        return bool(self._prefetched) or self._fetching or self.future.has_more_pages
 
-        for row in rows:
-            page.add_row(row)
+    def _update(self):
+        """
+        Hand out prefetched pages that have been requested, and start fetching
+        the next page if it is wanted. Must hold self._condition.
+        """
+        while True:
+            if self._fetch_all and self.requested_pages == self._delivered_pages() and self._more_pages():
+                self.requested_pages += 1
+            if not (self._prefetched and self.requested_pages > self._delivered_pages()):
+                break
+            page = self._prefetched.popleft()
+            # occasionally get a final blank page that is useless
+            if page is None:
+                self.retrieved_empty_pages += 1
+            else:
+                self.pages.append(page)
+                self.retrieved_pages += 1
+
+        if self._fetching or not self.future.has_more_pages:
+            return
+        outstanding = self.requested_pages - self._delivered_pages()
+        if outstanding > 0 or len(self._prefetched) < self.prefetch:
+            self._fetching = True
+            self.future.start_fetching_next_page()
 
-        self.retrieved_pages += 1
+    def handle_page(self, rows):
+        with self._condition:
+            if rows == []:
+                self._prefetched.append(None)
+            else:
+                self._prefetched.append(Page(rows))
+            self._fetching = False
+            self._update()
+            self._condition.notify_all()
 
     def handle_error(self, exc):
-        self.error = exc
+        with self._condition:
+            self.error = exc
+            self._fetching = False
+            self._condition.notify_all()
         raise exc
 
     def request_one(self, timeout=None):
@@ -74,10 +218,11 @@ class PageFetcher(object):
         If the future is exhausted, this is a no-op.
         @param timeout Time, in seconds, to wait for all pages.
         """
-        if self.future.has_more_pages:
-            self.future.start_fetching_next_page()
-            self.requested_pages += 1
-            self.wait(seconds=timeout)
+        with self._condition:
+            if self._more_pages():
+                self.requested_pages += 1
+                self._update()
+        self.wait(seconds=timeout)
 
         return self
 
@@ -86,12 +231,12 @@ class PageFetcher(object):
         Requests any remaining pages.
 
         If the future is exhausted, this is a no-op.
-        @param timeout Time, in seconds, to wait for all pages.
+        @param timeout Time, in seconds, to wait for each page.
         """
-        while self.future.has_more_pages:
-            self.future.start_fetching_next_page()
-            self.requested_pages += 1
-            self.wait(seconds=timeout)
+        with self._condition:
+            self._fetch_all = True
+            self._update()
+        self.wait(seconds=timeout)
 
         return self
 
@@ -101,20 +246,25 @@ class PageFetcher(object):
 
         Requests are made by calling request_one and/or request_all.
 
-        Raises RuntimeError if seconds is exceeded.
+        Raises RuntimeError if seconds pass without a requested page arriving,
+        or as soon as fetching a page fails, since then none will.
         """
         seconds = 5 if seconds is None else seconds
-        expiry = time.time() + seconds
-
-        while time.time() < expiry:
-            if self.requested_pages == (self.retrieved_pages + self.retrieved_empty_pages):
-                return self
-            # small wait so we don't need excess cpu to keep checking
-            time.sleep(0.1)
-
-        raise RuntimeError(
-            "Requested pages were not delivered before timeout. " +
-            "Requested: {}; retrieved: {}; empty retrieved: {}".format(self.requested_pages, self.retrieved_pages, self.retrieved_empty_pages))
+        with self._condition:
+            delivered = self._delivered_pages()
+            expiry = time.time() + seconds
+            while self.requested_pages != self._delivered_pages():
+                if self._delivered_pages() != delivered:
+                    # a page came in, so the next one gets the full time
+                    delivered = self._delivered_pages()
+                    expiry = time.time() + seconds
+                remaining = expiry - time.time()
+                if remaining <= 0 or self.error is not None:
+                    raise RuntimeError(
+                        "Requested pages were not delivered before timeout. " +
+                        "Requested: {}; retrieved: {}; empty retrieved: {}".format(self.requested_pages, self.retrieved_pages, self.retrieved_empty_pages))
+                self._condition.wait(remaining)
+        return self
 
     def pagecount(self):
         """
@@ -128,10 +278,10 @@ class PageFetcher(object):
         """
         Returns the number of results found at page_num
         """
-        return len(self.pages[page_num - 1].data)
+        return len(self.pages[page_num - 1])
 
     def num_results_all(self):
-        return [len(page.data) for page in self.pages]
+        return [len(page) for page in self.pages]
 
     def page_data(self, page_num):
         """
@@ -147,25 +297,35 @@ class PageFetcher(object):
 
         The page(s) should have already been requested with request_one and/or request_all.
         """
-        all_pages_combined = []
-        for page in self.pages:
-            all_pages_combined.extend(page.data[:])
+        return list(self.iter_rows())
 
-        return all_pages_combined
+    def view(self):
+        """
+        Returns a read-only view of the rows of the pages retrieved so far, see PagedRows.
+        Unlike all_data, it doesn't copy the rows into a list, but its rows can't be changed.
+        """
+        return PagedRows(self.pages)
+
+    def iter_rows(self):
+        """
+        Iterates over all retrieved rows, page by page, without building a list of them.
+        """
+        return chain.from_iterable(list(self.pages))
 
     @property  # make property to match python driver api
     def has_more_pages(self):
         """
         Returns bool indicating if there are any pages not retrieved.
         """
-        return self.future.has_more_pages
+        with self._condition:
+            return self._more_pages()
 
 
 class PageAssertionMixin(object):
     """Can be added to subclasses of unittest.Tester"""
 
     def assertEqualIgnoreOrder(self, actual, expected):
-        return self.assertItemsEqual(actual, expected)
+        return assert_items_equal_ignore_order(actual, expected)
 
     def assertIsSubsetOf(self, subset, superset):
         self.assertLessEqual(flatten_into_set(subset), flatten_into_set(superset))
@@ -0,0 +1,115 @@
+"""
+An on-disk cache of facts about the test environment that are slow to find
+out, like the version of the Cassandra under test or where libjemalloc is, so
+that every process importing dtest.py (nose workers, run_dtests.py
+subprocesses, --collect-only runs) doesn't have to find them out again.
+
+Each fact is stored along with a key made of what it depends on, typically
+paths and the modification times of files, and is found out again when that
+key changes. Set DTEST_PROBE_CACHE to the file to keep the cache in, or to an
+empty string to disable it.
+"""
+import json
+import os
+import tempfile
+
+PROBE_CACHE_FILE = os.environ.get('DTEST_PROBE_CACHE', os.path.join(tempfile.gettempdir(), 'cassandra-dtest-probes.json'))
+
+
+def _normalize(key):
+    # what the key will look like once read back from JSON, e.g. tuples as lists
+    return json.loads(json.dumps(key))
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save(path, entries):
+    # write a new file and rename it over the old one, so that concurrent
+    # processes never read a half-written cache
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.probes-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        pass  # only a cache
+
+
+def cached(name, key, compute, path=None):
+    """
+    Return the value of compute() for key, stored as name in the cache file,
+    calling compute and storing its value only if the key has changed.
+    @param name Name of the fact
+    @param key What the value depends on, as a JSON-serializable value, or None to not use the cache
+    @param compute Function returning the value, which must be JSON-serializable
+    @param path Optional cache file. Default PROBE_CACHE_FILE
+    """
+    path = PROBE_CACHE_FILE if path is None else path
+    if not path or key is None:
+        return compute()
+
+    key = _normalize(key)
+    entry = _load(path).get(name)
+    if entry is not None and entry.get('key') == key:
+        return entry['value']
+
+    value = compute()
+    # read the file again, in case another process stored something meanwhile
+    entries = _load(path)
+    entries[name] = {'key': key, 'value': value}
+    _save(path, entries)
+    return value
+
+
+def file_state(*paths):
+    """
+    Return the modification time of each path, None for those that don't exist.
+    """
+    state = []
+    for path in paths:
+        try:
+            state.append(os.path.getmtime(path))
+        except OSError:
+            state.append(None)
+    return state
+
+
+def git_head_state(repo_dir):
+    """
+    Return what HEAD of the git checkout in repo_dir refers to, and the
+    modification times of the files that say which commit that is, without
+    running git. Returns None if repo_dir isn't a git checkout.
+    """
+    git_dir = os.path.join(repo_dir, '.git')
+    if os.path.isfile(git_dir):
+        # a worktree or submodule, whose .git file says where its git directory is
+        with open(git_dir) as f:
+            content = f.read().strip()
+        if not content.startswith('gitdir:'):
+            return None
+        git_dir = os.path.join(repo_dir, content[len('gitdir:'):].strip())
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+    except IOError:
+        return None
+
+    # the refs of a worktree are kept in the main checkout's git directory
+    common_dir = git_dir
+    if os.path.isfile(os.path.join(git_dir, 'commondir')):
+        with open(os.path.join(git_dir, 'commondir')) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+
+    state = [head]
+    if head.startswith('ref:'):
+        ref = head[len('ref:'):].strip()
+        state.extend(file_state(os.path.join(common_dir, ref), os.path.join(common_dir, 'packed-refs')))
+    return state
@@ -0,0 +1,118 @@
+"""
+Retrying operations that fail until the cluster is ready for them.
+
+retry_till_success waits between attempts with jittered exponential backoff:
+the first retries come quickly, so a node that is nearly up isn't left idle
+for a fixed interval, and the waits then grow so a node that takes a while
+isn't hammered with attempts (and the logs with their failures). An optional
+readiness probe, such as port_open, can stand in for the expensive attempts
+until it passes.
+
+Each call is recorded in RETRY_STATS, so the time spent waiting on the
+cluster can be reported.
+"""
+import random
+import socket
+import threading
+import time
+from collections import namedtuple
+
+# attempts counts calls to the retried function; probes counts calls to the readiness probe.
+# waited is the time spent sleeping between them, and elapsed the time the whole call took.
+RetryRecord = namedtuple('RetryRecord', ['name', 'attempts', 'probes', 'waited', 'elapsed', 'succeeded'])
+
+
+class RetryStats(object):
+    """
+    Collects a RetryRecord for each call of retry_till_success. Safe to use
+    from several threads at once.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def drain(self):
+        """
+        Return the records collected so far, and forget them.
+        """
+        with self._lock:
+            records, self._records = self._records, []
+        return records
+
+
+RETRY_STATS = RetryStats()
+
+
+def backoff_delays(initial=0.05, maximum=1.0, multiplier=2.0, jitter=0.5):
+    """
+    Yield an endless series of delays, starting around initial seconds and
+    multiplied by multiplier each time up to maximum. Each delay is then
+    shortened by a random fraction of up to jitter, so that threads retrying
+    at the same time spread out.
+    """
+    delay = initial
+    while True:
+        yield delay * (1 - random.random() * jitter)
+        delay = min(delay * multiplier, maximum)
+
+
+def port_open(address, port, timeout=1):
+    """
+    Return whether a TCP connection to address:port can be opened. A cheap
+    readiness probe to run before a full client handshake.
+    """
+    try:
+        socket.create_connection((address, port), timeout).close()
+        return True
+    except (socket.error, socket.timeout):
+        return False
+
+
+def retry_till_success(fun, *args, **kwargs):
+    """
+    Call fun with args and kwargs until it doesn't raise, and return what it
+    returns.
+
+    The following keyword arguments are used here rather than passed to fun:
+
+    @param timeout Seconds after which the last exception is raised instead of retrying. Defaults to 60.
+    @param bypassed_exception The exception type (or tuple of types) to retry on; anything else is raised
+           immediately. Defaults to Exception.
+    @param ready An optional callable taking no arguments. fun is only called once ready() returns True,
+           except for one last attempt at the timeout, so that fun's exception is what gets raised.
+    @param max_delay The longest wait between attempts, in seconds. Defaults to 1.
+    """
+    timeout = kwargs.pop('timeout', 60)
+    bypassed_exception = kwargs.pop('bypassed_exception', Exception)
+    ready = kwargs.pop('ready', None)
+    delays = backoff_delays(maximum=kwargs.pop('max_delay', 1.0))
+
+    start = time.time()
+    deadline = start + timeout
+    attempts = probes = 0
+    waited = 0.0
+    succeeded = False
+    try:
+        while True:
+            probes += ready is not None
+            if ready is None or ready() or time.time() > deadline:
+                attempts += 1
+                try:
+                    result = fun(*args, **kwargs)
+                    succeeded = True
+                    return result
+                except bypassed_exception:
+                    if time.time() > deadline:
+                        raise
+            # never sleep past the deadline, so the last attempt happens on time
+            delay = min(next(delays), max(deadline - time.time(), 0) + 0.01)
+            time.sleep(delay)
+            waited += delay
+    finally:
+        RETRY_STATS.record(RetryRecord(getattr(fun, '__name__', repr(fun)), attempts, probes,
+                                       waited, time.time() - start, succeeded))
@@ -0,0 +1,240 @@
+"""
+Seed tables with data by writing SSTables directly, rather than inserting the
+rows through CQL.
+
+The rows are serialized by the driver, as it would bind them to an INSERT,
+and written by a small Java helper (lib/SSTableSeeder.java) using the
+CQLSSTableWriter of the Cassandra build the node runs. The helper is compiled
+with javac the first time it is needed for a build, so a JDK is required.
+
+An example, loading a million rows into a single node cluster:
+
+    seed_table(session, node1, 'ks.cf', ({'k': i, 'v': str(i)} for i in xrange(1000000)))
+"""
+import glob
+import hashlib
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+from itertools import chain, count
+
+from ccmlib import common
+
+from dtest import debug
+from tools.jmxutils import CLASSPATH_SEP, java_bin
+from tools.metadata_wrapper import refresh_table_metadata
+
+SEEDER_SOURCE = os.path.join('lib', 'SSTableSeeder.java')
+_NULL = struct.pack('>i', -1)
+# SSTable component file names, ks-cf-ka-1-Data.db before 3.0 and mc-1-big-Data.db after
+_SSTABLE_FILENAME = re.compile(r'^(?P<prefix>.*?-)?(?P<version>[a-z]{2})-(?P<generation>\d+)-(?P<component>.+)$')
+
+
+def javac_bin():
+    if 'JAVA_HOME' in os.environ:
+        return os.path.join(os.environ['JAVA_HOME'], 'bin', 'javac')
+    else:
+        return 'javac'
+
+
+def cassandra_classpath(install_dir):
+    """
+    Return the classpath of the Cassandra build or binary release at install_dir.
+    """
+    entries = [os.path.join(install_dir, 'build', 'classes', 'main')]
+    for pattern in (('lib', '*.jar'), ('build', '*.jar'), ('build', 'lib', 'jars', '*.jar')):
+        entries.extend(sorted(glob.glob(os.path.join(install_dir, *pattern))))
+    return CLASSPATH_SEP.join(entry for entry in entries if os.path.exists(entry))
+
+
+def compile_seeder(install_dir):
+    """
+    Compile SSTableSeeder against the Cassandra at install_dir, unless it
+    already has been, and return the directory holding the class.
+    """
+    classpath = cassandra_classpath(install_dir)
+    with open(SEEDER_SOURCE) as f:
+        digest = hashlib.md5(f.read() + classpath).hexdigest()
+    class_dir = os.path.join(tempfile.gettempdir(), 'dtest-sstable-seeder-{}'.format(digest))
+    if os.path.exists(os.path.join(class_dir, 'SSTableSeeder.class')):
+        return class_dir
+
+    debug('Compiling {} against {}'.format(SEEDER_SOURCE, install_dir))
+    build_dir = tempfile.mkdtemp(prefix='dtest-sstable-seeder-')
+    try:
+        try:
+            subprocess.check_output([javac_bin(), '-d', build_dir, '-cp', classpath, SEEDER_SOURCE], stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as exc:
+            raise RuntimeError('Compiling {} failed:\n{}'.format(SEEDER_SOURCE, exc.output))
+        # renaming the finished directory into place keeps concurrent tests from seeing half of it
+        os.rename(build_dir, class_dir)
+    except OSError:
+        if not os.path.exists(class_dir):
+            raise
+    finally:
+        if os.path.exists(build_dir):
+            shutil.rmtree(build_dir)
+    return class_dir
+
+
+def _split_table_name(session, table_name):
+    ks_name, _, name = table_name.rpartition('.')
+    return ks_name or session.keyspace, name
+
+
+def write_sstables(session, install_dir, table_name, rows, directory, buffer_size_mb=64):
+    """
+    Write rows for table_name as SSTables in directory, with the Cassandra at
+    install_dir. The table must already exist, since its schema is read from
+    the driver's metadata, and must not use user types.
+    @param session Session connected to the cluster the table is in
+    @param install_dir Cassandra build or release to write the SSTables with
+    @param table_name Table to write rows for, optionally qualified by its keyspace
+    @param rows Iterable of dicts of column name to value, all with the same columns
+    @param directory Directory to write the SSTables to
+    @param buffer_size_mb Optional size of the rows buffered before an SSTable is written. Default 64
+    @return the number of rows written
+    """
+    ks_name, name = _split_table_name(session, table_name)
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    columns = list(first.keys())
+
+    refresh_table_metadata(session.cluster, ks_name, name)
+    create_table = session.cluster.metadata.keyspaces[ks_name].tables[name].as_cql_query()
+    insert = 'INSERT INTO {}.{} ({}) VALUES ({})'.format(ks_name, name, ', '.join(columns), ', '.join('?' for _ in columns))
+    prepared = session.prepare(insert)
+
+    classpath = CLASSPATH_SEP.join((compile_seeder(install_dir), cassandra_classpath(install_dir)))
+    args = [java_bin(), '-cp', classpath, 'SSTableSeeder',
+            directory, create_table, insert, str(len(columns)), str(buffer_size_mb)]
+    # the helper's output goes to files rather than pipes, since it may log more than a pipe
+    # holds while it is still reading rows, and block with us blocked writing them
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=out, stderr=err)
+        try:
+            for row in chain([first], rows):
+                values = prepared.bind([row[c] for c in columns]).values
+                process.stdin.write(''.join(_NULL if value is None else struct.pack('>i', len(value)) + value
+                                            for value in values))
+        except IOError:
+            pass  # the helper died, and its output below says why
+        process.communicate()
+        out.seek(0)
+        err.seek(0)
+        if process.returncode != 0:
+            raise RuntimeError('Writing SSTables for {} failed (command was: {}):\n{}'.format(table_name, ' '.join(args[:4]), err.read()))
+        return int(out.read().split()[-1])
+
+
+def _table_data_directory(node, ks_name, name):
+    """
+    Return the node's data directory for the table, picking the most recent
+    one if the table was dropped and created again.
+    """
+    candidates = []
+    for data_dir in node.data_directories():
+        candidates.extend(glob.glob(os.path.join(data_dir, ks_name, name + '-*')))
+        candidates.extend(glob.glob(os.path.join(data_dir, ks_name, name)))
+    if not candidates:
+        raise RuntimeError('No data directory for {}.{} on {}'.format(ks_name, name, node.name))
+    return max(candidates, key=os.path.getmtime)
+
+
+def _generation(filename):
+    """
+    Return the generation of the SSTable filename is a component of, or None
+    if it isn't one.
+    """
+    match = _SSTABLE_FILENAME.match(filename)
+    return int(match.group('generation')) if match else None
+
+
+def _renumbered(filenames, first_generation):
+    """
+    Return {filename: new filename} giving the SSTables among filenames
+    consecutive generations from first_generation. Other files keep their name.
+    """
+    generations = sorted(set(_generation(filename) for filename in filenames) - set([None]))
+    new_generations = dict(zip(generations, count(first_generation)))
+    names = {}
+    for filename in filenames:
+        match = _SSTABLE_FILENAME.match(filename)
+        if match is None:
+            names[filename] = filename
+        else:
+            names[filename] = '{}{}-{}-{}'.format(match.group('prefix') or '', match.group('version'),
+                                                  new_generations[int(match.group('generation'))], match.group('component'))
+    return names
+
+
+def _refresh(node, ks_name, name, sstable_dir):
+    """
+    Copy the SSTables in sstable_dir into the node's data directory for the
+    table and have it load them with nodetool refresh. They are renumbered
+    above the generations already in the directory, since the helper starts
+    at generation 1, which any table flushed before has used.
+    """
+    table_dir = _table_data_directory(node, ks_name, name)
+    existing = os.listdir(table_dir)
+    names = _renumbered(os.listdir(sstable_dir), max([_generation(filename) or 0 for filename in existing] + [0]) + 1)
+    clashes = sorted(new_name for new_name in names.values() if new_name in existing)
+    if clashes:
+        raise RuntimeError('{} already has files named like the ones written, {}; load them with sstableloader instead'.format(
+            table_dir, ', '.join(clashes)))
+    for filename, new_name in names.items():
+        shutil.copy(os.path.join(sstable_dir, filename), os.path.join(table_dir, new_name))
+    node.nodetool('refresh {} {}'.format(ks_name, name))
+
+
+def _sstableloader(node, sstable_dir):
+    install_dir = node.get_install_dir()
+    args = [node.get_tool('sstableloader'), '--nodes', node.address(), sstable_dir]
+    env = common.make_cassandra_env(install_dir, node.get_path())
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    out, err = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError('sstableloader exited with status {}:\n{}\n{}'.format(process.returncode, out, err))
+
+
+def seed_table(session, node, table_name, rows, method='refresh', buffer_size_mb=64):
+    """
+    Write rows for table_name as SSTables with node's Cassandra, and load them
+    into the cluster.
+    @param session Session connected to the cluster the table is in
+    @param node Node to write the SSTables with, and to load them through
+    @param table_name Table to load rows into, optionally qualified by its keyspace
+    @param rows Iterable of dicts of column name to value, all with the same columns
+    @param method Optional way to load the SSTables. 'refresh' copies them into the node's
+    data directory, numbered after the SSTables already there, and runs nodetool refresh,
+    so only that node gets the rows, and can only be used with single node clusters. 'sstableloader' streams each row to the
+    nodes that own it. Default 'refresh'
+    @param buffer_size_mb Optional size of the rows buffered before an SSTable is written. Default 64
+    @return the number of rows loaded
+    """
+    if method not in ('refresh', 'sstableloader'):
+        raise ValueError("method should be 'refresh' or 'sstableloader', not {!r}".format(method))
+    if method == 'refresh' and len(node.cluster.nodelist()) > 1:
+        raise ValueError("method 'refresh' only loads the rows into {}; use 'sstableloader' with {} nodes".format(
+            node.name, len(node.cluster.nodelist())))
+    ks_name, name = _split_table_name(session, table_name)
+    directory = tempfile.mkdtemp(prefix='dtest-seed-')
+    try:
+        # sstableloader takes the keyspace and table from the last two directories
+        sstable_dir = os.path.join(directory, ks_name, name)
+        os.makedirs(sstable_dir)
+        count = write_sstables(session, node.get_install_dir(), table_name, rows, sstable_dir, buffer_size_mb)
+        debug('Wrote {} rows for {}.{} as SSTables, loading them with {}'.format(count, ks_name, name, method))
+        if count:
+            if method == 'refresh':
+                _refresh(node, ks_name, name, sstable_dir)
+            else:
+                _sstableloader(node, sstable_dir)
+    finally:
+        shutil.rmtree(directory)
+    return count
@@ -0,0 +1,148 @@
+"""
+Scan whole tables a token range at a time, several ranges at once, keeping
+only a row count and an order-independent digest of the rows of each range.
+
+Counting or comparing the rows of a big table this way neither depends on a
+single coordinator answering a SELECT count(*) before it times out, nor holds
+the rows in memory:
+
+    assert_scanned_row_count(session, 'ks.cf', 1000000)
+
+    before = scan_table(session, 'ks.cf', cl=ConsistencyLevel.ALL)
+    ...
+    assert_scans_equal(before, scan_table(session, 'ks.cf', cl=ConsistencyLevel.ALL))
+"""
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from cassandra.query import SimpleStatement
+
+from tools.assertions import DIGEST_MODULUS, multiset_digest
+from tools.metadata_wrapper import refresh_table_metadata
+
+# the tokens of each partitioner, as the exclusive start and inclusive end of the whole ring
+PARTITIONER_RANGES = {
+    'org.apache.cassandra.dht.Murmur3Partitioner': (-2 ** 63, 2 ** 63 - 1),
+    'org.apache.cassandra.dht.RandomPartitioner': (-1, 2 ** 127),
+}
+
+RangeScan = namedtuple('RangeScan', ['start', 'end', 'count', 'digest'])
+
+
+class TableScan(object):
+    """
+    The rows found in each token range (start, end] of a table.
+    """
+
+    def __init__(self, table_name, ranges):
+        self.table_name = table_name
+        self.ranges = sorted(ranges)
+
+    @property
+    def count(self):
+        return sum(r.count for r in self.ranges)
+
+    @property
+    def digest(self):
+        return sum(r.digest for r in self.ranges) % DIGEST_MODULUS
+
+    def differences(self, other):
+        """
+        Return (range of self, range of other) for each token range in which
+        the two scans found different rows. Both must use the same ranges.
+        """
+        if [(r.start, r.end) for r in self.ranges] != [(r.start, r.end) for r in other.ranges]:
+            raise ValueError('Scans of {} and {} did not use the same token ranges'.format(self.table_name, other.table_name))
+        return [(mine, theirs) for mine, theirs in zip(self.ranges, other.ranges)
+                if (mine.count, mine.digest) != (theirs.count, theirs.digest)]
+
+
+def _partitioner(session):
+    row = session.execute('SELECT partitioner FROM system.local')[0]
+    return row['partitioner'] if isinstance(row, dict) else row[0]
+
+
+def token_ranges(session, splits=4):
+    """
+    Split the ring into token ranges (start, end]. If the driver has token
+    metadata, each range between two nodes' tokens is split in splits, so a
+    range is owned by a single set of replicas; otherwise the whole ring is
+    split in 16 * splits.
+    """
+    partitioner = _partitioner(session)
+    if partitioner not in PARTITIONER_RANGES:
+        raise ValueError('Cannot split the token ring of {}'.format(partitioner))
+    lowest, highest = PARTITIONER_RANGES[partitioner]
+
+    token_map = session.cluster.metadata.token_map
+    if token_map is not None:
+        points = sorted(set([lowest, highest] + [token.value for token in token_map.ring]))
+    else:
+        points, splits = [lowest, highest], 16 * splits
+
+    ranges = []
+    for start, end in zip(points, points[1:]):
+        cuts = sorted(set(start + (end - start) * i // splits for i in range(splits)) | set([end]))
+        ranges.extend(zip(cuts, cuts[1:]))
+    return ranges
+
+
+def scan_table(session, table_name, columns=None, cl=None, parallelism=8, splits=4, fetch_size=5000):
+    """
+    Read every row of table_name, scanning up to parallelism token ranges at
+    once, and return a TableScan with the count and digest of each range.
+    @param session Session to use
+    @param table_name Table to scan, optionally qualified by its keyspace
+    @param columns Optional list of the columns to read. Default all of them
+    @param cl Optional Consistency Level setting. Default ONE
+    @param parallelism Optional number of token ranges to scan at once. Default 8
+    @param splits Optional number of parts to split each range between two nodes' tokens in. Default 4
+    @param fetch_size Optional number of rows to fetch at a time. Default 5000
+    """
+    ks_name, _, name = table_name.rpartition('.')
+    ks_name = ks_name or session.keyspace
+    refresh_table_metadata(session.cluster, ks_name, name)
+    partition_key = ', '.join(column.name for column in session.cluster.metadata.keyspaces[ks_name].tables[name].partition_key)
+    query = 'SELECT {} FROM {}.{} WHERE token({key}) > %s AND token({key}) <= %s'.format(
+        ', '.join(columns) if columns else '*', ks_name, name, key=partition_key)
+
+    def scan_range(token_range):
+        start, end = token_range
+        statement = SimpleStatement(query, consistency_level=cl, fetch_size=fetch_size)
+        count, digest = multiset_digest(session.execute(statement, (start, end)))
+        return RangeScan(start, end, count, digest)
+
+    pool = ThreadPool(parallelism)
+    try:
+        return TableScan(table_name, pool.map(scan_range, token_ranges(session, splits)))
+    finally:
+        pool.terminate()
+
+
+def assert_scanned_row_count(session, table_name, expected, **kwargs):
+    """
+    Assert table_name has expected rows, counting them with scan_table, which
+    takes the other arguments.
+
+    Examples:
+    assert_scanned_row_count(session, 'ks.cf', 1000000, cl=ConsistencyLevel.ALL)
+    """
+    count = scan_table(session, table_name, **kwargs).count
+    assert count == expected, "Expected a row count of {} in table '{}', but got {}".format(
+        expected, table_name, count
+    )
+
+
+def assert_scans_equal(first, second, max_shown=10):
+    """
+    Assert two TableScans found the same rows in every token range, listing
+    at most max_shown of the ranges that differ.
+    """
+    differences = first.differences(second)
+    if not differences:
+        return
+    lines = ['Scans of {} and {} differ in {} of {} token ranges (showing at most {}):'.format(
+        first.table_name, second.table_name, len(differences), len(first.ranges), max_shown)]
+    for mine, theirs in differences[:max_shown]:
+        lines.append('    ({}, {}]: {} rows against {}'.format(mine.start, mine.end, mine.count, theirs.count))
+    raise AssertionError('\n'.join(lines))
@@ -14,6 +14,7 @@ from tools.decorators import since
 @since('2.0')
 class TestTTL(Tester):
     """ Test Time To Live Feature """
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def setUp(self):
         super(TestTTL, self).setUp()
@@ -343,6 +344,7 @@ class TestTTL(Tester):
 
 class TestDistributedTTL(Tester):
     """ Test Time To Live Feature in a distributed environment """
+    lazy_driver_metadata = True  # never reads session.cluster.metadata
 
     def setUp(self):
         super(TestDistributedTTL, self).setUp()
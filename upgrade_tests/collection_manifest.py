@@ -0,0 +1,140 @@
+"""
+Usage: collection_manifest.py [--output FILE] [--applicable]
+
+options:
+    --output FILE   write the manifest to FILE instead of stdout
+    --applicable    only print the nosetests names of the classes that apply to the env
+
+A JSON manifest of the test classes generated for each upgrade path by
+cql_tests.py, paging_test.py, regression_test.py and
+upgrade_through_versions_test.py, with the upgrade path and skip status of
+each. It is built from upgrade_manifest.py, so listing the classes doesn't
+import those modules; running any of them does, as nosetests still imports
+the whole module a class is named from. meta_tests/collection_manifest_test.py
+checks the manifest against the classes the modules generate.
+
+The manifest is kept in the probe cache (see tools/probe_cache.py) until the
+modules or the Cassandra under test change. To run only the upgrade tests
+that apply to the current env, without nosetests collecting and skipping the
+others:
+
+    nosetests -v $(python -m upgrade_tests.collection_manifest --applicable)
+"""
+from __future__ import print_function
+
+import ast
+import json
+import os
+
+from docopt import docopt
+
+from dtest import (CASSANDRA_GITREF, CASSANDRA_VERSION_FROM_BUILD,
+                   RUN_STATIC_UPGRADE_MATRIX)
+from tools.probe_cache import cached, file_state
+from upgrade_manifest import (MULTI_UPGRADES, UpgradePath,
+                              build_multi_upgrade_metas, build_upgrade_pairs,
+                              build_upgrade_specs, generated_class_name,
+                              upgrade_applies_to_env)
+
+UPGRADE_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# the modules generating classes, and the modules the classes are generated from
+SOURCES = ('collection_manifest.py', 'upgrade_manifest.py', 'cql_tests.py', 'paging_test.py',
+           'regression_test.py', 'upgrade_through_versions_test.py')
+SKIP_REASON = 'test not applicable to env.'
+
+
+def _subclass_names(module_file, base_name):
+    """
+    Returns the names of the classes in module_file directly subclassing base_name, reading the source
+    rather than importing it, like base_name.__subclasses__() would after an import.
+    """
+    with open(os.path.join(UPGRADE_TESTS_DIR, module_file)) as f:
+        tree = ast.parse(f.read(), module_file)
+    return [node.name for node in tree.body
+            if isinstance(node, ast.ClassDef) and any(isinstance(base, ast.Name) and base.id == base_name for base in node.bases)]
+
+
+def _class_entry(module_file, name, upgrade_path, version_metas, **attributes):
+    entry = {
+        'name': name,
+        'module': 'upgrade_tests/' + module_file,
+        'test': 'upgrade_tests/{}:{}'.format(module_file, name),
+        'upgrade_path': {
+            'name': upgrade_path.name,
+            'starting_version': str(upgrade_path.starting_version),
+            'upgrade_version': str(upgrade_path.upgrade_version),
+            'starting_meta': upgrade_path.starting_meta.name,
+            'upgrade_meta': upgrade_path.upgrade_meta.name,
+        },
+        'versions': [str(meta.version) for meta in version_metas],
+        'skip': None if upgrade_applies_to_env(version_metas[-1]) else SKIP_REASON,
+    }
+    entry.update(attributes)
+    return entry
+
+
+def generated_classes():
+    """
+    Returns a list of dicts describing each test class the upgrade test modules generate, in the order they do.
+    """
+    classes = []
+    for module_file, base_names in (('cql_tests.py', ['TestCQL']),
+                                    ('paging_test.py', _subclass_names('paging_test.py', 'BasePagingTester'))):
+        for base_name in base_names:
+            for spec in build_upgrade_specs():
+                path = spec['UPGRADE_PATH']
+                classes.append(_class_entry(module_file, generated_class_name(base_name, spec), path,
+                                            [path.starting_meta, path.upgrade_meta], nodes=spec['NODES'], rf=spec['RF']))
+
+    for path in build_upgrade_pairs():
+        classes.append(_class_entry('regression_test.py', 'TestForRegressions' + path.name, path,
+                                    [path.starting_meta, path.upgrade_meta]))
+
+    for upgrade in MULTI_UPGRADES:
+        metas = build_multi_upgrade_metas(upgrade)
+        if metas:
+            path = UpgradePath(name=upgrade.name, starting_version=metas[0].version, upgrade_version=metas[-1].version,
+                               starting_meta=metas[0], upgrade_meta=metas[-1])
+            classes.append(_class_entry('upgrade_through_versions_test.py', upgrade.name, path, metas,
+                                        protocol_version=upgrade.protocol_version))
+    for path in build_upgrade_pairs():
+        classes.append(_class_entry('upgrade_through_versions_test.py', 'Test' + path.name, path,
+                                    [path.starting_meta, path.upgrade_meta], protocol_version=path.starting_meta.max_proto_v))
+    return classes
+
+
+def build_manifest():
+    """
+    Returns the manifest of generated upgrade test classes, from the probe cache if it is up to date.
+    """
+    key = [file_state(*[os.path.join(UPGRADE_TESTS_DIR, source) for source in SOURCES]),
+           str(CASSANDRA_VERSION_FROM_BUILD), CASSANDRA_GITREF, RUN_STATIC_UPGRADE_MATRIX]
+
+    def compute():
+        return {'cassandra_version': str(CASSANDRA_VERSION_FROM_BUILD),
+                'run_static_upgrade_matrix': RUN_STATIC_UPGRADE_MATRIX,
+                'classes': generated_classes()}
+    return cached('upgrade_test_manifest', key, compute)
+
+
+def applicable_tests(manifest=None):
+    """
+    Returns the nosetests names of the generated classes that are not skipped in the current env.
+    """
+    manifest = manifest or build_manifest()
+    return [cls['test'] for cls in manifest['classes'] if cls['skip'] is None]
+
+
+if __name__ == '__main__':
+    options = docopt(__doc__)
+    manifest = build_manifest()
+    if options['--applicable']:
+        output = '\n'.join(applicable_tests(manifest))
+    else:
+        output = json.dumps(manifest, indent=2, sort_keys=True)
+
+    if options['--output']:
+        with open(options['--output'], 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
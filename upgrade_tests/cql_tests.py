@@ -1,6 +1,5 @@
 # coding: utf-8
 
-import itertools
 import math
 import random
 import struct
@@ -18,7 +17,7 @@ from cassandra.util import sortedset
 from nose.exc import SkipTest
 from nose.tools import assert_not_in
 
-from dtest import RUN_STATIC_UPGRADE_MATRIX, debug, freshCluster
+from dtest import debug, freshCluster
 from thrift_bindings.v22.ttypes import \
     ConsistencyLevel as ThriftConsistencyLevel
 from thrift_bindings.v22.ttypes import (CfDef, Column, ColumnDef,
@@ -31,7 +30,8 @@ from tools.assertions import (assert_all, assert_invalid, assert_length_equal,
 from tools.data import rows_to_list
 from tools.decorators import known_failure, since
 from upgrade_base import UpgradeTester
-from upgrade_manifest import build_upgrade_pairs
+from upgrade_manifest import (build_upgrade_specs, generated_class_name,
+                              upgrade_applies_to_env)
 
 
 class TestCQL(UpgradeTester):
@@ -5245,22 +5245,8 @@ class TestCQL(UpgradeTester):
             assert_one(cursor, "SELECT * FROM foo.bar", [0, 0])
 
 
-topology_specs = [
-    {'NODES': 3,
-     'RF': 3,
-     'CL': ConsistencyLevel.ALL},
-    {'NODES': 2,
-     'RF': 1},
-]
-specs = [dict(s, UPGRADE_PATH=p, __test__=True)
-         for s, p in itertools.product(topology_specs, build_upgrade_pairs())]
-
-for spec in specs:
-    suffix = 'Nodes{num_nodes}RF{rf}_{pathname}'.format(num_nodes=spec['NODES'],
-                                                        rf=spec['RF'],
-                                                        pathname=spec['UPGRADE_PATH'].name)
-    gen_class_name = TestCQL.__name__ + suffix
+for spec in build_upgrade_specs():
+    gen_class_name = generated_class_name(TestCQL.__name__, spec)
     assert_not_in(gen_class_name, globals())
 
-    upgrade_applies_to_env = RUN_STATIC_UPGRADE_MATRIX or spec['UPGRADE_PATH'].upgrade_meta.matches_current_env_version_family
-    globals()[gen_class_name] = skipUnless(upgrade_applies_to_env, 'test not applicable to env.')(type(gen_class_name, (TestCQL,), spec))
+    globals()[gen_class_name] = skipUnless(upgrade_applies_to_env(spec['UPGRADE_PATH'].upgrade_meta), 'test not applicable to env.')(type(gen_class_name, (TestCQL,), spec))
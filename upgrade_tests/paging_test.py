@@ -1,4 +1,3 @@
-import itertools
 import time
 import uuid
 from unittest import SkipTest, skipUnless
@@ -9,14 +8,15 @@ from cassandra.query import SimpleStatement, dict_factory, named_tuple_factory
 from ccmlib.common import LogPatternToVersion
 from nose.tools import assert_not_in
 
-from dtest import RUN_STATIC_UPGRADE_MATRIX, debug, run_scenarios
+from dtest import debug, run_scenarios
 from tools.assertions import assert_read_timeout_or_failure
 from tools.data import rows_to_list
 from tools.datahelp import create_rows, flatten_into_set, parse_data_into_dicts
 from tools.decorators import known_failure, since
 from tools.paging import PageAssertionMixin, PageFetcher
 from upgrade_base import UpgradeTester
-from upgrade_manifest import build_upgrade_pairs
+from upgrade_manifest import (build_upgrade_specs, generated_class_name,
+                              upgrade_applies_to_env)
 
 
 class BasePagingTester(UpgradeTester):
@@ -58,7 +58,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
 
             pf = PageFetcher(future)
             pf.request_all()
-            self.assertEqual([], pf.all_data())
+            self.assertEqual([], pf.view())
             self.assertFalse(pf.has_more_pages)
 
     def test_with_less_results_than_page_size(self):
@@ -87,7 +87,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
             pf.request_all()
 
             self.assertFalse(pf.has_more_pages)
-            self.assertEqual(len(expected_data), len(pf.all_data()))
+            self.assertEqual(len(expected_data), len(pf.view()))
 
     def test_with_more_results_than_page_size(self):
         cursor = self.prepare()
@@ -122,7 +122,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.num_results_all(), [5, 4])
 
             # make sure expected and actual have same data elements (ignoring order)
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_with_equal_results_to_page_size(self):
         cursor = self.prepare()
@@ -153,7 +153,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.pagecount(), 1)
 
             # make sure expected and actual have same data elements (ignoring order)
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_undefined_page_size_default(self):
         """
@@ -186,7 +186,7 @@ class TestPagingSize(BasePagingTester, PageAssertionMixin):
 
             self.maxDiff = None
             # make sure expected and actual have same data elements (ignoring order)
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
 
 class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
@@ -240,7 +240,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.num_results_all(), [5, 5])
 
             # these should be equal (in the same order)
-            self.assertEqual(pf.all_data(), expected_data)
+            self.assertEqual(pf.view(), expected_data)
 
             # make sure we don't allow paging over multiple partitions with order because that's weird
             with self.assertRaisesRegexp(InvalidRequest, 'Cannot page queries with both ORDER BY and a IN restriction on the partition key'):
@@ -295,7 +295,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.num_results_all(), [3, 3, 3, 1])
 
             # these should be equal (in the same order)
-            self.assertEqual(pf.all_data(), expected_data)
+            self.assertEqual(pf.view(), expected_data)
 
             # drop the ORDER BY
             future = cursor.execute_async(
@@ -308,7 +308,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.num_results_all(), [3, 3, 3, 1])
 
             # these should be equal (in the same order)
-            self.assertEqual(pf.all_data(), list(reversed(expected_data)))
+            self.assertEqual(pf.view(), list(reversed(expected_data)))
 
     def test_with_limit(self):
         cursor = self.prepare()
@@ -392,7 +392,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
                 self.assertEqual(pf.pagecount(), scenario['expect_pgcount'])
 
                 # make sure all the data retrieved is a subset of input data
-                self.assertIsSubsetOf(pf.all_data(), expected_data)
+                self.assertIsSubsetOf(pf.view(), expected_data)
 
             run_scenarios(scenarios, handle_scenario, deferred_exceptions=(AssertionError,))
 
@@ -430,7 +430,7 @@ class TestPagingWithModifiers(BasePagingTester, PageAssertionMixin):
 
             # make sure the allow filtering query matches the expected results (ignoring order)
             self.assertEqualIgnoreOrder(
-                pf.all_data(),
+                pf.view(),
                 parse_data_into_dicts(
                     """
                     |id|value           |
@@ -571,7 +571,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.pagecount(), 4)
             self.assertEqual(pf.num_results_all(), [3000, 3000, 3000, 1000])
 
-            all_results = pf.all_data()
+            all_results = pf.view()
             self.assertEqual(len(expected_data), len(all_results))
             self.maxDiff = None
             self.assertEqualIgnoreOrder(expected_data, all_results)
@@ -604,7 +604,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.pagecount(), 4)
             self.assertEqual(pf.num_results_all(), [3000, 3000, 3000, 1000])
 
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_paging_using_secondary_indexes(self):
         cursor = self.prepare()
@@ -645,7 +645,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
 
             self.assertEqual(pf.pagecount(), 2)
             self.assertEqual(pf.num_results_all(), [400, 200])
-            self.assertEqualIgnoreOrder(expected_data, pf.all_data())
+            self.assertEqualIgnoreOrder(expected_data, pf.view())
 
     @known_failure(failure_source='test',
                    jira_url='https://issues.apache.org/jira/browse/CASSANDRA-12491',
@@ -919,7 +919,7 @@ class TestPagingData(BasePagingTester, PageAssertionMixin):
 
             self.assertEqual(pf.pagecount(), 2)
             self.assertEqual(pf.num_results_all(), [400, 200])
-            self.assertEqualIgnoreOrder(expected_data, pf.all_data())
+            self.assertEqualIgnoreOrder(expected_data, pf.view())
 
 
 class TestPagingDatasetChanges(BasePagingTester, PageAssertionMixin):
@@ -962,7 +962,7 @@ class TestPagingDatasetChanges(BasePagingTester, PageAssertionMixin):
             self.assertEqual(pf.pagecount(), 2)
             self.assertEqual(pf.num_results_all(), [501, 499])
 
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     def test_data_change_impacting_later_page(self):
         cursor = self.prepare()
@@ -1000,7 +1000,7 @@ class TestPagingDatasetChanges(BasePagingTester, PageAssertionMixin):
 
             # add the new row to the expected data and then do a compare
             expected_data.append({u'id': 2, u'mytext': u'foo'})
-            self.assertEqualIgnoreOrder(pf.all_data(), expected_data)
+            self.assertEqualIgnoreOrder(pf.view(), expected_data)
 
     @known_failure(failure_source='test',
                    jira_url='https://issues.apache.org/jira/browse/CASSANDRA-12400',
@@ -1200,17 +1200,17 @@ class TestPagingQueryIsolation(BasePagingTester, PageAssertionMixin):
             self.assertEqual(page_fetchers[9].pagecount(), 4)
             self.assertEqual(page_fetchers[10].pagecount(), 34)
 
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[0].all_data()), flatten_into_set(expected_data[:5000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[1].all_data()), flatten_into_set(expected_data[5000:10000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[2].all_data()), flatten_into_set(expected_data[10000:15000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[3].all_data()), flatten_into_set(expected_data[15000:20000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[4].all_data()), flatten_into_set(expected_data[20000:25000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[5].all_data()), flatten_into_set(expected_data[:5000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[6].all_data()), flatten_into_set(expected_data[5000:10000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[7].all_data()), flatten_into_set(expected_data[10000:15000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[8].all_data()), flatten_into_set(expected_data[15000:20000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[9].all_data()), flatten_into_set(expected_data[20000:25000]))
-            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[10].all_data()), flatten_into_set(expected_data[:50000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[0].view()), flatten_into_set(expected_data[:5000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[1].view()), flatten_into_set(expected_data[5000:10000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[2].view()), flatten_into_set(expected_data[10000:15000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[3].view()), flatten_into_set(expected_data[15000:20000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[4].view()), flatten_into_set(expected_data[20000:25000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[5].view()), flatten_into_set(expected_data[:5000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[6].view()), flatten_into_set(expected_data[5000:10000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[7].view()), flatten_into_set(expected_data[10000:15000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[8].view()), flatten_into_set(expected_data[15000:20000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[9].view()), flatten_into_set(expected_data[20000:25000]))
+            self.assertEqualIgnoreOrder(flatten_into_set(page_fetchers[10].view()), flatten_into_set(expected_data[:50000]))
 
 
 class TestPagingWithDeletions(BasePagingTester, PageAssertionMixin):
@@ -1248,6 +1248,7 @@ class TestPagingWithDeletions(BasePagingTester, PageAssertionMixin):
 
         pf = self.get_page_fetcher(cursor)
         pf.request_all()
+        # the tests change the rows returned, so copy them out of the pages
         return pf.all_data()
 
     def get_page_fetcher(self, cursor):
@@ -1545,24 +1546,9 @@ class TestPagingWithDeletions(BasePagingTester, PageAssertionMixin):
                                                        timeout_seconds=50)
 
 
-topology_specs = [
-    {'NODES': 3,
-     'RF': 3,
-     'CL': CL.ALL},
-    {'NODES': 2,
-     'RF': 1},
-]
-
-specs = [dict(s, UPGRADE_PATH=p, __test__=True)
-         for s, p in itertools.product(topology_specs, build_upgrade_pairs())]
-
 for klaus in BasePagingTester.__subclasses__():
-    for spec in specs:
-        suffix = 'Nodes{num_nodes}RF{rf}_{pathname}'.format(num_nodes=spec['NODES'],
-                                                            rf=spec['RF'],
-                                                            pathname=spec['UPGRADE_PATH'].name)
-        gen_class_name = klaus.__name__ + suffix
+    for spec in build_upgrade_specs():
+        gen_class_name = generated_class_name(klaus.__name__, spec)
         assert_not_in(gen_class_name, globals())
 
-        upgrade_applies_to_env = RUN_STATIC_UPGRADE_MATRIX or spec['UPGRADE_PATH'].upgrade_meta.matches_current_env_version_family
-        globals()[gen_class_name] = skipUnless(upgrade_applies_to_env, 'test not applicable to env.')(type(gen_class_name, (klaus,), spec))
+        globals()[gen_class_name] = skipUnless(upgrade_applies_to_env(spec['UPGRADE_PATH'].upgrade_meta), 'test not applicable to env.')(type(gen_class_name, (klaus,), spec))
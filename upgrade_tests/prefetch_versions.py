@@ -0,0 +1,179 @@
+"""
+Usage: prefetch_versions.py [--all] [--workers N] [--mirror DIR] [--output FILE]
+
+options:
+    --all           prefetch the versions of every upgrade path, not only of those applicable to the env
+    --workers N     number of versions to fetch and build at once [default: 4]
+    --mirror DIR    take releases from the apache-cassandra-VERSION-bin.tar.gz or
+                    apache-cassandra-VERSION-src.tar.gz tarballs in DIR, and git: versions
+                    from the git repository DIR/cassandra.git, instead of the network
+    --output FILE   where to write the manifest of prefetched versions. Default
+                    prefetch.json in ccm's repository directory
+
+Fetches and builds every Cassandra version the upgrade tests install, from
+build_upgrade_pairs() and MULTI_UPGRADES in upgrade_manifest.py, into ccm's
+repository before the tests run, so the download and ant build of a version
+doesn't happen in the middle of a test and count against its timeouts. Run
+it from the dtest directory with the environment the tests will use:
+
+    python -m upgrade_tests.prefetch_versions --workers 4
+
+The manifest lists each version with its install directory, or the error
+that kept it from being ready and the ccm log of its fetch and build, and the
+exit status is 1 if any wasn't.
+"""
+from __future__ import print_function
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from ccmlib import repository
+from ccmlib.common import get_default_path
+from docopt import docopt
+
+from upgrade_manifest import (MULTI_UPGRADES, build_multi_upgrade_metas,
+                              build_upgrade_pairs, upgrade_applies_to_env)
+
+MIRROR_GIT_REPO = 'cassandra.git'
+MIRROR_TARBALLS = ('apache-cassandra-{}-bin.tar.gz', 'apache-cassandra-{}-src.tar.gz')
+
+
+def needed_versions(applicable_only=True):
+    """
+    Returns an OrderedDict of each version ccm installs for the upgrade paths to the names of those paths.
+    If applicable_only is True, only the paths whose tests aren't skipped in the current env are considered.
+    """
+    paths = [(pair.name, [pair.starting_meta, pair.upgrade_meta]) for pair in build_upgrade_pairs()]
+    paths.extend((upgrade.name, build_multi_upgrade_metas(upgrade)) for upgrade in MULTI_UPGRADES)
+
+    versions = OrderedDict()
+    for name, metas in paths:
+        if not metas or (applicable_only and not upgrade_applies_to_env(metas[-1])):
+            continue
+        for meta in metas:
+            # a LooseVersion is a CASSANDRA_DIR that isn't a git checkout, which ccm can't fetch; a
+            # git checkout is 'git:<sha>', which ccm fetches for the tests like any other version
+            if isinstance(meta.version, basestring):
+                versions.setdefault(meta.version, []).append(name)
+    return versions
+
+
+def _git_source(version, mirror=None):
+    """
+    Returns what identifies the git repository ccm clones version from, or None if it doesn't need one.
+    Versions cloned from the same repository share one cache in ccm's repository directory. ccm builds
+    a release it fails to download from the apache repository, so releases that are neither installed
+    nor mirrored may need it too.
+    """
+    if version.startswith('git:'):
+        return 'apache'
+    if version.startswith('github:'):
+        return repository.github_username_and_branch_name(version)[0]
+    if version.startswith('local:'):
+        return version.split(':')[1]
+    if _mirrored_tarball(mirror, version) is None and repository.version_directory(version) is None:
+        return 'apache'
+    return None
+
+
+def _fetch_order(versions, mirror=None):
+    """
+    Returns the versions in two batches to fetch one after the other. The first holds a single version
+    for each git repository, so its cache is created or updated by one fetch only, and the second the
+    other versions of those repositories.
+    """
+    first, second, sources = [], [], set()
+    for version in versions:
+        source = _git_source(version, mirror)
+        if source is not None and source in sources:
+            second.append(version)
+        else:
+            sources.add(source)
+            first.append(version)
+    return first, second
+
+
+def _mirrored_tarball(mirror, version):
+    if mirror is None:
+        return None
+    for name in MIRROR_TARBALLS:
+        path = os.path.join(mirror, name.format(version))
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+
+# ccm logs every fetch and build to the single file lastlogfilename() returns, which the versions
+# fetched at once would overwrite, so prefetch has it return the log of the version each thread fetches
+_thread_state = threading.local()
+
+
+def version_logfilename(version):
+    """
+    Returns the file ccm logs the fetch and build of version to while it is prefetched.
+    """
+    return os.path.join(get_default_path(), 'repository', 'prefetch-{}.log'.format(re.sub(r'[^\w.-]', '_', version)))
+
+
+def prefetch_version(version, mirror=None):
+    """
+    Makes ccm fetch and build version, unless it already has, and returns a manifest entry for it.
+    """
+    start = time.time()
+    entry = OrderedDict([('version', version), ('log', version_logfilename(version))])
+    _thread_state.logfile = entry['log']
+    try:
+        tarball = _mirrored_tarball(mirror, version)
+        if tarball is not None and repository.version_directory(version) is None:
+            repository.download_version(version, url='file://' + tarball, binary=tarball.endswith('-bin.tar.gz'))
+        install_dir, _ = repository.setup(version)
+        entry.update(ready=True, install_dir=install_dir)
+    except Exception as e:
+        entry.update(ready=False, error='{}: {}'.format(type(e).__name__, e))
+    finally:
+        _thread_state.logfile = None
+    entry['seconds'] = round(time.time() - start, 1)
+    return entry
+
+
+def prefetch(versions, workers=4, mirror=None):
+    """
+    Fetches and builds versions, workers of them at once, and returns a list of manifest entries for them.
+    """
+    if mirror is not None and os.path.isdir(os.path.join(mirror, MIRROR_GIT_REPO)):
+        repository.GIT_REPO = os.path.abspath(os.path.join(mirror, MIRROR_GIT_REPO))
+
+    entries = []
+    pool = ThreadPool(workers)
+    ccm_lastlogfilename = repository.lastlogfilename
+    repository.lastlogfilename = lambda: getattr(_thread_state, 'logfile', None) or ccm_lastlogfilename()
+    try:
+        for batch in _fetch_order(versions, mirror):
+            entries.extend(pool.map(lambda version: prefetch_version(version, mirror), batch))
+    finally:
+        pool.terminate()
+        repository.lastlogfilename = ccm_lastlogfilename
+    return entries
+
+
+if __name__ == '__main__':
+    options = docopt(__doc__)
+    versions = needed_versions(applicable_only=not options['--all'])
+    entries = prefetch(versions, workers=int(options['--workers']), mirror=options['--mirror'])
+    for entry in entries:
+        entry['needed_by'] = versions[entry['version']]
+
+    output = options['--output'] or os.path.join(get_default_path(), 'repository', 'prefetch.json')
+    with open(output, 'w') as f:
+        json.dump({'mirror': options['--mirror'], 'versions': entries}, f, indent=2)
+
+    for entry in entries:
+        print('{:<40} {}'.format(entry['version'], entry['install_dir'] if entry['ready'] else 'FAILED {} (see {})'.format(entry['error'], entry['log'])))
+    print('Wrote {}'.format(output))
+    sys.exit(0 if all(entry['ready'] for entry in entries) else 1)
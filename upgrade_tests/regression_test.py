@@ -6,9 +6,8 @@ from unittest import skipUnless
 from cassandra import ConsistencyLevel as CL
 from nose.tools import assert_not_in
 
-from dtest import RUN_STATIC_UPGRADE_MATRIX
 from upgrade_base import UpgradeTester
-from upgrade_manifest import build_upgrade_pairs
+from upgrade_manifest import build_upgrade_pairs, upgrade_applies_to_env
 
 
 class TestForRegressions(UpgradeTester):
@@ -67,5 +66,4 @@ for path in build_upgrade_pairs():
     spec = {'UPGRADE_PATH': path,
             '__test__': True}
 
-    upgrade_applies_to_env = RUN_STATIC_UPGRADE_MATRIX or path.upgrade_meta.matches_current_env_version_family
-    globals()[gen_class_name] = skipUnless(upgrade_applies_to_env, 'test not applicable to env.')(type(gen_class_name, (TestForRegressions,), spec))
+    globals()[gen_class_name] = skipUnless(upgrade_applies_to_env(path.upgrade_meta), 'test not applicable to env.')(type(gen_class_name, (TestForRegressions,), spec))
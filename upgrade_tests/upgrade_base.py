@@ -7,6 +7,7 @@ from unittest import skipIf
 from ccmlib.common import get_version_from_build, is_win
 
 from dtest import CASSANDRA_VERSION_FROM_BUILD, DEBUG, Tester, debug
+from tools import cluster_image
 
 
 def switch_jdks(major_version_int):
@@ -101,20 +102,78 @@ class UpgradeTester(Tester):
         cluster.populate(nodes)
         node1 = cluster.nodelist()[0]
         cluster.set_install_dir(version=self.UPGRADE_PATH.starting_version)
-        cluster.start(wait_for_binary_proto=True)
+
+        baseline_path = self._baseline_image_path(rf) if create_keyspace else None
+        restored = self._start_from_baseline(baseline_path)
 
         node1 = cluster.nodelist()[0]
         time.sleep(0.2)
 
         session = self.patient_cql_connection(node1, protocol_version=protocol_version)
-        if create_keyspace:
+        if restored:
+            session.set_keyspace('ks')
+        elif create_keyspace:
             self.create_ks(session, 'ks', rf)
+            if baseline_path is not None:
+                session = self._save_baseline_image(baseline_path, session, protocol_version)
 
         if cl:
             session.default_consistency_level = cl
 
         return session
 
+    def _baseline_image_path(self, rf):
+        """
+        Returns where the image of this cluster, started on the starting version with keyspace 'ks' created,
+        is cached, or None if cluster images are disabled. Many generated classes share a starting version
+        and topology, so they share the image and skip bootstrapping and creating the keyspace. The key
+        includes the build of the starting version's install, so refetching or rebuilding a branch such as
+        git:cassandra-3.0 in ccm's repository doesn't restore a baseline written by the previous build.
+        """
+        image_dir = getattr(self.cluster, 'image_dir', None)
+        if image_dir is None or not cluster_image.is_pristine(self.cluster):
+            return None
+        return os.path.join(image_dir, cluster_image.image_key(self.cluster, schema={'ks': rf}))
+
+    def _start_from_baseline(self, baseline_path):
+        """
+        Starts the cluster, restoring the baseline image at baseline_path first if there is one, and returns
+        whether it did. While a baseline is still to be built, the cluster doesn't save the image of a cluster
+        without keyspace 'ks' that it otherwise would, as upgrade tests only use baselines.
+        """
+        if baseline_path is not None and os.path.isdir(baseline_path):
+            debug("restoring upgrade baseline from {}".format(baseline_path))
+            cluster_image.restore_image(baseline_path, self.cluster)
+            self.cluster.start(wait_for_binary_proto=True)
+            return True
+
+        if baseline_path is None:
+            self.cluster.start(wait_for_binary_proto=True)
+            return False
+
+        image_dir = self.cluster.image_dir
+        self.cluster.image_dir = None
+        try:
+            self.cluster.start(wait_for_binary_proto=True)
+        finally:
+            self.cluster.image_dir = image_dir
+        return False
+
+    def _save_baseline_image(self, baseline_path, session, protocol_version):
+        """
+        Saves the cluster as the baseline image at baseline_path, stopping it cleanly so that the image
+        doesn't depend on commitlog replay, and returns a new session once it is started again.
+        """
+        debug("saving upgrade baseline to {}".format(baseline_path))
+        session.cluster.shutdown()
+        self.cluster.stop(gently=True)
+        cluster_image.save_image(baseline_path, self.cluster)
+        self.cluster.start(wait_for_binary_proto=True)
+
+        session = self.patient_cql_connection(self.cluster.nodelist()[0], protocol_version=protocol_version)
+        session.set_keyspace('ks')
+        return session
+
     def do_upgrade(self, session, return_nodes=False):
         """
         Upgrades the first node in the cluster and returns a list of
@@ -1,5 +1,8 @@
+import itertools
 from collections import namedtuple
 
+from cassandra import ConsistencyLevel
+
 from dtest import (CASSANDRA_GITREF, CASSANDRA_VERSION_FROM_BUILD,
                    RUN_STATIC_UPGRADE_MATRIX, debug)
 
@@ -186,3 +189,98 @@ def build_upgrade_pairs():
             )
 
     return valid_upgrade_pairs
+
+
+def upgrade_applies_to_env(upgrade_meta):
+    """
+    Returns a boolean indicating whether tests upgrading to upgrade_meta should run in the current env.
+    """
+    return RUN_STATIC_UPGRADE_MATRIX or upgrade_meta.matches_current_env_version_family
+
+
+# The cluster topologies each upgrade path is tested with by the generated classes of cql_tests.py and paging_test.py
+TOPOLOGY_SPECS = [
+    {'NODES': 3,
+     'RF': 3,
+     'CL': ConsistencyLevel.ALL},
+    {'NODES': 2,
+     'RF': 1},
+]
+
+
+def build_upgrade_specs():
+    """
+    Returns a list of class attribute dicts, one for each topology spec and upgrade path, to generate test classes from.
+    """
+    return [dict(s, UPGRADE_PATH=p, __test__=True)
+            for s, p in itertools.product(TOPOLOGY_SPECS, build_upgrade_pairs())]
+
+
+def generated_class_name(base_name, spec):
+    """
+    Returns the name of the class generated from the class named base_name for spec, one of build_upgrade_specs().
+    """
+    return base_name + 'Nodes{num_nodes}RF{rf}_{pathname}'.format(num_nodes=spec['NODES'],
+                                                                  rf=spec['RF'],
+                                                                  pathname=spec['UPGRADE_PATH'].name)
+
+
+MultiUpgrade = namedtuple('MultiUpgrade', ('name', 'version_metas', 'protocol_version', 'extra_config'))
+
+MULTI_UPGRADES = (
+    # Proto v1 upgrades (v1 supported on 2.0, 2.1, 2.2)
+    MultiUpgrade(name='ProtoV1Upgrade_AllVersions_EndsAt_indev_2_2_x',
+                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=1, extra_config=None),
+    MultiUpgrade(name='ProtoV1Upgrade_AllVersions_RandomPartitioner_EndsAt_indev_2_2_x',
+                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=1,
+                 extra_config=(
+                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
+                 )),
+
+    # Proto v2 upgrades (v2 is supported on 2.0, 2.1, 2.2)
+    MultiUpgrade(name='ProtoV2Upgrade_AllVersions_EndsAt_indev_2_2_x',
+                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=2, extra_config=None),
+    MultiUpgrade(name='ProtoV2Upgrade_AllVersions_RandomPartitioner_EndsAt_indev_2_2_x',
+                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=2,
+                 extra_config=(
+                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
+                 )),
+
+    # Proto v3 upgrades (v3 is supported on 2.1, 2.2, 3.0, 3.1, trunk)
+    MultiUpgrade(name='ProtoV3Upgrade_AllVersions_EndsAt_Trunk_HEAD',
+                 version_metas=[current_2_1_x, current_2_2_x, current_3_0_x, indev_3_x], protocol_version=3, extra_config=None),
+    MultiUpgrade(name='ProtoV3Upgrade_AllVersions_RandomPartitioner_EndsAt_Trunk_HEAD',
+                 version_metas=[current_2_1_x, current_2_2_x, current_3_0_x, indev_3_x], protocol_version=3,
+                 extra_config=(
+                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
+                 )),
+
+    # Proto v4 upgrades (v4 is supported on 2.2, 3.0, 3.1, trunk)
+    MultiUpgrade(name='ProtoV4Upgrade_AllVersions_EndsAt_Trunk_HEAD',
+                 version_metas=[current_2_2_x, current_3_0_x, indev_3_x], protocol_version=4, extra_config=None),
+    MultiUpgrade(name='ProtoV4Upgrade_AllVersions_RandomPartitioner_EndsAt_Trunk_HEAD',
+                 version_metas=[current_2_2_x, current_3_0_x, indev_3_x], protocol_version=4,
+                 extra_config=(
+                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
+                 )),
+)
+
+
+def build_multi_upgrade_metas(upgrade):
+    """
+    Returns the list of VersionMeta's a MultiUpgrade goes through, with the final one matching the env exactly
+    if the upgrade applies to it, or None if any of its versions is not to be tested currently.
+    """
+    # if any version_metas are None, this means they are versions not to be tested currently
+    if not all(upgrade.version_metas):
+        return None
+
+    metas = list(upgrade.version_metas)
+    if not RUN_STATIC_UPGRADE_MATRIX:
+        if metas[-1].matches_current_env_version_family:
+            # looks like this test should actually run in the current env, so let's set the final version to match the env exactly
+            oldmeta = metas[-1]
+            newmeta = oldmeta.clone_with_local_env_version()
+            debug("{} appears applicable to current env. Overriding final test version from {} to {}".format(upgrade.name, oldmeta.version, newmeta.version))
+            metas[-1] = newmeta
+    return metas
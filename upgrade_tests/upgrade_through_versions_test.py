@@ -5,7 +5,7 @@ import random
 import signal
 import time
 import uuid
-from collections import defaultdict, namedtuple
+from collections import defaultdict
 from multiprocessing import Process, Queue
 from Queue import Empty, Full
 from unittest import skipUnless
@@ -14,15 +14,13 @@ import psutil
 from cassandra import ConsistencyLevel, WriteTimeout
 from cassandra.query import SimpleStatement
 from nose.plugins.attrib import attr
-from six import print_
 
-from dtest import RUN_STATIC_UPGRADE_MATRIX, Tester, debug
+from dtest import Tester, debug
 from tools.decorators import known_failure
-from tools.misc import generate_ssl_stores, new_node
+from tools.misc import generate_ssl_stores, new_node, run_on_nodes
 from upgrade_base import switch_jdks
-from upgrade_manifest import (build_upgrade_pairs, current_2_0_x,
-                              current_2_1_x, current_2_2_x, current_3_0_x,
-                              indev_2_2_x, indev_3_x)
+from upgrade_manifest import (MULTI_UPGRADES, build_multi_upgrade_metas,
+                              build_upgrade_pairs, upgrade_applies_to_env)
 
 
 def data_writer(tester, to_verify_queue, verification_done_queue, rewrite_probability=0):
@@ -230,6 +228,9 @@ class UpgradeTester(Tester):
     test_version_metas = None  # set on init to know which versions to use
     subprocs = None  # holds any subprocesses, for status checking and cleanup
     extra_config = None  # holds a non-mutable structure that can be cast as dict()
+    # how many nodes upgrade_to_version drains and stops at a time (None for all of them), and starts at a time
+    upgrade_stop_concurrency = None
+    upgrade_start_concurrency = 3
     __test__ = False  # this is a base class only
     ignore_log_patterns = (
         # This one occurs if we do a non-rolling upgrade, the node
@@ -422,21 +423,27 @@ class UpgradeTester(Tester):
         Upgrade Nodes - if *partial* is True, only upgrade those nodes
         that are specified by *nodes*, otherwise ignore *nodes* specified
         and upgrade all nodes.
+
+        The nodes are drained and stopped upgrade_stop_concurrency at a time,
+        switched to the new version together, and started again
+        upgrade_start_concurrency at a time, seeds before the other nodes.
         """
         debug('Upgrading {nodes} to {version}'.format(nodes=[n.name for n in nodes] if nodes is not None else 'all nodes', version=version_meta.version))
         switch_jdks(version_meta.java_version)
         debug("JAVA_HOME: " + os.environ.get('JAVA_HOME'))
         if not partial:
             nodes = self.cluster.nodelist()
+        nodes = list(nodes)
+        if not nodes:
+            return
 
-        for node in nodes:
-            debug('Shutting down node: ' + node.name)
-            node.drain()
-            node.watch_log_for("DRAINED")
-            node.stop(wait_other_notice=False)
+        run_on_nodes(self._stop_for_upgrade, nodes, self.upgrade_stop_concurrency)
 
+        # ccm fetches and builds the version for the first node if it has to; the others reuse its install dir
+        nodes[0].set_install_dir(version=version_meta.version)
+        install_dir = nodes[0].get_install_dir()
+        run_on_nodes(lambda node: node.set_install_dir(install_dir=install_dir), nodes[1:])
         for node in nodes:
-            node.set_install_dir(version=version_meta.version)
             debug("Set new cassandra dir for %s: %s" % (node.name, node.get_install_dir()))
 
         # hacky? yes. We could probably extend ccm to allow this publicly.
@@ -444,13 +451,33 @@ class UpgradeTester(Tester):
         # otherwise they won't be grouped into dc's properly for multi-dc tests
         self.cluster._Cluster__update_topology_files()
 
-        # Restart nodes on new version
-        for node in nodes:
-            debug('Starting %s on new version (%s)' % (node.name, version_meta.version))
-            # Setup log4j / logback again (necessary moving from 2.0 -> 2.1):
-            node.set_log_level("INFO")
-            node.start(wait_other_notice=240, wait_for_binary_proto=True)
-            node.nodetool('upgradesstables -a')
+        # Restart nodes on new version, the seeds first so the other nodes have someone to gossip with
+        marks = {node: node.mark_log() for node in self.cluster.nodelist()}
+        seeds = self.cluster.get_seeds()
+        for group in ([node for node in nodes if node.network_interfaces['storage'][0] in seeds],
+                      [node for node in nodes if node.network_interfaces['storage'][0] not in seeds]):
+            run_on_nodes(lambda node: self._start_upgraded_node(node, version_meta), group, self.upgrade_start_concurrency)
+
+        # the nodes were started without waiting for each other, so wait for every running node to see them up
+        for other in self.cluster.nodelist():
+            started = [node for node in nodes if node is not other]
+            if started and other.is_running():
+                other.watch_log_for_alive(started, from_mark=marks[other], timeout=240)
+
+        run_on_nodes(lambda node: node.nodetool('upgradesstables -a'), nodes, self.upgrade_start_concurrency)
+
+    def _stop_for_upgrade(self, node):
+        debug('Shutting down node: ' + node.name)
+        mark = node.mark_log()
+        node.drain()
+        node.watch_log_for("DRAINED", from_mark=mark)
+        node.stop(wait_other_notice=False)
+
+    def _start_upgraded_node(self, node, version_meta):
+        debug('Starting %s on new version (%s)' % (node.name, version_meta.version))
+        # Setup log4j / logback again (necessary moving from 2.0 -> 2.1):
+        node.set_log_level("INFO")
+        node.start(wait_other_notice=False, wait_for_binary_proto=True)
 
     def _log_current_ver(self, current_version_meta):
         """
@@ -771,14 +798,12 @@ def create_upgrade_class(clsname, version_metas, protocol_version,
     # short names for debug output
     parent_class_names = [cls.__name__ for cls in parent_classes]
 
-    print_("Creating test class {} ".format(clsname))
-    print_("  for C* versions:\n{} ".format(pprint.pformat(version_metas)))
-    print_("  using protocol: v{}, and parent classes: {}".format(protocol_version, parent_class_names))
-    print_("  to run these tests alone, use `nosetests {}.py:{}`".format(__name__, clsname))
+    debug("Creating test class {} ".format(clsname))
+    debug("  for C* versions:\n{} ".format(pprint.pformat(version_metas)))
+    debug("  using protocol: v{}, and parent classes: {}".format(protocol_version, parent_class_names))
+    debug("  to run these tests alone, use `nosetests {}.py:{}`".format(__name__, clsname))
 
-    upgrade_applies_to_env = RUN_STATIC_UPGRADE_MATRIX or version_metas[-1].matches_current_env_version_family
-
-    newcls = skipUnless(upgrade_applies_to_env, 'test not applicable to env.')(
+    newcls = skipUnless(upgrade_applies_to_env(version_metas[-1]), 'test not applicable to env.')(
         type(
             clsname,
             parent_classes,
@@ -792,60 +817,10 @@ def create_upgrade_class(clsname, version_metas, protocol_version,
     return newcls
 
 
-MultiUpgrade = namedtuple('MultiUpgrade', ('name', 'version_metas', 'protocol_version', 'extra_config'))
-
-MULTI_UPGRADES = (
-    # Proto v1 upgrades (v1 supported on 2.0, 2.1, 2.2)
-    MultiUpgrade(name='ProtoV1Upgrade_AllVersions_EndsAt_indev_2_2_x',
-                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=1, extra_config=None),
-    MultiUpgrade(name='ProtoV1Upgrade_AllVersions_RandomPartitioner_EndsAt_indev_2_2_x',
-                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=1,
-                 extra_config=(
-                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
-                 )),
-
-    # Proto v2 upgrades (v2 is supported on 2.0, 2.1, 2.2)
-    MultiUpgrade(name='ProtoV2Upgrade_AllVersions_EndsAt_indev_2_2_x',
-                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=2, extra_config=None),
-    MultiUpgrade(name='ProtoV2Upgrade_AllVersions_RandomPartitioner_EndsAt_indev_2_2_x',
-                 version_metas=[current_2_0_x, current_2_1_x, indev_2_2_x], protocol_version=2,
-                 extra_config=(
-                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
-                 )),
-
-    # Proto v3 upgrades (v3 is supported on 2.1, 2.2, 3.0, 3.1, trunk)
-    MultiUpgrade(name='ProtoV3Upgrade_AllVersions_EndsAt_Trunk_HEAD',
-                 version_metas=[current_2_1_x, current_2_2_x, current_3_0_x, indev_3_x], protocol_version=3, extra_config=None),
-    MultiUpgrade(name='ProtoV3Upgrade_AllVersions_RandomPartitioner_EndsAt_Trunk_HEAD',
-                 version_metas=[current_2_1_x, current_2_2_x, current_3_0_x, indev_3_x], protocol_version=3,
-                 extra_config=(
-                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
-                 )),
-
-    # Proto v4 upgrades (v4 is supported on 2.2, 3.0, 3.1, trunk)
-    MultiUpgrade(name='ProtoV4Upgrade_AllVersions_EndsAt_Trunk_HEAD',
-                 version_metas=[current_2_2_x, current_3_0_x, indev_3_x], protocol_version=4, extra_config=None),
-    MultiUpgrade(name='ProtoV4Upgrade_AllVersions_RandomPartitioner_EndsAt_Trunk_HEAD',
-                 version_metas=[current_2_2_x, current_3_0_x, indev_3_x], protocol_version=4,
-                 extra_config=(
-                     ('partitioner', 'org.apache.cassandra.dht.RandomPartitioner'),
-                 )),
-)
-
 for upgrade in MULTI_UPGRADES:
-    # if any version_metas are None, this means they are versions not to be tested currently
-    if all(upgrade.version_metas):
-        metas = upgrade.version_metas
-
-        if not RUN_STATIC_UPGRADE_MATRIX:
-            if metas[-1].matches_current_env_version_family:
-                # looks like this test should actually run in the current env, so let's set the final version to match the env exactly
-                oldmeta = metas[-1]
-                newmeta = oldmeta.clone_with_local_env_version()
-                debug("{} appears applicable to current env. Overriding final test version from {} to {}".format(upgrade.name, oldmeta.version, newmeta.version))
-                metas[-1] = newmeta
-
-        create_upgrade_class(upgrade.name, [m for m in metas], protocol_version=upgrade.protocol_version, extra_config=upgrade.extra_config)
+    metas = build_multi_upgrade_metas(upgrade)
+    if metas:
+        create_upgrade_class(upgrade.name, metas, protocol_version=upgrade.protocol_version, extra_config=upgrade.extra_config)
 
 
 for pair in build_upgrade_pairs():
@@ -3,6 +3,7 @@ import random
 
 from dtest import Tester, debug
 from tools.assertions import assert_length_equal
+from tools.sstable_writer import seed_table
 
 status_messages = (
     "I''m going to the Cassandra Summit in June!",
@@ -24,6 +25,8 @@ clients = (
 
 
 class TestWideRows(Tester):
+    lazy_driver_metadata = True  # only seed_table reads session.cluster.metadata, loading what it needs
+
     def test_wide_rows(self):
         self.write_wide_rows()
 
@@ -38,24 +41,25 @@ class TestWideRows(Tester):
         # Simple timeline:  user -> {date: value, ...}
         debug('Create Table....')
         session.execute('CREATE TABLE user_events (userid text, event timestamp, value text, PRIMARY KEY (userid, event));')
-        date = datetime.datetime.now()
-        # Create a large timeline for each of a group of users:
-        for user in ('ryan', 'cathy', 'mallen', 'joaquin', 'erin', 'ham'):
-            debug("Writing values for: %s" % user)
-            for day in xrange(5000):
-                date_str = (date + datetime.timedelta(day)).strftime("%Y-%m-%d")
-                client = random.choice(clients)
-                msg = random.choice(status_messages)
-                query = "UPDATE user_events SET value = '{msg:%s, client:%s}' WHERE userid='%s' and event='%s';" % (msg, client, user, date_str)
-                # debug(query)
-                session.execute(query)
+        date = datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+        def timelines():
+            # Create a large timeline for each of a group of users:
+            for user in ('ryan', 'cathy', 'mallen', 'joaquin', 'erin', 'ham'):
+                debug("Writing values for: %s" % user)
+                for day in xrange(5000):
+                    client = random.choice(clients)
+                    msg = random.choice(status_messages).replace("''", "'")
+                    yield {'userid': user, 'event': date + datetime.timedelta(day), 'value': '{msg:%s, client:%s}' % (msg, client)}
+
+        # written straight to SSTables, which takes seconds where 30k UPDATEs took minutes
+        self.assertEqual(seed_table(session, node1, 'user_events', timelines()), 30000)
 
         # debug('Duration of test: %s' % (datetime.datetime.now() - start_time))
 
         # Pick out an update for a specific date:
-        query = "SELECT value FROM user_events WHERE userid='ryan' and event='%s'" % \
-                (date + datetime.timedelta(10)).strftime("%Y-%m-%d")
-        rows = session.execute(query)
+        rows = list(session.execute("SELECT value FROM user_events WHERE userid='ryan' and event=%s", [date + datetime.timedelta(10)]))
+        assert_length_equal(rows, 1)
         for value in rows:
             debug(value)
             self.assertGreater(len(value[0]), 0)